@@ -0,0 +1,6 @@
+"""Micro-benchmarks for the Foodshare backend.
+
+Each module in this package is a standalone script that seeds a throwaway
+SQLite database and reports timings for one hot path. Run them from the
+backend directory, e.g. `python -m benchmarks.bench_feed`.
+"""
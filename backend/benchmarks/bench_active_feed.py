@@ -0,0 +1,155 @@
+"""Benchmark of the active feed on a database with a long foodshare history.
+
+Seeds a temporary database with N historical foodshares (about half closed,
+half ended but still flagged active, as databases collected before the cleanup
+scheduler ran) plus a few hundred live ones, then times the feed with the
+previous single-column indexes and with the `idx_foodshares_active_ends_utc`
+partial index:
+
+- ids: the feed predicate alone (`active = 1 AND datetime(ends) > datetime('now')`)
+- feed: `get_all_active_foodshares`, including creators, pictures and restrictions
+
+Usage:
+    python -m benchmarks.bench_active_feed [--history 100000] [--live 200] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from src.database import DatabaseManager
+
+FEED_PREDICATE = "f.active = 1 AND datetime(f.ends) > datetime('now')"
+
+OLD_INDEXES = [
+    "CREATE INDEX idx_foodshares_active ON foodshares(active)",
+    "CREATE INDEX idx_foodshares_ends ON foodshares(ends)",
+]
+
+
+async def seed(db: DatabaseManager, history: int, live: int) -> None:
+    """Populate the database with ended foodshares and a few live ones.
+
+    Args:
+        db (DatabaseManager): A connected, initialized database manager
+        history (int): Number of foodshares that have already ended
+        live (int): Number of active foodshares that have not ended yet
+    """
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    rows = [
+        (f"Old {i}", f"Building {i % 50}", now - timedelta(minutes=rng.randint(1, 525_600)), rng.random() < 0.5)
+        for i in range(history)
+    ]
+    rows += [
+        (f"Live {i}", f"Building {i % 50}", now + timedelta(minutes=rng.randint(10, 600)), True) for i in range(live)
+    ]
+    rng.shuffle(rows)
+    await db.conn.executemany("INSERT INTO foodshares (name, location, ends, active) VALUES (?, ?, ?, ?)", rows)
+    await db.conn.commit()
+
+
+async def feed_ids(db: DatabaseManager) -> list[int]:
+    """Run only the feed predicate.
+
+    Args:
+        db (DatabaseManager): The seeded database
+
+    Returns:
+        list[int]: The IDs of live foodshares
+    """
+    query = f"SELECT foodshare_id FROM foodshares f WHERE {FEED_PREDICATE}"
+    async with db.conn.execute(query) as cursor:
+        return [row["foodshare_id"] for row in await cursor.fetchall()]
+
+
+async def time_call(fn, db: DatabaseManager, repeat: int) -> tuple[float, int]:
+    """Time repeated calls of a feed query.
+
+    Args:
+        fn: Coroutine function taking the database
+        db (DatabaseManager): The seeded database
+        repeat (int): Number of timed iterations
+
+    Returns:
+        tuple[float, int]: Median milliseconds per call and the number of foodshares returned
+    """
+    result = await fn(db)  # warm the page cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn(db)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), len(result)
+
+
+async def query_plan(db: DatabaseManager) -> str:
+    """Return the plan SQLite picks for the feed predicate.
+
+    Args:
+        db (DatabaseManager): The seeded database
+
+    Returns:
+        str: The plan steps joined by '; '
+    """
+    query = f"EXPLAIN QUERY PLAN SELECT foodshare_id FROM foodshares f WHERE {FEED_PREDICATE}"
+    async with db.conn.execute(query) as cursor:
+        return "; ".join(row["detail"] for row in await cursor.fetchall())
+
+
+async def run(history: int, live: int, repeat: int) -> None:
+    """Seed the database and print a results table.
+
+    Args:
+        history (int): Number of ended foodshares to seed
+        live (int): Number of live foodshares to seed
+        repeat (int): Timed iterations per query and schema
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(str(Path(tmp) / "bench.sqlite"))
+        await db.connect()
+        await db.init_tables()
+        await seed(db, history, live)
+
+        query = "SELECT sql FROM sqlite_master WHERE name = 'idx_foodshares_active_ends_utc'"
+        async with db.conn.execute(query) as cursor:
+            create_partial = (await cursor.fetchone())["sql"]
+
+        results = {}
+        for name, statements in (
+            (
+                "single-column",
+                [
+                    "DROP INDEX idx_foodshares_active_ends_utc",
+                    "DROP INDEX IF EXISTS idx_foodshares_active_ends",
+                    *OLD_INDEXES,
+                ],
+            ),
+            ("partial", ["DROP INDEX idx_foodshares_active", "DROP INDEX idx_foodshares_ends", create_partial]),
+        ):
+            for statement in statements:
+                await db.conn.execute(statement)
+            ids_ms, rows = await time_call(feed_ids, db, repeat)
+            feed_ms, _ = await time_call(lambda db: db.get_all_active_foodshares(), db, repeat)
+            results[name] = (ids_ms, feed_ms, rows, await query_plan(db))
+        await db.close()
+
+    print(f"{history} ended foodshares, {live} live")
+    print(f"{'indexes':<13} | {'rows':>5} | {'ids ms':>8} | {'feed ms':>8} | plan")
+    print("-" * 100)
+    for name, (ids_ms, feed_ms, rows, plan) in results.items():
+        print(f"{name:<13} | {rows:>5} | {ids_ms:>8.2f} | {feed_ms:>8.2f} | {plan}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, default=100_000)
+    parser.add_argument("--live", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.history, args.live, args.repeat))
@@ -0,0 +1,162 @@
+"""Benchmark of expired picture cleanup against concurrent writes.
+
+Seeds a temporary database with N expired pictures, each with three rendition
+files on disk, then cleans them up while a second connection (standing in for
+another worker process) keeps inserting rows. Compares the previous cleanup,
+which deleted every expired picture in one transaction and unlinked files one at
+a time, with `StorageService.cleanup_expired_pictures` at several chunk sizes,
+and reports cleanup time and the latency of the concurrent writes.
+
+Usage:
+    python -m benchmarks.bench_cleanup [--pictures 20000] [--chunk-sizes 200 1000]
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import anyio
+
+from benchmarks.bench_read_pool import percentile
+from src.database import DatabaseManager
+from src.service import StorageService
+from src.storage import LocalFileStorage
+
+
+async def seed(db: DatabaseManager, storage: LocalFileStorage, num_pictures: int) -> None:
+    """Create `num_pictures` expired pictures with three small rendition files each.
+
+    Args:
+        db (DatabaseManager): A connected, initialized database manager
+        storage (LocalFileStorage): The store to write the files to
+        num_pictures (int): Number of pictures
+    """
+    expires = datetime.now(timezone.utc) - timedelta(days=1)
+    renditions = []
+    for i in range(num_pictures):
+        uris = [await storage.save(b"x" * 512, "webp") for _ in range(3)]
+        renditions.append((i + 1, uris))
+    await db.conn.executemany(
+        "INSERT INTO pictures (picture_id, expires, filepath, mimetype) VALUES (?, ?, ?, 'image/webp')",
+        [(picture_id, expires, uris[-1]) for picture_id, uris in renditions],
+    )
+    await db.conn.executemany(
+        "INSERT INTO picture_renditions (picture_id, size, filepath) VALUES (?, ?, ?)",
+        [
+            (picture_id, size, uri)
+            for picture_id, uris in renditions
+            for size, uri in zip((160, 400, 800), uris, strict=True)
+        ],
+    )
+    await db.conn.commit()
+
+
+async def cleanup_unbatched(service: StorageService) -> int:
+    """The cleanup before chunking: one fetchall and DELETE, then one exists() + unlink() per file.
+
+    Args:
+        service (StorageService): The service whose pictures to clean up
+
+    Returns:
+        int: The number of files deleted
+    """
+    db = service.db
+    now = datetime.now(tz=timezone.utc)
+    select_query = """
+        SELECT filepath FROM pictures WHERE expires < :now
+        UNION
+        SELECT pr.filepath FROM picture_renditions pr
+        JOIN pictures p ON p.picture_id = pr.picture_id
+        WHERE p.expires < :now
+    """
+    async with db.conn.execute(select_query, {"now": now}) as cursor:
+        filepaths = [row["filepath"] for row in await cursor.fetchall()]
+    await db.conn.execute("DELETE FROM pictures WHERE expires < ?", (now,))
+    await db.conn.commit()
+    for filepath in filepaths:
+        path = anyio.Path(service.storage.local_path(filepath))
+        if await path.exists():
+            await path.unlink()
+    return len(filepaths)
+
+
+async def writer(db: DatabaseManager, done: asyncio.Event, latencies: list[float]) -> None:
+    """Insert and commit a row every 2 ms until `done` is set.
+
+    Args:
+        db (DatabaseManager): A separate connection to the same database
+        done (asyncio.Event): Set when the cleanup has finished
+        latencies (list[float]): Collector for write latencies in milliseconds
+    """
+    while not done.is_set():
+        start = time.perf_counter()
+        await db.add_survey(3, 4, "bench", None)
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.002)
+
+
+async def run_once(num_pictures: int, chunk_size: int | None) -> tuple[float, int, list[float]]:
+    """Seed a fresh database and clean it up with concurrent writes.
+
+    Args:
+        num_pictures (int): Number of expired pictures
+        chunk_size (int | None): Pictures per transaction, or None for the previous unbatched cleanup
+
+    Returns:
+        tuple[float, int, list[float]]: Cleanup seconds, files deleted and write latencies in milliseconds
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.sqlite")
+        db = DatabaseManager(db_path)
+        await db.connect()
+        await db.init_tables()
+        service = StorageService(db, LocalFileStorage(str(Path(tmp) / "images")))
+        await seed(db, service.storage, num_pictures)
+        other = DatabaseManager(db_path)
+        await other.connect()
+
+        done = asyncio.Event()
+        latencies: list[float] = []
+        writer_task = asyncio.create_task(writer(other, done, latencies))
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        if chunk_size is None:
+            deleted = await cleanup_unbatched(service)
+        else:
+            deleted = await service.cleanup_expired_pictures(chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+        done.set()
+        await writer_task
+        await other.close()
+        await service.close()
+        return elapsed, deleted, latencies
+
+
+async def run(num_pictures: int, chunk_sizes: list[int]) -> None:
+    """Run the benchmark for the unbatched cleanup and every chunk size, and print a results table.
+
+    Args:
+        num_pictures (int): Number of expired pictures
+        chunk_sizes (list[int]): Chunk sizes to compare
+    """
+    print(f"{'cleanup':>10} | {'files':>6} | {'seconds':>7} | {'write p50':>9} | {'write p99':>9} | {'write max':>9}")
+    print("-" * 66)
+    for chunk_size in [None, *chunk_sizes]:
+        elapsed, deleted, latencies = await run_once(num_pictures, chunk_size)
+        label = "unbatched" if chunk_size is None else f"chunk {chunk_size}"
+        print(
+            f"{label:>10} | {deleted:>6} | {elapsed:>7.2f} | {statistics.median(latencies):>9.2f} | "
+            f"{percentile(latencies, 99):>9.2f} | {max(latencies):>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pictures", type=int, default=20000)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[200, 1000])
+    args = parser.parse_args()
+    asyncio.run(run(args.pictures, args.chunk_sizes))
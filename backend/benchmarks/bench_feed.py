@@ -0,0 +1,144 @@
+"""Benchmark for the active foodshare feed (`GET /foodshares`).
+
+Seeds a temporary database with N active foodshares (each with a creator,
+a picture and two restrictions) and compares the set-based loader used by
+`DatabaseManager.get_all_active_foodshares` against the previous per-row
+strategy of one `get_user`, `get_picture` and restrictions query per foodshare.
+
+Usage:
+    python -m benchmarks.bench_feed [--sizes 20 500 5000] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from src.database import DatabaseManager
+from src.database_helpers import Foodshare
+
+RESTRICTIONS = ["Vegan", "Vegetarian", "Gluten-Free", "Dairy-Free", "Nut-Free", "Halal", "Kosher"]
+
+
+async def seed(db: DatabaseManager, num_rows: int) -> None:
+    """Populate the database with `num_rows` active foodshares.
+
+    Args:
+        db (DatabaseManager): A connected, initialized database manager
+        num_rows (int): Number of active foodshares to create
+    """
+    ends = datetime.now(timezone.utc) + timedelta(days=1)
+    num_users = max(1, num_rows // 10)
+    await db.conn.executemany(
+        "INSERT INTO users (email, verified) VALUES (?, 1)",
+        [(f"bench{i}@maine.edu",) for i in range(num_users)],
+    )
+    await db.conn.executemany("INSERT INTO restrictions (label) VALUES (?)", [(r,) for r in RESTRICTIONS])
+    await db.conn.executemany(
+        "INSERT INTO pictures (expires, filepath, mimetype) VALUES (?, ?, 'image/webp')",
+        [(ends, f"/images/bench{i}.webp") for i in range(num_rows)],
+    )
+    await db.conn.executemany(
+        "INSERT INTO foodshares (name, location, ends, active, user_fk_id, picture_fk_id) VALUES (?, ?, ?, 1, ?, ?)",
+        [(f"Bench {i}", f"Building {i % 50}", ends, i % num_users + 1, i + 1) for i in range(num_rows)],
+    )
+    await db.conn.executemany(
+        "INSERT INTO foodshare_restrictions (foodshare_id, restriction_id) VALUES (?, ?)",
+        [(i + 1, i % len(RESTRICTIONS) + 1) for i in range(num_rows)]
+        + [(i + 1, (i + 3) % len(RESTRICTIONS) + 1) for i in range(num_rows)],
+    )
+    await db.conn.commit()
+
+
+async def per_row_feed(db: DatabaseManager) -> list[Foodshare]:
+    """Load the feed the way it was loaded before the set-based loader (4N+1 queries).
+
+    Args:
+        db (DatabaseManager): A connected database manager
+
+    Returns:
+        list[Foodshare]: The active foodshares
+    """
+    query = "SELECT * FROM foodshares WHERE active = 1 AND ends > CURRENT_TIMESTAMP"
+    async with db.conn.execute(query) as cursor:
+        rows = await cursor.fetchall()
+
+    foodshares = []
+    for row in rows:
+        creator = await db.get_user(row["user_fk_id"]) if row["user_fk_id"] else None
+        picture = await db.get_picture(row["picture_fk_id"]) if row["picture_fk_id"] else None
+        restrictions_query = """
+            SELECT r.label FROM restrictions r
+            JOIN foodshare_restrictions fr ON r.restriction_id = fr.restriction_id
+            WHERE fr.foodshare_id = ?
+        """
+        async with db.conn.execute(restrictions_query, (row["foodshare_id"],)) as cursor:
+            labels = [r["label"] for r in await cursor.fetchall()]
+        foodshares.append(
+            Foodshare(
+                foodshare_id=row["foodshare_id"],
+                name=row["name"],
+                location=row["location"],
+                ends=row["ends"],
+                restrictions=labels,
+                active=bool(row["active"]),
+                creator=creator,
+                picture=picture,
+            )
+        )
+    return foodshares
+
+
+async def time_call(fn, db: DatabaseManager, repeat: int) -> list[float]:
+    """Time repeated calls of an async feed loader.
+
+    Args:
+        fn: Coroutine function taking the database manager
+        db (DatabaseManager): A connected database manager
+        repeat (int): Number of timed iterations
+
+    Returns:
+        list[float]: Per-call latencies in milliseconds
+    """
+    await fn(db)  # warm the page cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn(db)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def run(sizes: list[int], repeat: int) -> None:
+    """Run the benchmark for every feed size and print a results table.
+
+    Args:
+        sizes (list[int]): Feed sizes to benchmark
+        repeat (int): Number of timed iterations per size and strategy
+    """
+    print(f"{'rows':>6} | {'strategy':<10} | {'median ms':>10} | {'p95 ms':>10}")
+    print("-" * 46)
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = DatabaseManager(str(Path(tmp) / "bench.sqlite"))
+            await db.connect()
+            await db.init_tables()
+            await seed(db, size)
+
+            strategies = [("per-row", per_row_feed), ("set-based", DatabaseManager.get_all_active_foodshares)]
+            for label, fn in strategies:
+                samples = sorted(await time_call(fn, db, repeat))
+                p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+                print(f"{size:>6} | {label:<10} | {statistics.median(samples):>10.2f} | {p95:>10.2f}")
+            await db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat))
@@ -0,0 +1,81 @@
+"""Benchmark of the paged feed (`GET /foodshares?limit=...`) against the whole feed.
+
+Seeds a temporary database like bench_active_feed (ended history plus live
+foodshares), then times loading the whole active feed and loading one page of
+it in each sort order, both the first page and one deep in the feed. Keyset
+pagination should make every page cost about the same, independent of both
+the size of the feed and the depth of the page.
+
+Usage:
+    python -m benchmarks.bench_feed_page [--history 100000] [--live 2000] [--limit 20] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import tempfile
+from pathlib import Path
+
+from benchmarks.bench_active_feed import seed, time_call
+from src.database import DatabaseManager
+
+
+async def key_at(db: DatabaseManager, sort: str, limit: int, depth: int) -> list | None:
+    """Walk the feed to find the key that starts a page at a given depth.
+
+    Args:
+        db (DatabaseManager): The seeded database
+        sort (str): The feed order
+        limit (int): Page size
+        depth (int): Number of foodshares before the page
+
+    Returns:
+        list | None: The `after` key of the page
+    """
+    after = None
+    for _ in range(depth // limit):
+        after = (await db.get_active_foodshares_page(sort, limit, after)).next_key
+    return after
+
+
+async def run(history: int, live: int, limit: int, repeat: int) -> None:
+    """Seed the database and print a results table.
+
+    Args:
+        history (int): Number of ended foodshares to seed
+        live (int): Number of live foodshares to seed
+        limit (int): Page size
+        repeat (int): Timed iterations per query
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(str(Path(tmp) / "bench.sqlite"))
+        await db.connect()
+        await db.init_tables()
+        await seed(db, history, live)
+
+        results = [("whole feed", *await time_call(lambda db: db.get_all_active_foodshares(), db, repeat))]
+        for sort in ("ending", "newest"):
+            for depth in (0, live // 2):
+                after = await key_at(db, sort, limit, depth)
+
+                async def load_page(db: DatabaseManager, sort=sort, after=after) -> list:
+                    return (await db.get_active_foodshares_page(sort, limit, after)).foodshares
+
+                ms, rows = await time_call(load_page, db, repeat)
+                results.append((f"{sort}, after {depth}", ms, rows))
+        await db.close()
+
+    print(f"{history} ended foodshares, {live} live, pages of {limit}")
+    print(f"{'query':<20} | {'rows':>5} | {'ms':>8}")
+    print("-" * 40)
+    for name, ms, rows in results:
+        print(f"{name:<20} | {rows:>5} | {ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, default=100_000)
+    parser.add_argument("--live", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.history, args.live, args.limit, args.repeat))
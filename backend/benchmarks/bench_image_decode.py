@@ -0,0 +1,157 @@
+"""Benchmark of process_image time and peak memory on large uploads.
+
+Generates a corpus of synthetic phone-sized photos (JPEG, PNG and, when
+pillow-heif is installed, HEIC), then runs each one through the current
+`process_image` and through the previous full-decode pipeline. Every
+measurement runs in a fresh child process so peak RSS is not polluted by earlier
+runs; the reported memory is the child's peak RSS growth while processing
+(Linux `VmHWM`, reset through /proc/self/clear_refs).
+
+HEIC inputs are only generated at 12 MP: pillow-heif encodes a single untiled
+HEVC frame, which libde265 cannot decode at larger sizes. Real phone HEICs are
+tiled and decode fine.
+
+Usage:
+    python -m benchmarks.bench_image_decode [--megapixels 12 48] [--repeat 3]
+"""
+
+import argparse
+import io
+import multiprocessing
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from src.image_utils import process_image
+
+# 4:3 dimensions of common phone sensors
+SIZES = {12: (4032, 3024), 24: (5712, 4284), 48: (8064, 6048)}
+
+
+def process_image_full_decode(file_stream: bytes, target_size: int = 800) -> io.BytesIO:
+    """The pipeline before draft/reduce: decode, rotate and convert at full size.
+
+    Args:
+        file_stream (bytes): The raw image data
+        target_size (int): The target width and height
+
+    Returns:
+        io.BytesIO: The WebP output
+    """
+    with Image.open(io.BytesIO(file_stream)) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("RGB")
+        width, height = img.size
+        side = min(width, height)
+        left, top = (width - side) // 2, (height - side) // 2
+        img = img.crop((left, top, left + side, top + side))
+        img = img.resize((target_size, target_size), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        img.save(output, format="WEBP", quality=80, method=6)
+        output.seek(0)
+        return output
+
+
+def make_photo(size: tuple[int, int], fmt: str) -> bytes:
+    """Create a photo-like image: smooth gradients with mild sensor noise.
+
+    Args:
+        size (tuple[int, int]): Width and height in pixels
+        fmt (str): Pillow format name to encode as
+
+    Returns:
+        bytes: The encoded image
+    """
+    gradient = Image.linear_gradient("L").resize(size)
+    base = Image.merge("RGB", (gradient, gradient.transpose(Image.Transpose.ROTATE_180), gradient.rotate(90)))
+    noise = Image.effect_noise(size, 40).convert("RGB")
+    photo = Image.blend(base, noise, 0.15)
+    buf = io.BytesIO()
+    photo.save(buf, format=fmt, **({"quality": 90} if fmt in ("JPEG", "HEIF") else {}))
+    return buf.getvalue()
+
+
+def read_rss_kib(field: str) -> int:
+    """Read a memory field of this process from /proc/self/status.
+
+    Args:
+        field (str): 'VmRSS' for current or 'VmHWM' for peak resident set size
+
+    Returns:
+        int: The value in KiB
+    """
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith(f"{field}:"):
+            return int(line.split()[1])
+    raise RuntimeError(f"{field} not found in /proc/self/status")
+
+
+def measure(path: str, pipeline: str, repeat: int) -> tuple[float, float]:
+    """Process one file in this (fresh) process.
+
+    Args:
+        path (str): Path of the encoded input
+        pipeline (str): 'draft' for `process_image`, 'full' for the previous pipeline
+        repeat (int): Number of timed runs
+
+    Returns:
+        tuple[float, float]: Median milliseconds per image and peak RSS growth in MiB
+    """
+    # Importing here registers the HEIF opener in the child
+    import src.image_utils  # noqa: F401
+
+    func = process_image if pipeline == "draft" else process_image_full_decode
+    data = Path(path).read_bytes()
+    # Reset the peak RSS high-water mark so it only covers processing
+    Path("/proc/self/clear_refs").write_text("5")
+    baseline = read_rss_kib("VmRSS")
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), (read_rss_kib("VmHWM") - baseline) / 1024
+
+
+def run(megapixels: list[int], repeat: int) -> None:
+    """Build the corpus and print a results table.
+
+    Args:
+        megapixels (list[int]): Photo sizes to generate (keys of SIZES)
+        repeat (int): Timed runs per image and pipeline
+    """
+    formats = ["JPEG", "PNG"]
+    try:
+        import pillow_heif  # noqa: F401
+
+        formats.append("HEIF")
+    except ImportError:
+        print("pillow-heif not installed; skipping HEIC")
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'input':>10} | {'MB':>5} | {'pipeline':>8} | {'ms/image':>8} | {'peak MiB':>8}")
+        print("-" * 52)
+        for mp in megapixels:
+            for fmt in formats:
+                if fmt == "HEIF" and mp > 12:
+                    continue
+                path = Path(tmp) / f"{mp}mp.{fmt.lower()}"
+                path.write_bytes(make_photo(SIZES[mp], fmt))
+                size_mb = path.stat().st_size / 1e6
+                for pipeline in ("full", "draft"):
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                        ms, peak = executor.submit(measure, str(path), pipeline, repeat).result()
+                    print(f"{f'{mp}MP {fmt}':>10} | {size_mb:>5.1f} | {pipeline:>8} | {ms:>8.0f} | {peak:>8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megapixels", type=int, nargs="+", choices=sorted(SIZES), default=[12, 48])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.megapixels, args.repeat)
@@ -0,0 +1,139 @@
+"""Benchmark of feed latency while image uploads are being processed.
+
+Keeps N uploads in flight through an ImagePool (each one a phone-sized JPEG run
+through `process_image`) while concurrent readers load and serialize the active
+feed, and reports feed latency percentiles and image throughput. Compares the
+thread fallback (0 workers) with worker processes.
+
+Usage:
+    python -m benchmarks.bench_image_pool [--workers 0 2] [--uploads 0 2 8] [--feed-requests 300]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import statistics
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from PIL import Image
+
+from benchmarks.bench_feed import seed
+from benchmarks.bench_read_pool import percentile
+from src.database import DatabaseManager
+from src.image_pool import ImagePool
+
+
+def make_photo(size: tuple[int, int] = (3024, 4032)) -> bytes:
+    """Create a noisy JPEG the size of a typical phone photo.
+
+    Args:
+        size (tuple[int, int]): Width and height in pixels
+
+    Returns:
+        bytes: The encoded JPEG
+    """
+    buf = io.BytesIO()
+    Image.effect_noise(size, 64).convert("RGB").save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+async def uploader(pool: ImagePool, photo: bytes, done: asyncio.Event, processed: list[int]) -> None:
+    """Process the photo repeatedly until `done` is set.
+
+    Args:
+        pool (ImagePool): The image pool under test
+        photo (bytes): The encoded photo
+        done (asyncio.Event): Set when the feed readers have finished
+        processed (list[int]): Collector with one entry per processed image
+    """
+    while not done.is_set():
+        await pool.process(photo)
+        processed.append(1)
+
+
+async def feed_reader(db: DatabaseManager, num_requests: int, latencies: list[float]) -> None:
+    """Load and serialize the active feed like GET /foodshares on a cache miss.
+
+    Args:
+        db (DatabaseManager): The seeded database
+        num_requests (int): Number of feed loads
+        latencies (list[float]): Collector for latencies in milliseconds
+    """
+    for _ in range(num_requests):
+        start = time.perf_counter()
+        foodshares = await db.get_all_active_foodshares()
+        json.dumps([asdict(f) for f in foodshares], default=str)
+        latencies.append((time.perf_counter() - start) * 1000)
+        # Pace the readers like clients polling, rather than saturating the loop
+        await asyncio.sleep(0.005)
+
+
+async def run_once(db: DatabaseManager, photo: bytes, workers: int, uploads: int, feed_requests: int):
+    """Measure feed latency with `uploads` images in flight.
+
+    Args:
+        db (DatabaseManager): The seeded database
+        photo (bytes): The encoded photo
+        workers (int): Number of image worker processes
+        uploads (int): Number of concurrent uploads
+        feed_requests (int): Total feed loads, split across 10 readers
+
+    Returns:
+        tuple[list[float], float]: Feed latencies in milliseconds and images processed per second
+    """
+    pool = ImagePool(max_workers=workers, max_pending=max(uploads, 1))
+    await pool.warm_up()
+    done = asyncio.Event()
+    processed: list[int] = []
+    latencies: list[float] = []
+
+    upload_tasks = [asyncio.create_task(uploader(pool, photo, done, processed)) for _ in range(uploads)]
+    start = time.perf_counter()
+    await asyncio.gather(*(feed_reader(db, feed_requests // 10, latencies) for _ in range(10)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await asyncio.gather(*upload_tasks)
+    await pool.close()
+    return latencies, len(processed) / elapsed
+
+
+async def run(workers_list: list[int], uploads_list: list[int], feed_requests: int, feed_rows: int) -> None:
+    """Run the benchmark for every combination and print a results table.
+
+    Args:
+        workers_list (list[int]): Image worker counts to compare
+        uploads_list (list[int]): Numbers of uploads in flight to compare
+        feed_requests (int): Feed loads per run
+        feed_rows (int): Number of active foodshares to seed
+    """
+    photo = make_photo()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(str(Path(tmp) / "bench.sqlite"))
+        await db.connect()
+        await db.init_tables()
+        await seed(db, feed_rows)
+
+        print(f"{'workers':>7} | {'uploads':>7} | {'images/s':>8} | {'p50 ms':>8} | {'p99 ms':>8}")
+        print("-" * 50)
+        for workers in workers_list:
+            for uploads in uploads_list:
+                latencies, images_per_second = await run_once(db, photo, workers, uploads, feed_requests)
+                print(
+                    f"{workers:>7} | {uploads:>7} | {images_per_second:>8.2f} | "
+                    f"{statistics.median(latencies):>8.2f} | {percentile(latencies, 99):>8.2f}"
+                )
+        await db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--uploads", type=int, nargs="+", default=[0, 2, 8])
+    parser.add_argument("--feed-requests", type=int, default=300)
+    parser.add_argument("--feed-rows", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.workers, args.uploads, args.feed_requests, args.feed_rows))
@@ -0,0 +1,136 @@
+"""Load benchmark for the DatabaseManager read connection pool.
+
+Replays the locustfile.py task mix (50 feed reads : 1 foodshare create :
+1 survey submit, each preceded by the `require_auth` session lookups) from
+many concurrent virtual users against a seeded temporary database, once per
+read pool size, and reports feed latency percentiles.
+
+Usage:
+    python -m benchmarks.bench_read_pool [--pool-sizes 0 4] [--users 50] [--requests 40]
+"""
+
+import argparse
+import asyncio
+import random
+import secrets
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from benchmarks.bench_feed import seed
+from src.database import DatabaseManager
+from src.database_helpers import hash_token
+
+
+async def authorize(db: DatabaseManager, token_hash: str) -> None:
+    """Run the same database calls as `require_auth` for one request.
+
+    Args:
+        db (DatabaseManager): The database manager under test
+        token_hash (str): Hashed bearer token of the virtual user
+    """
+    session = await db.get_session_by_token(token_hash)
+    assert session is not None
+    await db.update_token_usage(token_hash)
+    await db.get_user(session.user_id)
+
+
+async def virtual_user(db: DatabaseManager, token_hash: str, num_requests: int, feed_latencies: list[float]) -> None:
+    """Issue a stream of weighted requests like a locust `FoodshareUser`.
+
+    Args:
+        db (DatabaseManager): The database manager under test
+        token_hash (str): Hashed bearer token of the virtual user
+        num_requests (int): Number of requests to issue
+        feed_latencies (list[float]): Collector for feed request latencies in milliseconds
+    """
+    ends = datetime.now(timezone.utc) + timedelta(days=1)
+    for _ in range(num_requests):
+        task = random.choices(["feed", "create", "survey"], weights=[50, 1, 1])[0]
+        start = time.perf_counter()
+        await authorize(db, token_hash)
+        if task == "feed":
+            await db.get_all_active_foodshares()
+            feed_latencies.append((time.perf_counter() - start) * 1000)
+        elif task == "create":
+            picture_id = await db.add_picture(ends, "/images/load.webp", "image/webp")
+            await db.add_foodshare("Load Test Item", "Building 1", ends, True, 1, picture_id)
+        else:
+            await db.add_survey(random.randint(1, 20), random.randint(1, 5), "Load test", None)
+
+
+async def run_once(pool_size: int, num_users: int, num_requests: int, feed_rows: int) -> tuple[list[float], float]:
+    """Seed a fresh database and replay the request mix for one pool size.
+
+    Args:
+        pool_size (int): Number of read connections
+        num_users (int): Number of concurrent virtual users
+        num_requests (int): Requests per virtual user
+        feed_rows (int): Number of active foodshares to seed
+
+    Returns:
+        tuple[list[float], float]: Feed request latencies in milliseconds and total wall time in seconds
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(str(Path(tmp) / "bench.sqlite"), read_pool_size=pool_size)
+        await db.connect()
+        await db.init_tables()
+        await seed(db, feed_rows)
+
+        token_hashes = []
+        for i in range(num_users):
+            token_hash = hash_token(secrets.token_urlsafe(32))
+            await db.create_device_token(i % max(1, feed_rows // 10) + 1, token_hash)
+            token_hashes.append(token_hash)
+
+        feed_latencies: list[float] = []
+        start = time.perf_counter()
+        await asyncio.gather(*(virtual_user(db, t, num_requests, feed_latencies) for t in token_hashes))
+        elapsed = time.perf_counter() - start
+        await db.close()
+        return feed_latencies, elapsed
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Return the nearest-rank percentile of a list of samples.
+
+    Args:
+        samples (list[float]): The samples
+        pct (float): Percentile between 0 and 100
+
+    Returns:
+        float: The percentile value
+    """
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(pool_sizes: list[int], num_users: int, num_requests: int, feed_rows: int) -> None:
+    """Run the load benchmark for every pool size and print a results table.
+
+    Args:
+        pool_sizes (list[int]): Read pool sizes to compare
+        num_users (int): Number of concurrent virtual users
+        num_requests (int): Requests per virtual user
+        feed_rows (int): Number of active foodshares to seed
+    """
+    print(f"{'pool':>4} | {'feed reqs':>9} | {'req/s':>8} | {'p50 ms':>8} | {'p99 ms':>8}")
+    print("-" * 51)
+    for pool_size in pool_sizes:
+        latencies, elapsed = await run_once(pool_size, num_users, num_requests, feed_rows)
+        print(
+            f"{pool_size:>4} | {len(latencies):>9} | {num_users * num_requests / elapsed:>8.1f} | "
+            f"{statistics.median(latencies):>8.2f} | {percentile(latencies, 99):>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[0, 4])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--feed-rows", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.pool_sizes, args.users, args.requests, args.feed_rows))
@@ -0,0 +1,192 @@
+"""Benchmark of the restriction-filtered feed (`GET /foodshares?restrictions=...`).
+
+Seeds a temporary database with N active foodshares, each tagged with one to
+three of 20 restriction labels (a few common, most rare), and times three ways
+of answering a filter:
+
+- client: load the whole feed and filter it in Python, as clients did before
+- no index: `get_all_active_foodshares` with a filter, without the
+  `idx_foodshare_restrictions_restriction` index
+- indexed: the same with the covering index
+
+Each database strategy is also timed for the filter subquery alone (the
+matching IDs, without loading the foodshares), which isolates what the index
+changes from the cost of assembling the result.
+
+Usage:
+    python -m benchmarks.bench_restriction_filter [--rows 10000] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from src.database import DatabaseManager
+from src.database_helpers import Foodshare
+
+LABELS = [f"Label {i}" for i in range(20)]
+
+# (labels, match_all) pairs: a common label, a rare one, several with 'any' and two with 'all'
+FILTERS = [
+    (["Label 0"], False),
+    (["Label 19"], False),
+    (["Label 3", "Label 9", "Label 15"], False),
+    (["Label 0", "Label 1"], True),
+]
+
+
+async def seed(db: DatabaseManager, num_rows: int) -> None:
+    """Populate the database with `num_rows` active foodshares and their restrictions.
+
+    Labels are drawn with Zipf-like weights, so 'Label 0' is on about a fifth of
+    the foodshares and 'Label 19' on about one in a hundred.
+
+    Args:
+        db (DatabaseManager): A connected, initialized database manager
+        num_rows (int): Number of active foodshares to create
+    """
+    rng = random.Random(42)
+    ends = datetime.now(timezone.utc) + timedelta(days=1)
+    await db.conn.executemany("INSERT INTO restrictions (label) VALUES (?)", [(label,) for label in LABELS])
+    await db.conn.executemany(
+        "INSERT INTO foodshares (name, location, ends, active) VALUES (?, ?, ?, 1)",
+        [(f"Bench {i}", f"Building {i % 50}", ends) for i in range(num_rows)],
+    )
+    weights = [1 / (rank + 1) for rank in range(len(LABELS))]
+    links = set()
+    for foodshare_id in range(1, num_rows + 1):
+        for restriction_id in rng.choices(range(1, len(LABELS) + 1), weights, k=rng.randint(1, 3)):
+            links.add((foodshare_id, restriction_id))
+    await db.conn.executemany(
+        "INSERT INTO foodshare_restrictions (foodshare_id, restriction_id) VALUES (?, ?)", sorted(links)
+    )
+    await db.conn.commit()
+
+
+async def client_filter(db: DatabaseManager, labels: list[str], match_all: bool) -> list[Foodshare]:
+    """Filter the whole feed in Python.
+
+    Args:
+        db (DatabaseManager): The seeded database
+        labels (list[str]): Labels to filter by
+        match_all (bool): Require every label rather than any
+
+    Returns:
+        list[Foodshare]: The matching foodshares
+    """
+    match = all if match_all else any
+    return [f for f in await db.get_all_active_foodshares() if match(label in f.restrictions for label in labels)]
+
+
+async def server_filter(db: DatabaseManager, labels: list[str], match_all: bool) -> list[Foodshare]:
+    """Filter the feed in the database.
+
+    Args:
+        db (DatabaseManager): The seeded database
+        labels (list[str]): Labels to filter by
+        match_all (bool): Require every label rather than any
+
+    Returns:
+        list[Foodshare]: The matching foodshares
+    """
+    return await db.get_all_active_foodshares(labels, match_all=match_all)
+
+
+async def filter_ids(db: DatabaseManager, labels: list[str], match_all: bool) -> list[int]:
+    """Run only the filter subquery that `get_all_active_foodshares` embeds.
+
+    Args:
+        db (DatabaseManager): The seeded database
+        labels (list[str]): Labels to filter by
+        match_all (bool): Require every label rather than any
+
+    Returns:
+        list[int]: The IDs of matching foodshares
+    """
+    restriction_ids = [db.restrictions.get_id(label) for label in labels]
+    placeholders = ", ".join("?" * len(restriction_ids))
+    having = f"HAVING COUNT(*) = {len(restriction_ids)}" if match_all else ""
+    query = f"""
+        SELECT foodshare_id FROM foodshare_restrictions
+        WHERE restriction_id IN ({placeholders})
+        GROUP BY foodshare_id {having}
+    """
+    async with db.conn.execute(query, restriction_ids) as cursor:
+        return [row["foodshare_id"] for row in await cursor.fetchall()]
+
+
+async def time_filter(fn, db: DatabaseManager, labels: list[str], match_all: bool, repeat: int):
+    """Time repeated calls of a filter strategy.
+
+    Args:
+        fn: Coroutine function taking the database, labels and match_all
+        db (DatabaseManager): The seeded database
+        labels (list[str]): Labels to filter by
+        match_all (bool): Require every label rather than any
+        repeat (int): Number of timed iterations
+
+    Returns:
+        tuple[float, int]: Median milliseconds per call and the number of foodshares returned
+    """
+    result = await fn(db, labels, match_all)  # warm the page cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn(db, labels, match_all)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), len(result)
+
+
+async def run(num_rows: int, repeat: int) -> None:
+    """Seed the database and print a results table.
+
+    Args:
+        num_rows (int): Number of active foodshares to seed
+        repeat (int): Timed iterations per filter and strategy
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(str(Path(tmp) / "bench.sqlite"))
+        await db.connect()
+        await db.init_tables()
+        await seed(db, num_rows)
+
+        results = {(tuple(labels), match_all): {} for labels, match_all in FILTERS}
+        for labels, match_all in FILTERS:
+            timings = results[(tuple(labels), match_all)]
+            timings["client"], timings["rows"] = await time_filter(client_filter, db, labels, match_all, repeat)
+
+        # Time the filter without the index, then with it recreated from the schema's own definition
+        query = "SELECT sql FROM sqlite_master WHERE name = 'idx_foodshare_restrictions_restriction'"
+        async with db.conn.execute(query) as cursor:
+            create_index = (await cursor.fetchone())["sql"]
+        for indexed in (False, True):
+            await db.conn.execute(create_index if indexed else "DROP INDEX idx_foodshare_restrictions_restriction")
+            for labels, match_all in FILTERS:
+                timings = results[(tuple(labels), match_all)]
+                timings[("ids", indexed)], _ = await time_filter(filter_ids, db, labels, match_all, repeat)
+                timings[("feed", indexed)], _ = await time_filter(server_filter, db, labels, match_all, repeat)
+        await db.close()
+
+    print(f"{'':<32} | {'':>5} | {'':>9} | {'no index':^19} | {'indexed':^19}")
+    columns = f"{'ids ms':>8} | {'feed ms':>8}"
+    print(f"{'filter':<32} | {'rows':>5} | {'client ms':>9} | {columns} | {columns}")
+    print("-" * 102)
+    for (labels, match_all), t in results.items():
+        name = f"{'all' if match_all else 'any'}: {', '.join(labels)}"
+        print(
+            f"{name:<32} | {t['rows']:>5} | {t['client']:>9.2f} | {t[('ids', False)]:>8.2f} | "
+            f"{t[('feed', False)]:>8.2f} | {t[('ids', True)]:>8.2f} | {t[('feed', True)]:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeat))
@@ -0,0 +1,102 @@
+"""Benchmark of WebP encode time and output size for every libwebp method.
+
+Runs a corpus of synthetic phone photos through `process_image_renditions` once
+per WebP `method` (0 = fastest, 6 = smallest) and reports the median time per
+upload and the total size of its renditions. Decoding is included in the time,
+so the differences between rows are the encoder cost alone.
+
+Usage:
+    python -m benchmarks.bench_webp_method [--images 4] [--quality 80] [--repeat 3]
+"""
+
+import argparse
+import io
+import statistics
+import time
+
+from PIL import Image
+
+from benchmarks.bench_image_decode import SIZES
+from src.image_utils import process_image_renditions
+
+
+def make_textured_photo(size: tuple[int, int], blob_scale: int) -> bytes:
+    """Create a JPEG with detail that survives downscaling, unlike plain noise.
+
+    Low-resolution noise is upscaled into soft blobs (like food and plates) and
+    mixed with gradients and fine grain, so the 800px renditions carry texture
+    for the encoder to work on.
+
+    Args:
+        size (tuple[int, int]): Width and height in pixels
+        blob_scale (int): Upscaling factor of the blob noise; smaller means busier images
+
+    Returns:
+        bytes: The encoded JPEG
+    """
+    width, height = size
+    blobs = Image.effect_noise((width // blob_scale, height // blob_scale), 90).resize(size, Image.Resampling.BICUBIC)
+    grain = Image.effect_noise(size, 30)
+    gradient = Image.linear_gradient("L").resize(size)
+    photo = Image.merge(
+        "RGB",
+        (
+            Image.blend(blobs, gradient, 0.3),
+            Image.blend(blobs.transpose(Image.Transpose.FLIP_LEFT_RIGHT), grain, 0.2),
+            Image.blend(gradient.rotate(90), blobs, 0.5),
+        ),
+    )
+    buf = io.BytesIO()
+    photo.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def make_corpus(num_images: int) -> list[bytes]:
+    """Create 12 MP JPEGs alternating orientation and level of detail.
+
+    Args:
+        num_images (int): Number of photos
+
+    Returns:
+        list[bytes]: The encoded photos
+    """
+    return [
+        make_textured_photo(SIZES[12] if i % 2 == 0 else SIZES[12][::-1], (16, 32)[i // 2 % 2])
+        for i in range(num_images)
+    ]
+
+
+def run(num_images: int, quality: int, repeat: int) -> None:
+    """Encode the corpus with every method and print a results table.
+
+    Args:
+        num_images (int): Number of photos in the corpus
+        quality (int): WebP quality
+        repeat (int): Timed runs per photo and method
+    """
+    corpus = make_corpus(num_images)
+    results = {}
+    for method in range(7):
+        timings, sizes = [], []
+        for photo in corpus:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                renditions = process_image_renditions(photo, quality=quality, method=method)
+                timings.append((time.perf_counter() - start) * 1000)
+            sizes.append(sum(buffer.getbuffer().nbytes for buffer in renditions.values()))
+        results[method] = (statistics.median(timings), statistics.mean(sizes) / 1024)
+
+    baseline_ms, baseline_kib = results[6]
+    print(f"{'method':>6} | {'ms/upload':>9} | {'vs 6':>6} | {'KiB/upload':>10} | {'vs 6':>6}")
+    print("-" * 50)
+    for method, (ms, kib) in results.items():
+        print(f"{method:>6} | {ms:>9.0f} | {ms / baseline_ms:>5.2f}x | {kib:>10.1f} | {kib / baseline_kib:>5.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=4)
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.images, args.quality, args.repeat)
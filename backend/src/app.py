@@ -22,8 +22,11 @@ Attributes:
 
 Endpoints:
     POST /users/<email>: Create a new user
-    GET /foodshares: Retrieve all active foodshares
+    GET /foodshares: Retrieve all active foodshares (cached body, gzip, ETag / If-None-Match)
+    GET /foodshares/changes: Retrieve foodshares created, updated, closed, expired or deleted since a cursor
+    GET /foodshares/events: Server-Sent Events stream of created, closed and expired foodshares
     POST /foodshares: Add a new foodshare with associated image
+    GET /surveys: Retrieve a page of surveys (admin only)
 
 Usage:
     Run directly to start the application server:
@@ -35,19 +38,34 @@ Usage:
 
 import logging
 import os
+import time
 from dataclasses import asdict
-from datetime import datetime
+from datetime import datetime, timezone
 
 import aiosqlite
 from dotenv import load_dotenv
-from quart import g, request
+from PIL import UnidentifiedImageError
+from quart import Response, g, request
 from quart.json import jsonify
 from quart_rate_limiter import RateLimiter
+from werkzeug.exceptions import RequestEntityTooLarge
 
 from src.auth_routes import auth_bp, require_admin, require_auth
+from src.cache import FeedCache, FeedSnapshot
 from src.core import QuartApp
 from src.database import DatabaseManager
+from src.database_helpers import (
+    FEED_SORTS,
+    Foodshare,
+    decode_changes_cursor,
+    decode_feed_cursor,
+    encode_changes_cursor,
+    encode_feed_cursor,
+)
 from src.email_service import ConsoleService, GmailService, MockService
+from src.events import EventHub, FoodshareEvent
+from src.image_pool import ImagePool, ImagePoolFull
+from src.image_utils import ImageTooLarge, check_image_dimensions
 
 # Blueprint for email token verification
 from src.service import StorageService
@@ -59,10 +77,39 @@ load_dotenv()
 app = QuartApp(__name__)
 app.config["DB_PATH"] = os.getenv("DB_PATH", "database.sqlite")
 app.config["UPLOAD_FOLDER"] = os.getenv("UPLOAD_FOLDER", "images")
+app.config["DB_READ_POOL_SIZE"] = int(os.getenv("DB_READ_POOL_SIZE", "0"))
+app.config["SESSION_CACHE_SIZE"] = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+app.config["SESSION_CACHE_TTL"] = float(os.getenv("SESSION_CACHE_TTL", "60"))
+app.config["TOKEN_USAGE_FLUSH_INTERVAL"] = float(os.getenv("TOKEN_USAGE_FLUSH_INTERVAL", "5"))
+app.config["FEED_CACHE_MAX_AGE"] = float(os.getenv("FEED_CACHE_MAX_AGE", "10"))
+app.config["FEED_CACHE_GZIP"] = os.getenv("FEED_CACHE_GZIP", "true").lower() == "true"
+app.config["FEED_PAGE_SIZE"] = int(os.getenv("FEED_PAGE_SIZE", "20"))
+app.config["FEED_MAX_PAGE_SIZE"] = int(os.getenv("FEED_MAX_PAGE_SIZE", "100"))
+app.config["EVENTS_QUEUE_SIZE"] = int(os.getenv("EVENTS_QUEUE_SIZE", "32"))
+app.config["EVENTS_HEARTBEAT_INTERVAL"] = float(os.getenv("EVENTS_HEARTBEAT_INTERVAL", "15"))
+app.config["EVENTS_EXPIRY_INTERVAL"] = float(os.getenv("EVENTS_EXPIRY_INTERVAL", "15"))
+app.config["IMAGE_WORKERS"] = int(os.getenv("IMAGE_WORKERS", "2"))
+app.config["IMAGE_QUEUE_DEPTH"] = int(os.getenv("IMAGE_QUEUE_DEPTH", "16"))
+app.config["IMAGE_WEBP_QUALITY"] = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+app.config["IMAGE_WEBP_METHOD"] = int(os.getenv("IMAGE_WEBP_METHOD", "6"))
+app.config["IMAGE_WEBP_FAST_METHOD"] = int(os.getenv("IMAGE_WEBP_FAST_METHOD", "2"))
+app.config["IMAGE_WEBP_FAST_METHOD_DEPTH"] = int(os.getenv("IMAGE_WEBP_FAST_METHOD_DEPTH", "4"))
+app.config["CLEANUP_INTERVAL"] = float(os.getenv("CLEANUP_INTERVAL", "300"))
+app.config["CLEANUP_JITTER"] = float(os.getenv("CLEANUP_JITTER", "30"))
+app.config["CLEANUP_BATCH_SIZE"] = int(os.getenv("CLEANUP_BATCH_SIZE", "500"))
+app.config["IMAGE_CONTENT_ADDRESSED"] = os.getenv("IMAGE_CONTENT_ADDRESSED", "true").lower() == "true"
+app.config["MAX_UPLOAD_SIZE"] = int(os.getenv("MAX_UPLOAD_SIZE", str(10 * 1024 * 1024)))
+# Whole request body, i.e. the picture plus the other form fields and multipart framing.
+# Enforced while the body is received, so larger requests are cut off before they are buffered
+app.config["MAX_CONTENT_LENGTH"] = app.config["MAX_UPLOAD_SIZE"] + 1024 * 1024
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Page sizes for GET /surveys
+SURVEY_PAGE_SIZE = 100
+MAX_SURVEY_PAGE_SIZE = 500
+
 # Initialize RateLimiter only if not in testing mode to avoid global state issues in tests
 if not app.config.get("TESTING"):
     rate_limiter = RateLimiter(app)
@@ -99,6 +146,21 @@ aiosqlite.register_converter("timestamp", convert_datetime)
 app.register_blueprint(auth_bp)
 
 
+@app.errorhandler(RequestEntityTooLarge)
+async def request_entity_too_large(error):
+    """Return a JSON error for request bodies over MAX_CONTENT_LENGTH.
+
+    Args:
+        error (RequestEntityTooLarge): The error raised while receiving the body
+
+    Returns:
+        tuple: JSON error response with status 413
+    """
+    logger.warning(f"Rejected request body larger than {app.config['MAX_CONTENT_LENGTH']} bytes: {request.path}")
+    max_mb = app.config["MAX_UPLOAD_SIZE"] // (1024 * 1024)
+    return jsonify({"error": f"File too large. Maximum file size is {max_mb}MB."}), 413
+
+
 @app.route("/users", methods=["POST"])
 async def create_user():
     """Create a new user with the given email in the JSON payload.
@@ -127,17 +189,267 @@ async def create_user():
         return jsonify({"error": "Internal server error occurred while creating user."}), 500
 
 
+def next_expiry(foodshares: list[Foodshare], now: float | None = None) -> float | None:
+    """Find the earliest end time still ahead among a list of foodshares.
+
+    Foodshares that have already ended are skipped: they stay active until the
+    cleanup job closes them, and an expiry in the past would make every request
+    rebuild the feed.
+
+    Args:
+        foodshares (list[Foodshare]): The foodshares to inspect
+        now (float | None): Current epoch seconds; defaults to `time.time()`
+
+    Returns:
+        float | None: The earliest future `ends` as epoch seconds, or None if there is none
+    """
+    now = time.time() if now is None else now
+    earliest = None
+    for foodshare in foodshares:
+        ends = foodshare.ends if isinstance(foodshare.ends, datetime) else datetime.fromisoformat(foodshare.ends)
+        if ends.tzinfo is None:
+            # Naive timestamps are compared against CURRENT_TIMESTAMP, which is UTC
+            ends = ends.replace(tzinfo=timezone.utc)
+        timestamp = ends.timestamp()
+        if timestamp > now and (earliest is None or timestamp < earliest):
+            earliest = timestamp
+    return earliest
+
+
+def not_modified(etag: str) -> Response:
+    """Build an empty 304 Not Modified response for the given entity tag.
+
+    Args:
+        etag (str): The current strong entity tag
+
+    Returns:
+        Response: The 304 response
+    """
+    response = Response("", status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+async def current_feed() -> FeedSnapshot:
+    """Return the serialized active feed, rebuilding it if a write or expiry made it stale.
+
+    Concurrent requests that find the feed stale wait for a single rebuild
+    instead of each querying and serializing it.
+
+    Returns:
+        FeedSnapshot: The current feed snapshot
+    """
+    db = app.storage.db
+    snapshot = app.feed_cache.get(db.feed_version)
+    if snapshot:
+        return snapshot
+
+    async with app.feed_cache.lock:
+        # Another request may have rebuilt the feed while this one was waiting
+        snapshot = app.feed_cache.get(db.feed_version)
+        if snapshot:
+            return snapshot
+
+        # Read the version and sync cursor first so a write racing with the load is never missed
+        version = db.feed_version
+        cursor = encode_changes_cursor(await db.get_latest_change_id(), datetime.now(tz=timezone.utc))
+        foodshares = await db.get_all_active_foodshares()
+        body = app.json.dumps([asdict(f) for f in foodshares]).encode()
+        return app.feed_cache.put(version, body, next_expiry(foodshares), cursor)
+
+
 @app.route("/foodshares", methods=["GET"])
 @require_auth
 async def get_all_active_foodshares():
-    """Retrieve all active foodshares from the database.
+    """Retrieve all active foodshares.
+
+    The body is serialized once per feed change and shared by every caller,
+    gzip-compressed when the client accepts it. Responses carry a strong ETag;
+    a request whose If-None-Match matches the current feed gets an empty 304.
+    The X-Changes-Cursor header is the `since` value for GET /foodshares/changes.
+
+    Query parameters:
+        restrictions: Comma-separated restriction labels; only foodshares with them are returned.
+            Filtered feeds are loaded from the database on every request and carry no ETag or cursor.
+        match: 'any' (default) for foodshares with at least one of the labels, 'all' for every label
+        limit: Page size, up to FEED_MAX_PAGE_SIZE (default FEED_PAGE_SIZE)
+        sort: 'ending' (default) for ending soonest first, 'newest' for most recently created first
+        cursor: `next_cursor` of the previous page
+
+    Passing any of limit, sort or cursor returns one page of the feed as
+    `{"foodshares": [...], "next_cursor": ...}` instead of the whole feed as a
+    list; `next_cursor` is null on the last page. Pages are loaded from the
+    database on every request, like filtered feeds.
+
+    Returns:
+        Response: JSON list of active foodshares, a page of them, or an empty 304 response
+    """
+    restrictions, match_all = None, False
+    restrictions_raw = request.args.get("restrictions")
+    if restrictions_raw is not None:
+        match = request.args.get("match", "any")
+        if match not in ("any", "all"):
+            return jsonify({"error": "Invalid 'match'; use 'any' or 'all'."}), 400
+        restrictions = [r.strip() for r in restrictions_raw.split(",") if r.strip()] or None
+        match_all = match == "all"
+
+    if any(param in request.args for param in ("limit", "sort", "cursor")):
+        return await feed_page(restrictions, match_all)
+
+    if restrictions:
+        try:
+            foodshares = await app.storage.db.get_all_active_foodshares(restrictions, match_all=match_all)
+        except Exception as e:
+            logger.error(f"Unexpected error in get_all_active_foodshares: {str(e)}", exc_info=True)
+            return jsonify({"error": "Internal server error occurred while retrieving foodshares"}), 500
+        response = jsonify([asdict(f) for f in foodshares])
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    try:
+        snapshot = await current_feed()
+    except Exception as e:
+        logger.error(f"Unexpected error in get_all_active_foodshares: {str(e)}", exc_info=True)
+        return jsonify({"error": "Internal server error occurred while retrieving foodshares"}), 500
+
+    use_gzip = snapshot.gzip_body is not None and request.accept_encodings["gzip"] > 0
+    body, etag = (snapshot.gzip_body, snapshot.gzip_etag) if use_gzip else (snapshot.body, snapshot.etag)
+    if request.if_none_match.contains(etag):
+        response = not_modified(etag)
+        response.headers["X-Changes-Cursor"] = snapshot.cursor
+        return response
+
+    response = Response(body, status=200, content_type="application/json")
+    if use_gzip:
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.headers["X-Changes-Cursor"] = snapshot.cursor
+    response.set_etag(etag)
+    return response
+
+
+async def feed_page(restrictions: list[str] | None, match_all: bool):
+    """Answer GET /foodshares with one page of the active feed.
+
+    Args:
+        restrictions (list[str] | None): Restriction labels to filter by, or None for the whole feed
+        match_all (bool): Require every label rather than any of them
 
     Returns:
-        tuple: JSON response with list of active foodshares or error message
+        tuple: JSON response with the page and the next cursor, or an error message
     """
-    foodshares = await app.storage.db.get_all_active_foodshares()
-    foodshares = [asdict(f) for f in foodshares]
-    return jsonify(foodshares), 200
+    try:
+        limit = int(request.args.get("limit", app.config["FEED_PAGE_SIZE"]))
+    except ValueError:
+        return jsonify({"error": "Invalid 'limit'"}), 400
+    if not 1 <= limit <= app.config["FEED_MAX_PAGE_SIZE"]:
+        return jsonify({"error": f"'limit' must be between 1 and {app.config['FEED_MAX_PAGE_SIZE']}"}), 400
+
+    sort, after = request.args.get("sort"), None
+    if sort is not None and sort not in FEED_SORTS:
+        return jsonify({"error": f"Invalid 'sort'; use one of: {', '.join(FEED_SORTS)}."}), 400
+    if "cursor" in request.args:
+        try:
+            cursor_sort, after = decode_feed_cursor(request.args["cursor"])
+        except ValueError:
+            return jsonify({"error": "Invalid 'cursor'"}), 400
+        # A cursor only makes sense in the order it was issued for
+        if sort is not None and sort != cursor_sort:
+            return jsonify({"error": "'cursor' was issued for a different 'sort'"}), 400
+        sort = cursor_sort
+    sort = sort or FEED_SORTS[0]
+
+    try:
+        page = await app.storage.db.get_active_foodshares_page(sort, limit, after, restrictions, match_all)
+    except Exception as e:
+        logger.error(f"Unexpected error in feed_page: {str(e)}", exc_info=True)
+        return jsonify({"error": "Internal server error occurred while retrieving foodshares"}), 500
+
+    next_cursor = encode_feed_cursor(sort, page.next_key) if page.next_key is not None else None
+    response = jsonify({"foodshares": [asdict(f) for f in page.foodshares], "next_cursor": next_cursor})
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@app.route("/foodshares/changes", methods=["GET"])
+@require_auth
+async def get_foodshare_changes():
+    """Retrieve the changes to the active feed since a sync cursor.
+
+    Query parameters:
+        since: Cursor from the X-Changes-Cursor header of GET /foodshares or from a
+            previous call to this endpoint
+
+    Returns:
+        tuple: JSON response with the changed foodshares and the next cursor, 410 if the
+        cursor is too old and the client must refetch GET /foodshares, or an error message
+    """
+    since = request.args.get("since")
+    if not since:
+        return jsonify({"error": "Missing 'since' cursor"}), 400
+
+    try:
+        since_change_id, since_time = decode_changes_cursor(since)
+    except ValueError:
+        return jsonify({"error": "Invalid 'since' cursor"}), 400
+
+    try:
+        result = await app.storage.db.get_foodshare_changes(since_change_id, since_time)
+        if result is None:
+            return jsonify({"error": "Cursor expired. Please refetch /foodshares."}), 410
+
+        return (
+            jsonify(
+                {
+                    "changes": [asdict(change) for change in result.changes],
+                    "cursor": encode_changes_cursor(result.last_change_id, result.as_of),
+                }
+            ),
+            200,
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error in get_foodshare_changes: {str(e)}", exc_info=True)
+        return jsonify({"error": "Internal server error occurred while retrieving changes"}), 500
+
+
+@app.route("/foodshares/events", methods=["GET"])
+@require_auth
+async def foodshare_events():
+    """Stream feed changes to the client as Server-Sent Events.
+
+    Sends 'created' (with the full foodshare), 'closed' and 'expired' events, and a
+    comment line as a heartbeat when the stream is idle. A client that stops reading
+    is sent an 'evicted' event and disconnected; it should reconnect and catch up
+    with GET /foodshares/changes.
+
+    Returns:
+        Response: A streaming text/event-stream response
+    """
+    hub = app.storage.events
+    subscriber = hub.subscribe()
+    heartbeat = app.config["EVENTS_HEARTBEAT_INTERVAL"]
+
+    async def stream():
+        try:
+            yield b": connected\n\n"
+            while True:
+                try:
+                    event = await subscriber.next_event(heartbeat)
+                except EOFError:
+                    if subscriber.evicted:
+                        yield b"event: evicted\ndata: {}\n\n"
+                    return
+                yield event.message if event else b": heartbeat\n\n"
+        finally:
+            hub.unsubscribe(subscriber)
+
+    response = Response(stream(), status=200, content_type="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    response.timeout = None
+    return response
 
 
 @app.route("/foodshares", methods=["POST"])
@@ -146,6 +458,7 @@ async def add_foodshare():
     """Add a new foodshare with associated picture.
 
     Validates file type, size, and format before creating the foodshare.
+    Responds 503 with Retry-After when the image workers are saturated.
 
     Returns:
         tuple: JSON response with success message and foodshare ID or error message
@@ -192,12 +505,24 @@ async def add_foodshare():
             logger.warning(f"Invalid MIME type for file: {picture.filename}")
             return jsonify({"error": "Invalid file type. Please upload an image file."}), 400
 
-        # Validate file size (max 10MB)
-        picture_data = picture.read()
-        file_size = len(picture_data)
-        if file_size > 10 * 1024 * 1024:  # 10MB
+        # Validate file size (max 10MB) before reading the upload into memory
+        file_size = picture.stream.seek(0, os.SEEK_END)
+        picture.stream.seek(0)
+        if file_size > app.config["MAX_UPLOAD_SIZE"]:
             logger.warning(f"File too large: {file_size} bytes")
-            return jsonify({"error": "File too large. Maximum file size is 10MB."}), 400
+            max_mb = app.config["MAX_UPLOAD_SIZE"] // (1024 * 1024)
+            return jsonify({"error": f"File too large. Maximum file size is {max_mb}MB."}), 400
+        picture_data = picture.read()
+
+        # Reject images that are not images or decode to absurd dimensions from the header alone
+        try:
+            check_image_dimensions(picture_data)
+        except ImageTooLarge as e:
+            logger.warning(f"Image dimensions too large: {str(e)}")
+            return jsonify({"error": "Image dimensions too large."}), 400
+        except UnidentifiedImageError:
+            logger.warning(f"Unrecognized image data in file: {picture.filename}")
+            return jsonify({"error": "Invalid image file."}), 400
 
         # Create the foodshare (processing handles conversion to optimized WebP)
         foodshare_id = await app.storage.create_foodshare_with_picture(
@@ -226,6 +551,12 @@ async def add_foodshare():
     except ValueError as e:
         logger.warning(f"Invalid date format in add_foodshare: {str(e)}")
         return jsonify({"error": "Invalid date format. Please use ISO format for dates."}), 400
+    except ImagePoolFull:
+        return (
+            jsonify({"error": "Too many uploads are being processed. Please try again shortly."}),
+            503,
+            {"Retry-After": "5"},
+        )
     except Exception as e:
         logger.error(f"Unexpected error in add_foodshare: {str(e)}", exc_info=True)
         return jsonify({"error": "Internal server error occurred while creating foodshare"}), 500
@@ -268,6 +599,7 @@ async def close_foodshare():
 
         if closed_id:
             logger.info(f"User {user.user_id} successfully closed foodshare with ID: {closed_id}")
+            app.storage.events.publish(FoodshareEvent("closed", closed_id))
             return jsonify({"success": True, "foodshare_id": closed_id}), 200
 
         return jsonify({"error": "Failed to close foodshare"}), 500
@@ -338,13 +670,28 @@ async def submit_survey():
 @require_auth
 @require_admin
 async def get_all_surveys():
-    """Retrieve all surveys from the database.
+    """Retrieve a page of surveys from the database.
+
+    Query parameters:
+        limit: Maximum number of surveys to return (default 100, capped at 500)
+        after_id: Only return surveys with a larger ID; pass the last `survey_id`
+            of the previous page to fetch the next one
 
     Returns:
-        tuple: JSON response with list of all surveys or error message
+        tuple: JSON response with list of surveys or error message
     """
     try:
-        surveys = await app.storage.db.get_all_surveys()
+        try:
+            limit = int(request.args.get("limit", SURVEY_PAGE_SIZE))
+            after_id = int(request.args.get("after_id", 0))
+        except ValueError:
+            return jsonify({"error": "'limit' and 'after_id' must be integers"}), 400
+
+        if limit < 1:
+            return jsonify({"error": "'limit' must be a positive integer"}), 400
+        limit = min(limit, MAX_SURVEY_PAGE_SIZE)
+
+        surveys = await app.storage.db.get_all_surveys(limit=limit, after_id=after_id)
         surveys_dict = [asdict(survey) for survey in surveys]
 
         return jsonify(surveys_dict), 200
@@ -366,12 +713,39 @@ async def startup():
     """
     # Add the storage service to the app
     try:
-        db = DatabaseManager(db_path=app.config["DB_PATH"])
+        db = DatabaseManager(
+            db_path=app.config["DB_PATH"],
+            read_pool_size=app.config["DB_READ_POOL_SIZE"],
+            session_cache_size=app.config["SESSION_CACHE_SIZE"],
+            session_cache_ttl=app.config["SESSION_CACHE_TTL"],
+        )
         await db.connect()
         await db.init_tables()
+        db.start_token_usage_flusher(app.config["TOKEN_USAGE_FLUSH_INTERVAL"])
         upload_folder = app.config.get("UPLOAD_FOLDER", "images")
         local_file_store = LocalFileStorage(upload_folder)
-        app.storage = StorageService(db, local_file_store)
+        images = ImagePool(
+            max_workers=app.config["IMAGE_WORKERS"],
+            max_pending=app.config["IMAGE_QUEUE_DEPTH"],
+            quality=app.config["IMAGE_WEBP_QUALITY"],
+            method=app.config["IMAGE_WEBP_METHOD"],
+            fast_method=app.config["IMAGE_WEBP_FAST_METHOD"],
+            fast_method_depth=app.config["IMAGE_WEBP_FAST_METHOD_DEPTH"],
+        )
+        await images.warm_up()
+        app.storage = StorageService(
+            db,
+            local_file_store,
+            EventHub(queue_size=app.config["EVENTS_QUEUE_SIZE"]),
+            images,
+            content_addressed=app.config["IMAGE_CONTENT_ADDRESSED"],
+        )
+        app.storage.start_expiry_watcher(app.config["EVENTS_EXPIRY_INTERVAL"])
+        if app.config["CLEANUP_INTERVAL"] > 0:
+            app.storage.start_cleanup_scheduler(
+                app.config["CLEANUP_INTERVAL"], app.config["CLEANUP_JITTER"], app.config["CLEANUP_BATCH_SIZE"]
+            )
+        app.feed_cache = FeedCache(max_age=app.config["FEED_CACHE_MAX_AGE"], compress=app.config["FEED_CACHE_GZIP"])
 
         # Initialize Email Service (if not already injected by tests)
         if not hasattr(app, "email_service"):
@@ -400,7 +774,7 @@ async def startup():
 async def shutdown():
     """Clean up resources after the application stops serving.
 
-    Closes the storage service connection.
+    Closes the storage service connection, flushing buffered token usage first.
 
     Raises:
         Exception: If there's an error during application shutdown
@@ -15,7 +15,7 @@ from quart import Blueprint, current_app, g, jsonify, request
 from quart_rate_limiter import rate_limit
 
 from src.core import QuartApp
-from src.database_helpers import OTPRecord, User, hash_token, validate_email_format
+from src.database_helpers import SESSION_MAX_IDLE, OTPRecord, User, hash_token, validate_email_format
 
 
 def conditional_rate_limit(limit: int, period: timedelta):
@@ -51,24 +51,34 @@ def require_auth(f):
         raw_token = auth_header.split(" ")[1]
         hashed_token = hash_token(raw_token)
 
+        # Hot tokens are authorized from memory; the cache is invalidated on logout, ban and user deletion
+        session_cache = app.storage.db.session_cache
+        cached = session_cache.get(hashed_token)
+        if cached:
+            await app.storage.db.update_token_usage(hashed_token)
+            g.user = cached[1]
+            return await f(*args, **kwargs)
+
+        generation = session_cache.generation
         session = await app.storage.db.get_session_by_token(hashed_token)
 
         if not session:
             return jsonify({"error": "Invalid or expired token"}), 401
 
         now = datetime.now(tz=timezone.utc).replace(tzinfo=None)
-        if now - session.last_used > timedelta(days=30):
+        if now - session.last_used > SESSION_MAX_IDLE:
             return jsonify({"error": "Session expired. Please log in again."}), 401
 
         if session.banned:
             return jsonify({"error": "This account is banned."}), 403
 
-        # Update token usage timestamp
+        # Buffered in memory and flushed in batches; expiry only needs day-level precision
         await app.storage.db.update_token_usage(hashed_token)
 
         user = await app.storage.get_user(user_id=session.user_id)
         if user is None:
             return jsonify({"error": "The user does not exist"}), 401
+        session_cache.put(hashed_token, session, user, generation)
         g.user = user
 
         return await f(*args, **kwargs)
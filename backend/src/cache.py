@@ -0,0 +1,267 @@
+"""In-process caches for the Foodshare backend.
+
+This module holds small, bounded caches that let hot request paths skip database
+round-trips. Caches live in a single worker process; entries carry a short TTL so
+that changes made by other workers are picked up without explicit invalidation.
+
+Classes:
+    SessionCache: LRU/TTL cache of authenticated device sessions keyed by token hash
+    FeedCache: Pre-serialized body and ETag of the current active foodshare feed
+    RestrictionCache: Bidirectional map between restriction labels and IDs
+"""
+
+import asyncio
+import gzip
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from src.database_helpers import DeviceSession, User, restriction_key
+
+
+@dataclass
+class CachedSession:
+    """Data class representing a cached, already-validated device session.
+
+    Attributes:
+        session (DeviceSession): The session row as loaded from the database
+        user (User): The user that owns the session
+        expires_at (float): `time.monotonic()` deadline after which the entry is stale
+    """
+
+    session: DeviceSession
+    user: User
+    expires_at: float
+
+
+class SessionCache:
+    """Bounded LRU cache of validated device sessions with a per-entry TTL.
+
+    The cache is keyed by the hashed bearer token. Any invalidation bumps a
+    generation counter; `put` calls made with a generation read before the
+    invalidation are dropped, so a session loaded concurrently with a logout or
+    ban cannot be re-inserted.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 60.0) -> None:
+        """Initialize the SessionCache.
+
+        Args:
+            max_size (int): Maximum number of cached sessions before the least recently used is evicted
+            ttl (float): Seconds an entry stays valid; 0 or less disables caching
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = 0
+        self._entries: OrderedDict[str, CachedSession] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of cached sessions, including stale ones not yet evicted."""
+        return len(self._entries)
+
+    def get(self, token_hash: str) -> tuple[DeviceSession, User] | None:
+        """Return the cached session and user for a token, if present and fresh.
+
+        Args:
+            token_hash (str): The hash of the authentication token
+
+        Returns:
+            tuple[DeviceSession, User] | None: The cached pair, or None on a miss
+        """
+        entry = self._entries.get(token_hash)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[token_hash]
+            return None
+        self._entries.move_to_end(token_hash)
+        return entry.session, entry.user
+
+    def put(self, token_hash: str, session: DeviceSession, user: User, generation: int) -> None:
+        """Cache a validated session.
+
+        Args:
+            token_hash (str): The hash of the authentication token
+            session (DeviceSession): The validated session
+            user (User): The user that owns the session
+            generation (int): Value of `generation` read before the session was loaded
+        """
+        if self.ttl <= 0 or self.max_size <= 0 or generation != self.generation:
+            return
+        self._entries[token_hash] = CachedSession(session, user, time.monotonic() + self.ttl)
+        self._entries.move_to_end(token_hash)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate_token(self, token_hash: str) -> None:
+        """Drop the cached session for a single token.
+
+        Args:
+            token_hash (str): The hash of the authentication token
+        """
+        self.generation += 1
+        self._entries.pop(token_hash, None)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached session belonging to a user.
+
+        Args:
+            user_id (int): The ID of the user whose sessions should be dropped
+        """
+        self.generation += 1
+        stale = [token_hash for token_hash, entry in self._entries.items() if entry.user.user_id == user_id]
+        for token_hash in stale:
+            del self._entries[token_hash]
+
+    def clear(self) -> None:
+        """Drop every cached session."""
+        self.generation += 1
+        self._entries.clear()
+
+
+@dataclass
+class FeedSnapshot:
+    """Data class representing the last built active foodshare feed.
+
+    Attributes:
+        version (int): `DatabaseManager.feed_version` the feed was built from
+        body (bytes): The serialized JSON response body
+        etag (str): Strong entity tag of `body`
+        valid_until (float): `time.time()` after which the feed must be rebuilt, either
+            because a foodshare in it ends or because the snapshot reached its max age
+        gzip_body (bytes | None): `body` compressed with gzip, if compression is enabled
+        cursor (str | None): Delta sync cursor for GET /foodshares/changes taken before the feed was loaded
+    """
+
+    version: int
+    body: bytes
+    etag: str
+    valid_until: float
+    gzip_body: bytes | None = None
+    cursor: str | None = None
+
+    @property
+    def gzip_etag(self) -> str:
+        """Strong entity tag of the gzip representation."""
+        return f"{self.etag}-gzip"
+
+
+class FeedCache:
+    """Holds the serialized active feed so every reader shares one build.
+
+    A snapshot is current while the database feed version is unchanged and no
+    foodshare in it has ended. `max_age` bounds how long a snapshot is trusted,
+    which limits staleness when another worker process writes to the database.
+    `lock` lets concurrent requests that miss wait for a single rebuild.
+    """
+
+    def __init__(self, max_age: float = 10.0, compress: bool = True) -> None:
+        """Initialize the FeedCache.
+
+        Args:
+            max_age (float): Maximum seconds a snapshot is trusted without reloading the feed
+            compress (bool): Whether to keep a pre-gzipped copy of the body
+        """
+        self.max_age = max_age
+        self.compress = compress
+        self.lock = asyncio.Lock()
+        self._snapshot: FeedSnapshot | None = None
+
+    def get(self, version: int) -> FeedSnapshot | None:
+        """Return the snapshot if it is still current.
+
+        Args:
+            version (int): The current `DatabaseManager.feed_version`
+
+        Returns:
+            FeedSnapshot | None: The current snapshot, or None if the feed must be rebuilt
+        """
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version or snapshot.valid_until <= time.time():
+            return None
+        return snapshot
+
+    def put(self, version: int, body: bytes, next_expiry: float | None, cursor: str | None = None) -> FeedSnapshot:
+        """Record a freshly built feed.
+
+        Args:
+            version (int): `DatabaseManager.feed_version` read before the feed was loaded
+            body (bytes): The serialized JSON response body
+            next_expiry (float | None): Earliest end time (epoch seconds) of a foodshare in the feed
+            cursor (str | None): Delta sync cursor taken before the feed was loaded
+
+        Returns:
+            FeedSnapshot: The stored snapshot
+        """
+        now = time.time()
+        valid_until = now + self.max_age
+        # An expiry already past would leave the snapshot stale from the start
+        if next_expiry is not None and next_expiry > now:
+            valid_until = min(valid_until, next_expiry)
+        etag = hashlib.sha256(body).hexdigest()
+        gzip_body = gzip.compress(body, compresslevel=6, mtime=0) if self.compress else None
+        self._snapshot = FeedSnapshot(version, body, etag, valid_until, gzip_body, cursor)
+        return self._snapshot
+
+    def clear(self) -> None:
+        """Drop the snapshot."""
+        self._snapshot = None
+
+
+class RestrictionCache:
+    """Maps restriction labels to their IDs and back, so writes and feed loads skip the restrictions table.
+
+    The restriction vocabulary is tiny and rows are never deleted, so the whole
+    table is kept in memory without a TTL. Labels are matched by
+    `restriction_key`; when several stored labels share a key, the oldest one's
+    ID is used. A label or ID that is missing may have been added by another
+    worker process, so callers reload the table on a miss rather than treat it
+    as absent.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty RestrictionCache."""
+        self._ids: dict[str, int] = {}
+        self._labels: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        """Return the number of cached restrictions."""
+        return len(self._labels)
+
+    def get_id(self, label: str) -> int | None:
+        """Return the ID of the restriction matching a label.
+
+        Args:
+            label (str): The restriction label, in any case or spacing
+
+        Returns:
+            int | None: The restriction ID, or None if it is not cached
+        """
+        return self._ids.get(restriction_key(label))
+
+    def get_label(self, restriction_id: int) -> str | None:
+        """Return the stored label of a restriction.
+
+        Args:
+            restriction_id (int): The restriction ID
+
+        Returns:
+            str | None: The label, or None if it is not cached
+        """
+        return self._labels.get(restriction_id)
+
+    def add(self, restriction_id: int, label: str) -> None:
+        """Cache a stored restriction.
+
+        Args:
+            restriction_id (int): The restriction ID
+            label (str): The label as stored
+        """
+        self._labels[restriction_id] = label
+        self._ids.setdefault(restriction_key(label), restriction_id)
+
+    def clear(self) -> None:
+        """Drop every cached restriction."""
+        self._ids.clear()
+        self._labels.clear()
@@ -1,11 +1,56 @@
 """QuartApp definition to stop pyright from complaining about StorageService."""
 
-from quart import Quart
+from quart import Quart, Request
+from quart.wrappers.request import Body
+from werkzeug.exceptions import RequestEntityTooLarge
 
+from src.cache import FeedCache
 from src.email_service import EmailServiceProvider
 from src.service import StorageService
 
 
+class StreamingLimitBody(Body):
+    """Request body that enforces `max_content_length` on the total bytes received.
+
+    Quart's Body only compares the bytes it is still buffering against the limit.
+    The multipart parser consumes the body as it arrives, so an upload sent without
+    a Content-Length header (chunked) would never be cut off. This body counts every
+    byte received and aborts the request as soon as the limit is crossed.
+    """
+
+    def __init__(self, expected_content_length: int | None, max_content_length: int | None) -> None:
+        """Initialize the StreamingLimitBody.
+
+        Args:
+            expected_content_length (int | None): The Content-Length header, if sent
+            max_content_length (int | None): Maximum number of body bytes, or None for no limit
+        """
+        super().__init__(expected_content_length, max_content_length)
+        self.received = 0
+
+    def append(self, data: bytes) -> None:
+        """Receive a chunk of the body, aborting once the total exceeds the limit.
+
+        Args:
+            data (bytes): The received chunk
+        """
+        if self._must_raise is not None:
+            return
+        self.received += len(data)
+        if self._max_content_length is not None and self.received > self._max_content_length:
+            self._data.clear()
+            self._must_raise = RequestEntityTooLarge()
+            self.set_complete()
+            return
+        super().append(data)
+
+
+class StreamingLimitRequest(Request):
+    """Request whose body limit also applies to chunked uploads."""
+
+    body_class = StreamingLimitBody
+
+
 class QuartApp(Quart):
     """A custom Quart application class with storage and email support.
 
@@ -13,5 +58,8 @@ class QuartApp(Quart):
     for handling database operations, file storage, and email notifications.
     """
 
+    request_class = StreamingLimitRequest
+
     storage: StorageService  # Define storage explicitly to stop pyright from complaining
     email_service: EmailServiceProvider  # Define email service for async notifications
+    feed_cache: FeedCache  # Pre-serialized active feed shared by GET /foodshares
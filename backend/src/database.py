@@ -14,6 +14,11 @@ Key Functional Domains:
 Technical Details:
     * Powered by `aiosqlite` for non-blocking database I/O.
     * Enforces data integrity using SQLite PRAGMAs (WAL journal mode, foreign keys ON).
+    * The schema is versioned: `init_tables` applies pending migrations from `src.migrations`.
+    * A single writer connection handles all mutations; an optional pool of read-only
+      connections serves SELECT-only lookups concurrently under WAL.
+    * Writes run in units of work (`DatabaseManager.transaction`) that commit once, so
+      several writer methods can be grouped into one all-or-nothing transaction.
     * Entity models are strictly typed using dataclasses/Pydantic models from `src.database_helpers`.
 
 Usage:
@@ -24,20 +29,36 @@ Usage:
     await db.close()
 """
 
+import asyncio
+import json
 import logging
-from datetime import datetime, timezone
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime, timedelta, timezone
 
 import aiosqlite
 import anyio
 
+from src.cache import RestrictionCache, SessionCache
 from src.database_helpers import (
+    FEED_SORTS,
     DeviceSession,
     Foodshare,
+    FoodshareChange,
+    FoodshareChanges,
+    FoodsharePage,
     OTPRecord,
     PictureMetadata,
+    PictureRendition,
     Survey,
     User,
+    normalize_label,
+    restriction_key,
+    sqlite_datetime,
 )
+from src.migrations import Migration, migrate
 
 logger = logging.getLogger(__name__)
 
@@ -49,19 +70,47 @@ class DatabaseManager:
     foodshare listings, picture storage, and authentication tokens.
     """
 
-    def __init__(self, db_path: str) -> None:
+    def __init__(
+        self,
+        db_path: str,
+        read_pool_size: int = 0,
+        session_cache_size: int = 10_000,
+        session_cache_ttl: float = 60.0,
+    ) -> None:
         """Initialize the DatabaseManager with a path to the SQLite database.
 
         Args:
             db_path (str): Path to the SQLite database file
+            read_pool_size (int): Number of extra read-only connections used by
+                SELECT-only methods. 0 (the default) routes reads through the
+                writer connection. Ignored for in-memory databases, which cannot
+                be shared between connections.
+            session_cache_size (int): Maximum number of authenticated sessions kept in memory
+            session_cache_ttl (float): Seconds a cached session is trusted before being reloaded
         """
         self.db_path: str = db_path
+        self.read_pool_size: int = 0 if db_path == ":memory:" else max(0, read_pool_size)
+        self._read_conns: list[aiosqlite.Connection] = []
+        self._idle_readers: deque[aiosqlite.Connection] = deque()
+        self._read_slots = asyncio.Semaphore(self.read_pool_size)
+        self.session_cache = SessionCache(max_size=session_cache_size, ttl=session_cache_ttl)
+        # Restriction labels and IDs, loaded by init_tables so writes and feed loads skip the restrictions table
+        self.restrictions = RestrictionCache()
+        self._pending_token_usage: dict[str, datetime] = {}
+        self._flush_task: asyncio.Task | None = None
+        # Bumped on every write that can change the active feed; lets GET /foodshares answer 304 from memory
+        self.feed_version: int = 0
+        # Serializes units of work on the writer connection; see `transaction`
+        self._write_lock = asyncio.Lock()
+        self._transaction_owner: asyncio.Task | None = None
+        self._feed_dirty = False
 
     async def connect(self):
         """Establish connection to the database.
 
         Sets up database configuration options including WAL mode, foreign keys,
-        and synchronous settings for optimal performance.
+        and synchronous settings for optimal performance. The writer connection
+        is opened first so WAL mode is in place before the read pool is opened.
 
         Raises:
             Exception: If database connection fails
@@ -87,7 +136,15 @@ class DatabaseManager:
             await self.conn.execute("PRAGMA journal_mode=WAL")  # Helps concurrency
             await self.conn.execute("PRAGMA foreign_keys=ON")  # Enables foreign keys
             await self.conn.execute("PRAGMA synchronous=NORMAL")  # Better performance
-            logger.info("Database connection established successfully")
+
+            # Read-only connections let SELECTs run concurrently with each other and the writer under WAL
+            for _ in range(self.read_pool_size):
+                reader = await aiosqlite.connect(self.db_path, timeout=20.0)
+                reader.row_factory = aiosqlite.Row
+                await reader.execute("PRAGMA query_only=ON")
+                self._read_conns.append(reader)
+                self._idle_readers.append(reader)
+            logger.info(f"Database connection established successfully ({self.read_pool_size} read connections)")
         except Exception as e:
             logger.error(f"Failed to connect to database: {str(e)}", exc_info=True)
             raise
@@ -95,10 +152,23 @@ class DatabaseManager:
     async def close(self):
         """Close the database connection.
 
+        Stops the token usage flusher and writes any buffered timestamps first.
+
         Raises:
             Exception: If database connection fails to close properly
         """
         try:
+            if self._flush_task is not None:
+                self._flush_task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await self._flush_task
+                self._flush_task = None
+            await self.flush_token_usage()
+            for reader in self._read_conns:
+                await reader.close()
+            self._read_conns.clear()
+            self._idle_readers.clear()
+            self.session_cache.clear()
             if self.conn:
                 await self.conn.close()
                 logger.info("Database connection closed successfully")
@@ -106,29 +176,117 @@ class DatabaseManager:
             logger.error(f"Failed to close database connection: {str(e)}", exc_info=True)
             raise
 
-    async def init_tables(self):
-        """Initialize all database tables.
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a connection for a read-only query.
 
-        Reads the SQL schema from init_tables.sql and executes it to create
-        all required tables and indexes.
+        Yields a connection from the read pool, waiting for one to be returned if
+        all are busy, or the writer connection when the pool is disabled. Waiters
+        are served in FIFO order so no reader starves under load. The writer
+        connection is only lent out between units of work, so other tasks never
+        read rows that may still be rolled back; the task running a unit of work
+        reads its own writes.
+
+        Yields:
+            aiosqlite.Connection: The connection to run the query on
+        """
+        if not self._read_conns:
+            if self._transaction_owner is asyncio.current_task():
+                yield self.conn
+                return
+            async with self._write_lock:
+                yield self.conn
+            return
+
+        async with self._read_slots:
+            reader = self._idle_readers.popleft()
+            try:
+                yield reader
+            finally:
+                self._idle_readers.append(reader)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Run a unit of work on the writer connection, committed once at the end.
+
+        Writer methods called inside the block join it instead of committing on
+        their own, so either all of their changes are written or, if the block
+        raises, none are. One unit of work runs at a time: writers from other
+        tasks wait for it to finish, so they cannot commit or roll back its
+        statements halfway. Blocks nest, an inner block joining the outer one.
+
+        Yields:
+            aiosqlite.Connection: The writer connection
 
         Raises:
-            Exception: If table initialization fails
+            Exception: Whatever the block raised, after rolling back
         """
-        try:
-            current_dir = anyio.Path(__file__).parent
-            sql_file_path = current_dir / "sql" / "init_tables.sql"
+        task = asyncio.current_task()
+        if self._transaction_owner is task:
+            yield self.conn
+            return
+
+        async with self._write_lock:
+            self._transaction_owner = task
+            try:
+                yield self.conn
+                await self.conn.commit()
+            except BaseException:
+                await self.conn.rollback()
+                self._feed_dirty = False
+                # Invalidate anything built from the rolled-back rows while they were visible
+                self.feed_version += 1
+                # Restrictions created in the unit of work are gone; the cache reloads on the next miss
+                self.restrictions.clear()
+                raise
+            finally:
+                self._transaction_owner = None
+            if self._feed_dirty:
+                self._feed_dirty = False
+                self.feed_version += 1
+
+    def _feed_changed(self) -> None:
+        """Bump the feed version, or once the current unit of work commits if one is open."""
+        if self._transaction_owner is not None and self._transaction_owner is asyncio.current_task():
+            self._feed_dirty = True
+        else:
+            self.feed_version += 1
 
-            async with await anyio.open_file(sql_file_path, "r") as sql_file:
-                sql_content = await sql_file.read()
-                await self.conn.executescript(sql_content)
+    async def init_tables(self):
+        """Bring the database schema up to date and load the restriction cache.
+
+        Applies the migrations in `src/sql/migrations` that the database has not
+        had yet. On a database that is already current this is a single
+        `PRAGMA user_version` read.
 
-            await self.conn.commit()
+        Raises:
+            Exception: If a migration fails
+        """
+        try:
+            await self.migrate()
+            await self._load_restrictions(self.conn)
             logger.info("Database tables initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize database tables: {str(e)}", exc_info=True)
             raise
 
+    async def migrate(self, dry_run: bool = False) -> list[Migration]:
+        """Apply pending schema migrations on the writer connection.
+
+        Units of work from this process wait until the migrations are done.
+
+        Args:
+            dry_run (bool): Only report the migrations that would be applied
+
+        Returns:
+            list[Migration]: The migrations applied (or, with `dry_run`, pending)
+
+        Raises:
+            Exception: If a migration fails; the ones before it stay applied
+        """
+        async with self._write_lock:
+            return await migrate(self.conn, dry_run=dry_run)
+
     # User functions
 
     async def add_user(self, email: str, verified: bool = False, banned: bool = False) -> int | None:
@@ -150,8 +308,8 @@ class DatabaseManager:
                 INSERT INTO users (email, verified, banned)
                 VALUES (?, ?, ?)
             """
-            cursor = await self.conn.execute(query, (email, int(verified), int(banned)))
-            await self.conn.commit()
+            async with self.transaction():
+                cursor = await self.conn.execute(query, (email, int(verified), int(banned)))
             user_id = cursor.lastrowid
             logger.info(f"User added successfully with ID: {user_id}")
             return user_id
@@ -173,7 +331,7 @@ class DatabaseManager:
         """
         try:
             query = "SELECT * FROM users WHERE user_id = ?"
-            async with self.conn.execute(query, (user_id,)) as cursor:
+            async with self._reader() as conn, conn.execute(query, (user_id,)) as cursor:
                 row = await cursor.fetchone()
 
             if row:
@@ -206,7 +364,7 @@ class DatabaseManager:
         """
         try:
             query = "SELECT * FROM users WHERE email = ?"
-            async with self.conn.execute(query, (email,)) as cursor:
+            async with self._reader() as conn, conn.execute(query, (email,)) as cursor:
                 row = await cursor.fetchone()
 
             if row:
@@ -244,7 +402,7 @@ class DatabaseManager:
             JOIN device_tokens t ON u.user_id = t.user_id
             WHERE t.token_hash = ?
             """
-            async with self.conn.execute(query, (token,)) as cursor:
+            async with self._reader() as conn, conn.execute(query, (token,)) as cursor:
                 row = await cursor.fetchone()
                 if row:
                     user = User(
@@ -289,8 +447,10 @@ class DatabaseManager:
 
             query = f"UPDATE users SET {', '.join(updates)} WHERE user_id = ?"
             params.append(user_id)
-            await self.conn.execute(query, tuple(params))
-            await self.conn.commit()
+            async with self.transaction():
+                await self.conn.execute(query, tuple(params))
+            self.session_cache.invalidate_user(user_id)
+            self._feed_changed()
             logger.info(f"User status updated successfully for user ID: {user_id}")
         except Exception as e:
             logger.error(f"Failed to update user status for user {user_id}: {str(e)}", exc_info=True)
@@ -306,8 +466,10 @@ class DatabaseManager:
             Exception: If database operation fails
         """
         try:
-            await self.conn.execute("DELETE FROM users where user_id = ?", (user_id,))
-            await self.conn.commit()
+            async with self.transaction():
+                await self.conn.execute("DELETE FROM users where user_id = ?", (user_id,))
+            self.session_cache.invalidate_user(user_id)
+            self._feed_changed()
             logger.info(f"User deleted successfully: {user_id}")
         except Exception as e:
             logger.error(f"Failed to delete user {user_id}: {str(e)}", exc_info=True)
@@ -315,13 +477,24 @@ class DatabaseManager:
 
     # Picture functions
 
-    async def add_picture(self, expires: datetime, filepath: str, mimetype: str) -> int | None:
-        """Add a picture record to the database.
+    async def add_picture(
+        self,
+        expires: datetime,
+        filepath: str,
+        mimetype: str,
+        renditions: dict[int, str] | None = None,
+        content_hash: str | None = None,
+    ) -> int | None:
+        """Add a picture record, and its renditions, to the database.
+
+        The picture starts with one reference, held by the foodshare it is created for.
 
         Args:
             expires (datetime): When the picture expires
-            filepath (str): Path to the picture file
+            filepath (str): Path to the full-size picture file
             mimetype (str): MIME type of the picture
+            renditions (dict[int, str] | None): Path of each stored size, keyed by size in pixels
+            content_hash (str | None): SHA-256 of the original upload, so identical uploads can reuse the picture
 
         Returns:
             int | None: The ID of the newly created picture, or None if failed
@@ -331,18 +504,189 @@ class DatabaseManager:
         """
         try:
             query = """
-                INSERT INTO pictures (expires, filepath, mimetype)
-                VALUES (?, ?, ?)
+                INSERT INTO pictures (expires, filepath, mimetype, content_hash)
+                VALUES (?, ?, ?, ?)
             """
-            cursor = await self.conn.execute(query, (expires, filepath, mimetype))
-            await self.conn.commit()
-            picture_id = cursor.lastrowid
+            async with self.transaction():
+                cursor = await self.conn.execute(query, (expires, filepath, mimetype, content_hash))
+                picture_id = cursor.lastrowid
+                if renditions:
+                    await self.conn.executemany(
+                        "INSERT INTO picture_renditions (picture_id, size, filepath) VALUES (?, ?, ?)",
+                        [(picture_id, size, path) for size, path in renditions.items()],
+                    )
             logger.info(f"Picture added successfully with ID: {picture_id}")
             return picture_id
         except Exception as e:
             logger.error(f"Failed to add picture: {str(e)}", exc_info=True)
             raise
 
+    async def find_picture(self, content_hash: str) -> int | None:
+        """Look up a live picture with the given content hash without taking a reference.
+
+        Args:
+            content_hash (str): SHA-256 of the original upload
+
+        Returns:
+            int | None: The ID of the picture `acquire_picture` would reuse, or None if there is none
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            query = """
+                SELECT picture_id FROM pictures
+                WHERE content_hash = ? AND expires > ?
+                ORDER BY picture_id DESC LIMIT 1
+            """
+            params = (content_hash, datetime.now(tz=timezone.utc))
+            async with self._reader() as conn, conn.execute(query, params) as cursor:
+                row = await cursor.fetchone()
+            return row["picture_id"] if row else None
+        except Exception as e:
+            logger.error(f"Failed to find picture by hash: {str(e)}", exc_info=True)
+            raise
+
+    async def acquire_picture(self, content_hash: str, expires: datetime) -> int | None:
+        """Take another reference to a stored picture with the given content hash.
+
+        Only pictures that have not expired are reused, since expired ones may be
+        deleted by the next cleanup. The picture's expiry is extended to `expires`
+        if that is later, so it outlives every foodshare that references it.
+
+        Args:
+            content_hash (str): SHA-256 of the original upload
+            expires (datetime): When the new reference's picture should expire
+
+        Returns:
+            int | None: The ID of the reused picture, or None if no live picture has this hash
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            query = """
+                UPDATE pictures SET ref_count = ref_count + 1, expires = MAX(expires, :expires)
+                WHERE picture_id = (
+                    SELECT picture_id FROM pictures
+                    WHERE content_hash = :content_hash AND expires > :now
+                    ORDER BY picture_id DESC LIMIT 1
+                )
+                RETURNING picture_id
+            """
+            params = {"content_hash": content_hash, "expires": expires, "now": datetime.now(tz=timezone.utc)}
+            async with self.transaction(), self.conn.execute(query, params) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                return None
+            self._feed_changed()
+            logger.info(f"Reusing picture {row['picture_id']} for identical upload")
+            return row["picture_id"]
+        except Exception as e:
+            logger.error(f"Failed to acquire picture by hash: {str(e)}", exc_info=True)
+            raise
+
+    async def release_picture(self, picture_id: int) -> bool:
+        """Drop one reference to a picture, deleting its record when none remain.
+
+        Args:
+            picture_id (int): The ID of the picture
+
+        Returns:
+            bool: True if this was the last reference and the record was deleted, so its files can be removed
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            query = "UPDATE pictures SET ref_count = ref_count - 1 WHERE picture_id = ? RETURNING ref_count"
+            async with self.transaction():
+                async with self.conn.execute(query, (picture_id,)) as cursor:
+                    row = await cursor.fetchone()
+                deleted = row is not None and row["ref_count"] <= 0
+                if deleted:
+                    await self.conn.execute("DELETE FROM pictures WHERE picture_id = ?", (picture_id,))
+            self._feed_changed()
+            return deleted
+        except Exception as e:
+            logger.error(f"Failed to release picture {picture_id}: {str(e)}", exc_info=True)
+            raise
+
+    async def get_picture_filepaths(self) -> set[str]:
+        """Return the file path of every picture and rendition.
+
+        Returns:
+            set[str]: The distinct file paths
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            query = "SELECT filepath FROM pictures UNION SELECT filepath FROM picture_renditions"
+            async with self.conn.execute(query) as cursor:
+                return {row["filepath"] for row in await cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"Failed to get picture filepaths: {str(e)}", exc_info=True)
+            raise
+
+    async def get_referenced_filepaths(self, filepaths: list[str]) -> set[str]:
+        """Return which of the given file paths belong to a picture or rendition.
+
+        Args:
+            filepaths (list[str]): File paths to look up; keep batches under SQLite's variable limit
+
+        Returns:
+            set[str]: The file paths that are referenced
+
+        Raises:
+            Exception: If database operation fails
+        """
+        if not filepaths:
+            return set()
+        try:
+            placeholders = ", ".join("?" * len(filepaths))
+            query = f"""
+                SELECT filepath FROM pictures WHERE filepath IN ({placeholders})
+                UNION
+                SELECT filepath FROM picture_renditions WHERE filepath IN ({placeholders})
+            """
+            async with self._reader() as conn:
+                async with conn.execute(query, [*filepaths, *filepaths]) as cursor:
+                    return {row["filepath"] for row in await cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"Failed to look up referenced filepaths: {str(e)}", exc_info=True)
+            raise
+
+    async def rewrite_picture_filepaths(self, filepaths: dict[str, str]) -> int:
+        """Point pictures and renditions at new file paths.
+
+        Args:
+            filepaths (dict[str, str]): New file path keyed by old file path
+
+        Returns:
+            int: The number of picture and rendition rows updated
+
+        Raises:
+            Exception: If database operation fails
+        """
+        if not filepaths:
+            return 0
+        try:
+            params = list(filepaths.items())
+            updated = 0
+            async with self.transaction():
+                for table in ("pictures", "picture_renditions"):
+                    cursor = await self.conn.executemany(
+                        f"UPDATE {table} SET filepath = ? WHERE filepath = ?", [(new, old) for old, new in params]
+                    )
+                    updated += cursor.rowcount
+            self._feed_changed()
+            logger.info(f"Rewrote {updated} picture file paths")
+            return updated
+        except Exception as e:
+            logger.error(f"Failed to rewrite picture filepaths: {str(e)}", exc_info=True)
+            raise
+
     async def get_picture(self, picture_id: int) -> PictureMetadata | None:
         """Retrieve a picture by its ID.
 
@@ -357,8 +701,12 @@ class DatabaseManager:
         """
         try:
             query = "SELECT * FROM pictures WHERE picture_id = ?"
-            async with self.conn.execute(query, (picture_id,)) as cursor:
-                row = await cursor.fetchone()
+            renditions_query = "SELECT size, filepath FROM picture_renditions WHERE picture_id = ? ORDER BY size"
+            async with self._reader() as conn:
+                async with conn.execute(query, (picture_id,)) as cursor:
+                    row = await cursor.fetchone()
+                async with conn.execute(renditions_query, (picture_id,)) as cursor:
+                    renditions = [PictureRendition(r["size"], r["filepath"]) for r in await cursor.fetchall()]
 
             if row:
                 picture = PictureMetadata(
@@ -366,6 +714,7 @@ class DatabaseManager:
                     expires=row["expires"],
                     filepath=row["filepath"],
                     mimetype=row["mimetype"],
+                    renditions=renditions,
                 )
                 logger.debug(f"Picture retrieved successfully: {picture_id}")
                 return picture
@@ -375,32 +724,70 @@ class DatabaseManager:
             logger.error(f"Failed to get picture {picture_id}: {str(e)}", exc_info=True)
             raise
 
-    async def delete_expired_pictures(self) -> list[str]:
-        """Delete expired pictures and return their file paths.
+    async def iter_expired_pictures(self, chunk_size: int = 200, limit: int | None = None) -> AsyncIterator[list[str]]:
+        """Delete expired pictures in chunks, yielding the file paths of each chunk.
 
-        Returns:
-            list[str]: List of file paths that were deleted
+        Each chunk selects at most `chunk_size` expired picture IDs, reads their
+        file paths, deletes them by ID and commits, so the write lock is held for
+        one small transaction at a time and memory stays bounded however large the
+        backlog. Stopping the iteration early leaves the remaining pictures for
+        next time.
+
+        Args:
+            chunk_size (int): Maximum number of pictures per transaction
+            limit (int | None): Maximum number of pictures to delete in total, or None for all
+
+        Yields:
+            list[str]: File paths of a deleted chunk, including every rendition
 
         Raises:
             Exception: If database operation fails
         """
-        try:
-            now = datetime.now(tz=timezone.utc)
-            select_query = "SELECT filepath FROM pictures WHERE expires < ?"
-            async with self.conn.execute(select_query, (now,)) as cursor:
-                rows = await cursor.fetchall()
-                filepaths_to_delete = [row["filepath"] for row in rows]
+        remaining = limit
+        ids_query = "SELECT picture_id FROM pictures WHERE expires < ? ORDER BY picture_id LIMIT ?"
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            try:
+                async with self.transaction():
+                    async with self.conn.execute(ids_query, (datetime.now(tz=timezone.utc), size)) as cursor:
+                        picture_ids = [row["picture_id"] for row in await cursor.fetchall()]
+                    if not picture_ids:
+                        return
+
+                    placeholders = ", ".join("?" * len(picture_ids))
+                    select_query = f"""
+                        SELECT filepath FROM pictures WHERE picture_id IN ({placeholders})
+                        UNION
+                        SELECT filepath FROM picture_renditions WHERE picture_id IN ({placeholders})
+                    """
+                    async with self.conn.execute(select_query, [*picture_ids, *picture_ids]) as cursor:
+                        filepaths = [row["filepath"] for row in await cursor.fetchall()]
+                    await self.conn.execute(f"DELETE FROM pictures WHERE picture_id IN ({placeholders})", picture_ids)
+                self._feed_changed()
+                logger.info(f"Deleted {len(picture_ids)} expired pictures")
+            except Exception as e:
+                logger.error(f"Failed to delete expired pictures: {str(e)}", exc_info=True)
+                raise
 
-            if filepaths_to_delete:
-                delete_query = "DELETE FROM pictures WHERE expires < ?"
-                await self.conn.execute(delete_query, (now,))
-                await self.conn.commit()
-                logger.info(f"Deleted {len(filepaths_to_delete)} expired pictures")
+            if remaining is not None:
+                remaining -= len(picture_ids)
+            yield filepaths
+            if len(picture_ids) < size:
+                return
 
-            return filepaths_to_delete
-        except Exception as e:
-            logger.error(f"Failed to delete expired pictures: {str(e)}", exc_info=True)
-            raise
+    async def delete_expired_pictures(self, limit: int | None = None) -> list[str]:
+        """Delete expired pictures and return their file paths.
+
+        Args:
+            limit (int | None): Maximum number of pictures to delete, or None for all
+
+        Returns:
+            list[str]: List of file paths that were deleted, including every rendition
+
+        Raises:
+            Exception: If database operation fails
+        """
+        return [filepath async for chunk in self.iter_expired_pictures(limit=limit) for filepath in chunk]
 
     # Foodshare CRUD
 
@@ -435,11 +822,12 @@ class DatabaseManager:
                     (name, location, ends, active, user_fk_id, picture_fk_id)
                     VALUES (?, ?, ?, ?, ?, ?)
                 """
-            cursor = await self.conn.execute(
-                query,
-                (name, location, ends, int(active), user_fk_id, picture_fk_id),
-            )
-            await self.conn.commit()
+            async with self.transaction():
+                cursor = await self.conn.execute(
+                    query,
+                    (name, location, ends, int(active), user_fk_id, picture_fk_id),
+                )
+            self._feed_changed()
             foodshare_id = cursor.lastrowid
             logger.info(f"Foodshare added successfully with ID: {foodshare_id}")
             return foodshare_id
@@ -461,34 +849,97 @@ class DatabaseManager:
         INSERT OR IGNORE INTO foodshare_restrictions
         (foodshare_id, restriction_id) VALUES (?, ?)
         """
-        await self.conn.execute(query, (foodshare_id, restriction_id))
-        await self.conn.commit()
+        async with self.transaction():
+            await self.conn.execute(query, (foodshare_id, restriction_id))
+        self._feed_changed()
+
+    async def _load_restrictions(self, conn: aiosqlite.Connection) -> None:
+        """Replace the restriction cache with the current contents of the restrictions table.
+
+        Args:
+            conn (aiosqlite.Connection): The connection to read from; the writer inside a unit of work
+        """
+        async with conn.execute("SELECT restriction_id, label FROM restrictions ORDER BY restriction_id") as cursor:
+            rows = await cursor.fetchall()
+        self.restrictions.clear()
+        for row in rows:
+            self.restrictions.add(row["restriction_id"], row["label"])
+
+    async def _restriction_ids(self, labels: list[str]) -> list[int]:
+        """Resolve normalized labels to restriction IDs, creating the missing restrictions.
+
+        Labels found in the cache cost no query. On a miss the cache is reloaded
+        first, in case another worker process created the restriction, and only
+        then are the remaining labels inserted. Must be called inside a unit of work.
+
+        IDs are collected in a local map rather than read back from the cache:
+        while an insert is awaited, a reload on a pooled reader may replace the
+        cache with committed rows only, dropping the restrictions just created.
+
+        Args:
+            labels (list[str]): Normalized restriction labels
+
+        Returns:
+            list[int]: The restriction ID of each label, in order
+        """
+        ids = {label: self.restrictions.get_id(label) for label in labels}
+        if None in ids.values():
+            await self._load_restrictions(self.conn)
+            ids = {label: self.restrictions.get_id(label) for label in labels}
+            # The no-op update makes RETURNING report the ID even if another worker inserted the label meanwhile
+            query = """
+                INSERT INTO restrictions (label) VALUES (?)
+                ON CONFLICT(label) DO UPDATE SET label = excluded.label
+                RETURNING restriction_id
+            """
+            created = {}
+            for label, restriction_id in ids.items():
+                if restriction_id is None:
+                    async with self.conn.execute(query, (label,)) as cursor:
+                        created[label] = (await cursor.fetchone())["restriction_id"]
+                    logger.info(f"Created new restriction '{label}' with ID: {created[label]}")
+            ids.update(created)
+            for label, restriction_id in created.items():
+                self.restrictions.add(restriction_id, label)
+        return [ids[label] for label in labels]
+
+    async def _known_restriction_ids(self, labels: list[str]) -> list[int | None]:
+        """Resolve labels to restriction IDs without creating any.
+
+        Args:
+            labels (list[str]): Restriction labels, in any case or spacing; blank ones are ignored
+
+        Returns:
+            list[int | None]: The restriction ID of each label, or None for labels with no restriction
+        """
+        labels = [label for label in labels if normalize_label(label)]
+        if any(self.restrictions.get_id(label) is None for label in labels):
+            # Created by another worker process, or the cache was dropped by a rollback
+            async with self._reader() as conn:
+                await self._load_restrictions(conn)
+        return [self.restrictions.get_id(label) for label in labels]
 
     async def get_or_create_restriction(self, label: str) -> int | None:
         """Get the ID of a restriction by its label, creating it if it doesn't exist.
 
+        Labels are normalized first, so ' vegan ' finds the existing 'Vegan'.
+
         Args:
         label (str): The name/label of the restriction (e.g., 'Vegan', 'Nut-Free')
 
         Returns:
-        int: The ID of the restriction
+        int | None: The ID of the restriction, or None if the label is blank
 
         Raises:
         Exception: If database operation fails
         """
+        label = normalize_label(label)
+        if not label:
+            return None
         try:
-            # First, try to find the existing restriction
-            cursor = await self.conn.execute("SELECT restriction_id FROM restrictions WHERE label = ?", (label,))
-            row = await cursor.fetchone()
-
-            if row:
-                return row["restriction_id"]
-
-            # If it doesn't exist, insert it
-            cursor = await self.conn.execute("INSERT INTO restrictions (label) VALUES (?)", (label,))
-            await self.conn.commit()
-            logger.info(f"Created new restriction '{label}' with ID: {cursor.lastrowid}")
-            return cursor.lastrowid
+            async with self.transaction():
+                (restriction_id,) = await self._restriction_ids([label])
+            return restriction_id
         except Exception as e:
             logger.error(f"Failed to get/create restriction '{label}': {str(e)}", exc_info=True)
             raise
@@ -503,15 +954,39 @@ class DatabaseManager:
         Raises:
           Exception: If database operation fails
         """
-        try:
-            restriction_id = await self.get_or_create_restriction(label)
-            if restriction_id is None:
-                raise
+        await self.add_foodshare_restrictions(foodshare_id, [label])
+
+    async def add_foodshare_restrictions(self, foodshare_id: int, labels: list[str]) -> None:
+        """Link a foodshare with several restrictions by name, creating any that don't exist.
 
-            await self.link_foodshare_restriction(foodshare_id, restriction_id)
-            logger.info(f"Successfully linked restriction '{label}' to foodshare {foodshare_id}")
+        Labels are normalized, and those differing only in case or spacing count
+        as one. Known labels are resolved from the restriction cache, so linking
+        them takes a single statement however many there are.
+
+        Args:
+            foodshare_id (int): The ID of the foodshare
+            labels (list[str]): The names/labels of the restrictions to link; blank ones are ignored
+
+        Raises:
+            Exception: If database operation fails
+        """
+        unique: dict[str, str] = {}
+        for label in labels:
+            unique.setdefault(restriction_key(label), normalize_label(label))
+        labels = [label for label in unique.values() if label]
+        if not labels:
+            return
+        try:
+            async with self.transaction():
+                restriction_ids = await self._restriction_ids(labels)
+                await self.conn.executemany(
+                    "INSERT OR IGNORE INTO foodshare_restrictions (foodshare_id, restriction_id) VALUES (?, ?)",
+                    [(foodshare_id, restriction_id) for restriction_id in restriction_ids],
+                )
+            self._feed_changed()
+            logger.info(f"Linked {len(labels)} restrictions to foodshare {foodshare_id}")
         except Exception as e:
-            logger.error(f"Failed to link restriction '{label}' to foodshare {foodshare_id}: {str(e)}", exc_info=True)
+            logger.error(f"Failed to link restrictions to foodshare {foodshare_id}: {str(e)}", exc_info=True)
             raise
 
     async def get_foodshare(self, foodshare_id: int) -> Foodshare | None:
@@ -527,69 +1002,44 @@ class DatabaseManager:
             Exception: If database operation fails
         """
         try:
-            query = "SELECT * FROM foodshares WHERE foodshare_id = ?"
-            async with self.conn.execute(query, (foodshare_id,)) as cursor:
-                fs_row = await cursor.fetchone()
+            foodshares = await self._select_foodshares("f.foodshare_id = ?", (foodshare_id,))
 
-            if not fs_row:
+            if not foodshares:
                 logger.info(f"No foodshare found with ID: {foodshare_id}")
                 return None
-            if fs_row["user_fk_id"]:
-                creator = await self.get_user(fs_row["user_fk_id"])
-            else:
-                creator = None
-            if fs_row["picture_fk_id"]:
-                picture = await self.get_picture(fs_row["picture_fk_id"])
-            else:
-                picture = None
-
-            restrictions_query = """
-                SELECT r.label
-                FROM restrictions r
-                JOIN foodshare_restrictions fr ON r.restriction_id = fr.restriction_id
-                WHERE fr.foodshare_id = ?
-            """
-
-            async with self.conn.execute(restrictions_query, (foodshare_id,)) as cursor:
-                rest_rows = await cursor.fetchall()
-                restrictions_list = [row["label"] for row in rest_rows]
-
-            foodshare = Foodshare(
-                foodshare_id=fs_row["foodshare_id"],
-                name=fs_row["name"],
-                location=fs_row["location"],
-                ends=fs_row["ends"],
-                restrictions=restrictions_list,
-                active=bool(fs_row["active"]),
-                creator=creator,
-                picture=picture,
-            )
             logger.debug(f"Foodshare retrieved successfully: {foodshare_id}")
-            return foodshare
+            return foodshares[0]
         except Exception as e:
             logger.error(f"Failed to get foodshare {foodshare_id}: {str(e)}", exc_info=True)
             raise
 
-    async def get_all_active_foodshares(self) -> list[Foodshare]:
+    async def get_all_active_foodshares(
+        self, restrictions: list[str] | None = None, match_all: bool = False
+    ) -> list[Foodshare]:
         """Retrieve all currently active foodshares from the database.
 
         Filters for foodshares that are marked as active and have an end time
-        in the future (based on UTC).
+        in the future (based on UTC). Creators, pictures and restriction labels
+        are loaded in the same query rather than per foodshare.
+
+        When `restrictions` is given, only foodshares with any (or, with
+        `match_all`, every) of those restrictions are returned. The filter reads
+        only the `idx_foodshare_restrictions_restriction` index. Labels are matched
+        ignoring case and spacing; a label no foodshare has ever used matches nothing.
+
+        Args:
+            restrictions (list[str] | None): Restriction labels to filter by, or None for the whole feed
+            match_all (bool): Require every label rather than any of them
 
         Returns:
             list[Foodshare]: List of all active Foodshare objects
         """
         try:
-            # Filter by active flag AND ensure the event hasn't ended yet
-            query = "SELECT foodshare_id FROM foodshares WHERE active = 1 AND ends > CURRENT_TIMESTAMP"
-            async with self.conn.execute(query) as cursor:
-                rows = await cursor.fetchall()
-
-            active_foodshares = []
-            for row in rows:
-                foodshare = await self.get_foodshare(row["foodshare_id"])
-                if foodshare:
-                    active_foodshares.append(foodshare)
+            feed_filter = await self._active_feed_filter(restrictions, match_all)
+            if feed_filter is None:
+                return []
+            where, params = feed_filter
+            active_foodshares = await self._select_foodshares(where, params)
 
             logger.debug(f"Retrieved {len(active_foodshares)} active foodshares")
             return active_foodshares
@@ -597,6 +1047,314 @@ class DatabaseManager:
             logger.error(f"Failed to get all active foodshares: {str(e)}", exc_info=True)
             raise
 
+    async def get_active_foodshares_page(
+        self,
+        sort: str = "ending",
+        limit: int = 20,
+        after: list | None = None,
+        restrictions: list[str] | None = None,
+        match_all: bool = False,
+    ) -> FoodsharePage:
+        """Retrieve one page of the active feed, in a stable order.
+
+        Pages are keyset-paginated: each starts after the sort key of the
+        previous page's last foodshare, so a page costs the same however deep it
+        is and foodshares added or closed between requests never shift later
+        pages. Both orders read the `idx_foodshares_active_ends_utc` partial index;
+        'ending' walks it in order and stops after `limit` rows, 'newest' sorts
+        only the active rows.
+
+        Args:
+            sort (str): 'ending' for ending soonest first (by ends, then ID) or 'newest' for most
+                recently created first (by ID, descending)
+            limit (int): Maximum number of foodshares on the page
+            after (list | None): `next_key` of the previous page, or None for the first page
+            restrictions (list[str] | None): Restriction labels to filter by, as in `get_all_active_foodshares`
+            match_all (bool): Require every label rather than any of them
+
+        Returns:
+            FoodsharePage: The foodshares on the page and the key of the next page, if any
+
+        Raises:
+            ValueError: If `sort` is not one of FEED_SORTS
+        """
+        if sort not in FEED_SORTS:
+            raise ValueError(f"Unknown feed sort: {sort!r}")
+        try:
+            feed_filter = await self._active_feed_filter(restrictions, match_all)
+            if feed_filter is None:
+                return FoodsharePage([])
+            where, params = feed_filter
+            if sort == "ending":
+                order_by = "datetime(f.ends), f.foodshare_id"
+                keyset = "(datetime(f.ends), f.foodshare_id) > (?, ?)"
+            else:
+                order_by = "f.foodshare_id DESC"
+                # Unary + keeps the planner on the partial index of active rows instead of
+                # walking the primary key back through every closed foodshare
+                keyset = "+f.foodshare_id < ?"
+            if after is not None:
+                where += f" AND {keyset}"
+                params += tuple(after)
+
+            # One extra row tells whether there is a next page
+            foodshares = await self._select_foodshares(where, params, order_by, limit + 1)
+            page = FoodsharePage(foodshares[:limit])
+            if len(foodshares) > limit:
+                last = page.foodshares[-1]
+                page.next_key = (
+                    [sqlite_datetime(last.ends), last.foodshare_id] if sort == "ending" else [last.foodshare_id]
+                )
+
+            logger.debug(f"Retrieved a page of {len(page.foodshares)} active foodshares")
+            return page
+        except Exception as e:
+            logger.error(f"Failed to get a page of active foodshares: {str(e)}", exc_info=True)
+            raise
+
+    async def _active_feed_filter(self, restrictions: list[str] | None, match_all: bool) -> tuple[str, tuple] | None:
+        """Build the WHERE clause of the active feed.
+
+        Args:
+            restrictions (list[str] | None): Restriction labels to filter by, or None for the whole feed
+            match_all (bool): Require every label rather than any of them
+
+        Returns:
+            tuple[str, tuple] | None: The predicate over `foodshares f` and its parameters, or None
+            if no foodshare can match the restrictions
+        """
+        # Filter by active flag AND ensure the event hasn't ended yet
+        # datetime() normalizes 'T'-separated and offset timestamps so they compare as UTC instants
+        where, params = "f.active = 1 AND datetime(f.ends) > datetime('now')", ()
+        if restrictions is not None:
+            restriction_ids = await self._known_restriction_ids(restrictions)
+            if not restriction_ids or (match_all and None in restriction_ids):
+                return None
+            restriction_ids = {i for i in restriction_ids if i is not None}
+            placeholders = ", ".join("?" * len(restriction_ids))
+            having = f"HAVING COUNT(*) = {len(restriction_ids)}" if match_all else ""
+            where += f"""
+                AND f.foodshare_id IN (
+                    SELECT foodshare_id FROM foodshare_restrictions
+                    WHERE restriction_id IN ({placeholders})
+                    GROUP BY foodshare_id {having}
+                )
+            """
+            params = tuple(restriction_ids)
+        return where, params
+
+    async def get_latest_change_id(self) -> int:
+        """Return the highest ID in the foodshare change log.
+
+        Returns:
+            int: The latest change ID, or 0 if nothing has been logged yet
+        """
+        async with (
+            self._reader() as conn,
+            conn.execute("SELECT MAX(change_id) AS latest FROM foodshare_changes") as cursor,
+        ):
+            row = await cursor.fetchone()
+        return row["latest"] or 0
+
+    async def get_foodshare_changes(self, since_change_id: int, since: datetime) -> FoodshareChanges | None:
+        """Compute the net changes to the active feed since a sync position.
+
+        Created, updated, closed and deleted foodshares come from the trigger-maintained
+        `foodshare_changes` log. Expiries are not writes, so foodshares whose `ends`
+        passed between `since` and now are found with a range query instead; ones the
+        cleanup job has since deactivated, closed at or after their `ends`, are also
+        reported as expired. Work is proportional to the number of changes, not the
+        size of the feed.
+
+        Args:
+            since_change_id (int): Highest change log ID the client has already seen
+            since (datetime): UTC time the client's view of the feed reflects
+
+        Returns:
+            FoodshareChanges | None: The changes and the new sync position, or None if the
+            log has been pruned past `since_change_id` and the client must refetch the feed
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            as_of = datetime.now(tz=timezone.utc).replace(microsecond=0)
+            # Same format as datetime(), which normalizes the stored ends values they are compared to
+            since_str = since.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            as_of_str = as_of.strftime("%Y-%m-%d %H:%M:%S")
+
+            async with self._reader() as conn:
+                async with conn.execute("SELECT MIN(change_id) AS oldest FROM foodshare_changes") as cursor:
+                    oldest = (await cursor.fetchone())["oldest"]
+                if oldest is not None and since_change_id < oldest - 1:
+                    logger.info(f"Changes cursor {since_change_id} predates the retained change log")
+                    return None
+
+                query = """
+                    SELECT
+                        foodshare_id,
+                        MAX(change_id) AS last_change_id,
+                        MAX(change_type = 'created') AS created,
+                        MAX(CASE WHEN change_type = 'closed' THEN changed_at END) AS closed_at
+                    FROM foodshare_changes
+                    WHERE change_id > ?
+                    GROUP BY foodshare_id
+                """
+                async with conn.execute(query, (since_change_id,)) as cursor:
+                    logged = {row["foodshare_id"]: row for row in await cursor.fetchall()}
+
+                expired_query = """
+                    SELECT foodshare_id FROM foodshares
+                    WHERE active = 1 AND datetime(ends) > ? AND datetime(ends) <= ?
+                """
+                async with conn.execute(expired_query, (since_str, as_of_str)) as cursor:
+                    expired_ids = {row["foodshare_id"] for row in await cursor.fetchall()}
+
+                changed_ids = json.dumps(sorted(logged.keys() | expired_ids))
+                state_query = """
+                    SELECT foodshare_id, active, datetime(ends) AS ends_utc FROM foodshares
+                    WHERE foodshare_id IN (SELECT value FROM json_each(?))
+                """
+                async with conn.execute(state_query, (changed_ids,)) as cursor:
+                    existing = {row["foodshare_id"]: row for row in await cursor.fetchall()}
+
+            current = {
+                foodshare.foodshare_id: foodshare
+                for foodshare in await self._select_foodshares(
+                    "f.foodshare_id IN (SELECT value FROM json_each(?)) AND f.active = 1 AND datetime(f.ends) > ?",
+                    (changed_ids, as_of_str),
+                )
+            }
+
+            # Close times and ends are both 'YYYY-MM-DD HH:MM:SS' UTC, so they compare as strings
+            closed_at = {foodshare_id: row["closed_at"] for foodshare_id, row in logged.items()}
+            changes = []
+            for foodshare_id in json.loads(changed_ids):
+                state = existing.get(foodshare_id)
+                closed = closed_at.get(foodshare_id)
+                if foodshare_id in current:
+                    created = foodshare_id in logged and logged[foodshare_id]["created"]
+                    change = "created" if created else "updated"
+                elif state is None:
+                    change = "deleted"
+                elif state["active"]:
+                    change = "expired"
+                elif closed and state["ends_utc"] and state["ends_utc"] <= closed:
+                    # Deactivated by the cleanup job once it had ended, so it left the feed by expiring
+                    change = "expired"
+                else:
+                    change = "closed"
+                changes.append(FoodshareChange(foodshare_id, change, current.get(foodshare_id)))
+
+            last_change_id = max((row["last_change_id"] for row in logged.values()), default=since_change_id)
+            logger.debug(f"Computed {len(changes)} foodshare changes since change {since_change_id}")
+            return FoodshareChanges(changes=changes, last_change_id=last_change_id, as_of=as_of)
+        except Exception as e:
+            logger.error(f"Failed to get foodshare changes since {since_change_id}: {str(e)}", exc_info=True)
+            raise
+
+    async def _select_foodshares(
+        self, where: str, params: tuple = (), order_by: str | None = None, limit: int | None = None
+    ) -> list[Foodshare]:
+        """Load foodshares matching a WHERE clause together with their relations.
+
+        Creators and pictures are LEFT JOINed and restriction IDs and picture
+        renditions are aggregated with `json_group_array`, so any number of
+        foodshares costs a single query. Restriction IDs are turned into labels
+        from the restriction cache, which is reloaded if one is missing. With a
+        `limit`, the IDs are picked first so relations are only loaded for the
+        foodshares returned rather than for every match before sorting.
+
+        Args:
+            where (str): SQL predicate over the `foodshares f` alias
+            params (tuple): Parameters bound to the predicate
+            order_by (str | None): SQL ORDER BY terms, or None for no particular order
+            limit (int | None): Maximum number of foodshares to load, or None for all of them
+
+        Returns:
+            list[Foodshare]: The matching foodshares
+        """
+        order = f" ORDER BY {order_by}" if order_by is not None else ""
+        if limit is not None:
+            # The limit is inlined rather than bound: the planner weighs it when choosing an index,
+            # and with an unknown limit it prefers scanning the whole table in rowid order
+            page = f"SELECT f.foodshare_id FROM foodshares f WHERE {where}{order} LIMIT {int(limit)}"
+            where = f"f.foodshare_id IN ({page})"
+        query = f"""
+            SELECT
+                f.foodshare_id, f.name, f.location, f.ends, f.active,
+                u.user_id, u.email, u.verified, u.banned, u.is_admin,
+                p.picture_id, p.expires, p.filepath, p.mimetype,
+                (
+                    SELECT json_group_array(fr.restriction_id)
+                    FROM foodshare_restrictions fr
+                    WHERE fr.foodshare_id = f.foodshare_id
+                ) AS restrictions,
+                (
+                    SELECT json_group_array(json_object('size', pr.size, 'filepath', pr.filepath))
+                    FROM (
+                        SELECT size, filepath FROM picture_renditions
+                        WHERE picture_id = p.picture_id
+                        ORDER BY size
+                    ) pr
+                ) AS renditions
+            FROM foodshares f
+            LEFT JOIN users u ON u.user_id = f.user_fk_id
+            LEFT JOIN pictures p ON p.picture_id = f.picture_fk_id
+            WHERE {where}
+        """
+        query += order
+        async with self._reader() as conn:
+            async with conn.execute(query, params) as cursor:
+                rows = await cursor.fetchall()
+            restriction_ids = [json.loads(row["restrictions"]) for row in rows]
+            if any(self.restrictions.get_label(i) is None for ids in restriction_ids for i in ids):
+                # Created by another worker process, or the cache was dropped by a rollback
+                await self._load_restrictions(conn)
+
+        return [self._row_to_foodshare(row, ids) for row, ids in zip(rows, restriction_ids, strict=True)]
+
+    def _row_to_foodshare(self, row: aiosqlite.Row, restriction_ids: list[int]) -> Foodshare:
+        """Build a Foodshare from a row produced by `_select_foodshares`.
+
+        Args:
+            row (aiosqlite.Row): The joined foodshare row
+            restriction_ids (list[int]): The foodshare's restriction IDs, decoded from the row
+
+        Returns:
+            Foodshare: The assembled Foodshare object
+        """
+        creator = None
+        if row["user_id"] is not None:
+            creator = User(
+                user_id=row["user_id"],
+                email=row["email"],
+                verified=bool(row["verified"]),
+                banned=bool(row["banned"]),
+                is_admin=bool(row["is_admin"]),
+            )
+
+        picture = None
+        if row["picture_id"] is not None:
+            picture = PictureMetadata(
+                picture_id=row["picture_id"],
+                expires=row["expires"],
+                filepath=row["filepath"],
+                mimetype=row["mimetype"],
+                renditions=[PictureRendition(**rendition) for rendition in json.loads(row["renditions"])],
+            )
+
+        return Foodshare(
+            foodshare_id=row["foodshare_id"],
+            name=row["name"],
+            location=row["location"],
+            ends=row["ends"],
+            restrictions=[self.restrictions.get_label(restriction_id) for restriction_id in restriction_ids],
+            active=bool(row["active"]),
+            creator=creator,
+            picture=picture,
+        )
+
     async def deactivate_foodshare(self, foodshare_id: int) -> int | None:
         """Sets foodshare status to inactive.
 
@@ -604,22 +1362,63 @@ class DatabaseManager:
             foodshare_id (int): The ID of the foodshare to deactivate.
 
         Returns:
-            int | None: The row ID of the updated foodshare.
+            int | None: The ID of the deactivated foodshare, or None if it does not exist.
 
         Raises:
             Exception: If database operation fails.
         """
         try:
             query = "UPDATE foodshares SET active = 0 WHERE foodshare_id = ?"
-            cursor = await self.conn.execute(query, (foodshare_id,))
-            await self.conn.commit()
-            updated_id = cursor.lastrowid
-            logger.info(f"Survey added successfully with ID: {updated_id}")
-            return updated_id
+            async with self.transaction():
+                cursor = await self.conn.execute(query, (foodshare_id,))
+            # lastrowid belongs to the connection's last INSERT, not to the updated row
+            if cursor.rowcount != 1:
+                logger.warning(f"No foodshare with ID {foodshare_id} to deactivate")
+                return None
+            self._feed_changed()
+            logger.info(f"Foodshare deactivated successfully with ID: {foodshare_id}")
+            return foodshare_id
         except Exception as e:
             logger.error(f"Failed to deactivate foodshare {foodshare_id}: {str(e)}", exc_info=True)
             raise
 
+    async def deactivate_ended_foodshares(self, limit: int, grace: timedelta = timedelta(0)) -> list[int]:
+        """Mark up to `limit` active foodshares whose end time has passed as inactive.
+
+        End times are compared as datetimes, not as strings, so ISO timestamps with
+        a 'T' separator or UTC offset are handled. The feed already hides ended
+        foodshares, so its version is not bumped.
+
+        Args:
+            limit (int): Maximum number of foodshares to deactivate
+            grace (timedelta): Only deactivate foodshares that ended at least this long ago
+
+        Returns:
+            list[int]: The IDs of the deactivated foodshares
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            query = """
+                UPDATE foodshares SET active = 0
+                WHERE foodshare_id IN (
+                    SELECT foodshare_id FROM foodshares
+                    WHERE active = 1 AND datetime(ends) <= ?
+                    LIMIT ?
+                )
+                RETURNING foodshare_id
+            """
+            cutoff = (datetime.now(tz=timezone.utc) - grace).strftime("%Y-%m-%d %H:%M:%S")
+            async with self.transaction(), self.conn.execute(query, (cutoff, limit)) as cursor:
+                foodshare_ids = [row["foodshare_id"] for row in await cursor.fetchall()]
+            if foodshare_ids:
+                logger.info(f"Deactivated {len(foodshare_ids)} ended foodshares")
+            return foodshare_ids
+        except Exception as e:
+            logger.error(f"Failed to deactivate ended foodshares: {str(e)}", exc_info=True)
+            raise
+
     # Survey CRUD
 
     async def add_survey(
@@ -649,8 +1448,8 @@ class DatabaseManager:
                     (num_participants, experience, other_thoughts, foodshare_fk_id)
                     VALUES (?, ?, ?, ?)
                 """
-            cursor = await self.conn.execute(query, (num_participants, experience, other_thoughts, foodshare_fk_id))
-            await self.conn.commit()
+            async with self.transaction():
+                cursor = await self.conn.execute(query, (num_participants, experience, other_thoughts, foodshare_fk_id))
             survey_id = cursor.lastrowid
             logger.info(f"Survey added successfully with ID: {survey_id}")
             return survey_id
@@ -671,52 +1470,93 @@ class DatabaseManager:
             Exception: If database operation fails
         """
         try:
-            query = "SELECT * FROM surveys WHERE survey_id = ?"
-            async with self.conn.execute(query, (survey_id,)) as cursor:
-                row = await cursor.fetchone()
+            surveys = await self._select_surveys("survey_id = ?", (survey_id,))
 
-            if row:
-                foodshare = await self.get_foodshare(row["foodshare_fk_id"]) if row["foodshare_fk_id"] else None
-                survey = Survey(
-                    survey_id=row["survey_id"],
-                    num_participants=row["num_participants"],
-                    experience=row["experience"],
-                    other_thoughts=row["other_thoughts"],
-                    foodshare=foodshare,
-                )
+            if surveys:
                 logger.debug(f"Survey retrieved successfully: {survey_id}")
-                return survey
+                return surveys[0]
             logger.info(f"No survey found with ID: {survey_id}")
             return None
         except Exception as e:
             logger.error(f"Failed to get survey {survey_id}: {str(e)}", exc_info=True)
             raise
 
-    async def get_all_surveys(self) -> list["Survey"]:
-        """Retrieve all surveys from the database.
+    async def get_all_surveys(self, limit: int | None = None, after_id: int = 0) -> list["Survey"]:
+        """Retrieve surveys from the database in ascending ID order.
+
+        Supports keyset pagination: pass the last `survey_id` of the previous page
+        as `after_id` to fetch the next one.
+
+        Args:
+            limit (int | None): Maximum number of surveys to return, or None for all
+            after_id (int): Only return surveys with an ID greater than this
 
         Returns:
-            list[Survey]: List of all Survey objects
+            list[Survey]: List of Survey objects
 
         Raises:
             Exception: If database operation fails
         """
         try:
-            query = "SELECT survey_id FROM surveys"
-            async with self.conn.execute(query) as cursor:
-                rows = await cursor.fetchall()
-
-            surveys = []
-            for row in rows:
-                survey = await self.get_survey(row["survey_id"])
-                if survey:
-                    surveys.append(survey)
+            surveys = await self._select_surveys("survey_id > ?", (after_id,), limit)
             logger.debug(f"Retrieved {len(surveys)} surveys")
             return surveys
         except Exception as e:
             logger.error(f"Failed to get all surveys: {str(e)}", exc_info=True)
             raise
 
+    async def get_foodshares_by_ids(self, foodshare_ids: list[int]) -> dict[int, Foodshare]:
+        """Retrieve several foodshares at once, keyed by ID.
+
+        Args:
+            foodshare_ids (list[int]): IDs of the foodshares to load
+
+        Returns:
+            dict[int, Foodshare]: The foodshares that were found, keyed by their ID
+        """
+        if not foodshare_ids:
+            return {}
+        # json_each keeps this to a single bound parameter regardless of the ID count
+        foodshares = await self._select_foodshares(
+            "f.foodshare_id IN (SELECT value FROM json_each(?))", (json.dumps(list(foodshare_ids)),)
+        )
+        return {foodshare.foodshare_id: foodshare for foodshare in foodshares}
+
+    async def _select_surveys(self, where: str, params: tuple = (), limit: int | None = None) -> list[Survey]:
+        """Load surveys matching a WHERE clause along with their foodshares.
+
+        Linked foodshares are deduplicated and fetched with one batched query,
+        so a page of surveys costs two queries in total.
+
+        Args:
+            where (str): SQL predicate over the `surveys` table
+            params (tuple): Parameters bound to the predicate
+            limit (int | None): Maximum number of surveys to return, or None for all
+
+        Returns:
+            list[Survey]: The matching surveys ordered by ID
+        """
+        query = f"SELECT * FROM surveys WHERE {where} ORDER BY survey_id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params = (*params, limit)
+        async with self._reader() as conn, conn.execute(query, params) as cursor:
+            rows = await cursor.fetchall()
+
+        foodshare_ids = {row["foodshare_fk_id"] for row in rows if row["foodshare_fk_id"]}
+        foodshares = await self.get_foodshares_by_ids(sorted(foodshare_ids))
+
+        return [
+            Survey(
+                survey_id=row["survey_id"],
+                num_participants=row["num_participants"],
+                experience=row["experience"],
+                other_thoughts=row["other_thoughts"],
+                foodshare=foodshares.get(row["foodshare_fk_id"]),
+            )
+            for row in rows
+        ]
+
     async def reset_token_lifetime(self, token_hash: str):
         """Reset the lifetime of a device token.
 
@@ -727,12 +1567,12 @@ class DatabaseManager:
             Exception: If database operation fails
         """
         try:
-            await self.conn.execute(
-                """UPDATE device_tokens SET last_used = CURRENT_TIMESTAMP
-                WHERE token_hash = ?""",
-                (token_hash,),
-            )
-            await self.conn.commit()
+            async with self.transaction():
+                await self.conn.execute(
+                    """UPDATE device_tokens SET last_used = CURRENT_TIMESTAMP
+                    WHERE token_hash = ?""",
+                    (token_hash,),
+                )
             logger.info("Token lifetime reset successfully")
         except Exception as e:
             logger.error(f"Failed to reset token lifetime: {str(e)}", exc_info=True)
@@ -751,17 +1591,17 @@ class DatabaseManager:
             Exception: If database operation fails
         """
         try:
-            cursor = await self.conn.execute(
-                """
-                INSERT INTO otp_codes (email, otp, expires_at)
-                VALUES (?, ?, ?)
-                ON CONFLICT(email) DO UPDATE SET
-                    otp = excluded.otp,
-                    expires_at = excluded.expires_at
-            """,
-                (otp_record.email, otp_record.otp, otp_record.expires_at),
-            )
-            await self.conn.commit()
+            async with self.transaction():
+                cursor = await self.conn.execute(
+                    """
+                    INSERT INTO otp_codes (email, otp, expires_at)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(email) DO UPDATE SET
+                        otp = excluded.otp,
+                        expires_at = excluded.expires_at
+                """,
+                    (otp_record.email, otp_record.otp, otp_record.expires_at),
+                )
             logger.info(f"OTP saved successfully for email: {otp_record.email}")
             return cursor.lastrowid
         except Exception as e:
@@ -781,7 +1621,7 @@ class DatabaseManager:
             Exception: If database operation fails
         """
         try:
-            async with self.conn.cursor() as cursor:
+            async with self._reader() as conn, conn.cursor() as cursor:
                 await cursor.execute("SELECT email, otp, expires_at FROM otp_codes WHERE email = ?", (email,))
                 row = await cursor.fetchone()
                 if row:
@@ -813,15 +1653,73 @@ class DatabaseManager:
             Exception: If database operation fails
         """
         try:
-            async with self.conn.cursor() as cursor:
+            async with self.transaction(), self.conn.cursor() as cursor:
                 await cursor.execute("DELETE FROM otp_codes WHERE email = ?", (email,))
-                await self.conn.commit()
-                logger.info(f"OTP deleted successfully for email: {email}")
-                return cursor.lastrowid
+            logger.info(f"OTP deleted successfully for email: {email}")
+            return cursor.lastrowid
         except Exception as e:
             logger.error(f"Failed to delete OTP for email {email}: {str(e)}", exc_info=True)
             raise
 
+    async def delete_expired_otps(self, limit: int) -> int:
+        """Delete up to `limit` OTP codes past their expiry.
+
+        Args:
+            limit (int): Maximum number of codes to delete
+
+        Returns:
+            int: The number of codes deleted
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            query = """
+                DELETE FROM otp_codes WHERE email IN (
+                    SELECT email FROM otp_codes WHERE expires_at < ? LIMIT ?
+                )
+            """
+            async with self.transaction():
+                cursor = await self.conn.execute(query, (datetime.now(tz=timezone.utc), limit))
+            return cursor.rowcount
+        except Exception as e:
+            logger.error(f"Failed to delete expired OTP codes: {str(e)}", exc_info=True)
+            raise
+
+    async def prune_foodshare_changes(self, max_age: timedelta, limit: int) -> int:
+        """Delete up to `limit` of the oldest change log entries older than `max_age`.
+
+        Clients whose changes cursor predates the remaining log get a 410 and
+        refetch the feed. The newest entry is always kept, so the log never
+        empties and a pruned cursor can still be recognized.
+
+        Args:
+            max_age (timedelta): How long change log entries are kept
+            limit (int): Maximum number of entries to delete
+
+        Returns:
+            int: The number of entries deleted
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            cutoff = datetime.now(tz=timezone.utc) - max_age
+            # Only the oldest `limit` entries are examined; change IDs and times rise together
+            query = """
+                DELETE FROM foodshare_changes WHERE change_id IN (
+                    SELECT change_id FROM foodshare_changes ORDER BY change_id LIMIT ?
+                )
+                AND changed_at < ?
+                AND change_id < (SELECT MAX(change_id) FROM foodshare_changes)
+            """
+            async with self.transaction():
+                cursor = await self.conn.execute(query, (limit, cutoff.strftime("%Y-%m-%d %H:%M:%S")))
+            return cursor.rowcount
+        except Exception as e:
+            logger.error(f"Failed to prune the foodshare change log: {str(e)}", exc_info=True)
+            raise
+
     async def create_device_token(self, user_id: int, token_hash: str):
         """Create a device token for a user.
 
@@ -836,14 +1734,13 @@ class DatabaseManager:
             Exception: If database operation fails
         """
         try:
-            async with self.conn.cursor() as cursor:
+            async with self.transaction(), self.conn.cursor() as cursor:
                 await cursor.execute(
                     "INSERT INTO device_tokens (token_hash, user_id) VALUES (?, ?)",
                     (token_hash, user_id),
                 )
-                await self.conn.commit()
-                logger.info(f"Device token created successfully for user ID: {user_id}")
-                return cursor.lastrowid
+            logger.info(f"Device token created successfully for user ID: {user_id}")
+            return cursor.lastrowid
         except Exception as e:
             logger.error(f"Failed to create device token for user {user_id}: {str(e)}", exc_info=True)
             raise
@@ -858,14 +1755,55 @@ class DatabaseManager:
             Exception: If database operation fails
         """
         try:
-            async with self.conn.cursor() as cursor:
+            async with self.transaction(), self.conn.cursor() as cursor:
                 await cursor.execute("DELETE FROM device_tokens WHERE token_hash = ?", (token_hash,))
-                await self.conn.commit()
-                logger.info("Device token deleted successfully")
+            self.session_cache.invalidate_token(token_hash)
+            self._pending_token_usage.pop(token_hash, None)
+            logger.info("Device token deleted successfully")
         except Exception as e:
             logger.error(f"Failed to delete device token: {str(e)}", exc_info=True)
             raise
 
+    async def delete_stale_device_tokens(self, max_idle: timedelta, limit: int) -> int:
+        """Delete up to `limit` device tokens unused for longer than `max_idle`.
+
+        Tokens with a buffered, not yet flushed, usage timestamp are kept, since
+        their stored `last_used` is out of date.
+
+        Args:
+            max_idle (timedelta): How long a token may go unused before it is deleted
+            limit (int): Maximum number of tokens to delete
+
+        Returns:
+            int: The number of tokens deleted
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            cutoff = datetime.now(tz=timezone.utc) - max_idle
+            query = "SELECT token_hash FROM device_tokens WHERE last_used < ? LIMIT ?"
+            async with self.transaction():
+                async with self.conn.execute(query, (cutoff.strftime("%Y-%m-%d %H:%M:%S"), limit)) as cursor:
+                    token_hashes = [
+                        row["token_hash"]
+                        for row in await cursor.fetchall()
+                        if row["token_hash"] not in self._pending_token_usage
+                    ]
+                if not token_hashes:
+                    return 0
+
+                await self.conn.executemany(
+                    "DELETE FROM device_tokens WHERE token_hash = ?", [(token_hash,) for token_hash in token_hashes]
+                )
+            for token_hash in token_hashes:
+                self.session_cache.invalidate_token(token_hash)
+            logger.info(f"Deleted {len(token_hashes)} stale device tokens")
+            return len(token_hashes)
+        except Exception as e:
+            logger.error(f"Failed to delete stale device tokens: {str(e)}", exc_info=True)
+            raise
+
     async def get_session_by_token(self, token_hash: str) -> DeviceSession | None:
         """Returns a DeviceSession dataclass to validate the auth token.
 
@@ -879,7 +1817,7 @@ class DatabaseManager:
             Exception: If database operation fails
         """
         try:
-            async with self.conn.cursor() as cursor:
+            async with self._reader() as conn, conn.cursor() as cursor:
                 query = """
                     SELECT d.user_id, u.banned, d.last_used
                     FROM device_tokens d
@@ -891,6 +1829,10 @@ class DatabaseManager:
                 if row:
                     row_dict = dict(row)
                     row_dict["last_used"] = datetime.fromisoformat(row_dict["last_used"])
+                    # An unflushed usage timestamp is newer than the stored one
+                    pending = self._pending_token_usage.get(token_hash)
+                    if pending and pending > row_dict["last_used"]:
+                        row_dict["last_used"] = pending
                     session = DeviceSession(**row_dict)
                 else:
                     session = None
@@ -903,28 +1845,121 @@ class DatabaseManager:
             logger.error(f"Failed to get session by token: {str(e)}", exc_info=True)
             raise
 
-    async def update_token_usage(self, token_hash: str) -> int | None:
-        """Update the last used timestamp of a token.
+    async def update_token_usage(self, token_hash: str) -> None:
+        """Record that a token was just used.
+
+        The timestamp is buffered in memory and written by `flush_token_usage`,
+        so authenticated reads do not each commit a write. Until then,
+        `get_session_by_token` reports the buffered timestamp.
 
         Args:
             token_hash (str): The hash of the token to update
+        """
+        self._pending_token_usage[token_hash] = datetime.now(tz=timezone.utc).replace(tzinfo=None)
+
+    async def flush_token_usage(self) -> int:
+        """Write all buffered token usage timestamps in a single transaction.
+
+        Returns:
+            int: The number of tokens whose timestamp was flushed
+
+        Raises:
+            Exception: If database operation fails; the pending timestamps are kept for the next flush
+        """
+        if not self._pending_token_usage:
+            return 0
+
+        pending, self._pending_token_usage = self._pending_token_usage, {}
+        try:
+            async with self.transaction():
+                await self.conn.executemany(
+                    "UPDATE device_tokens SET last_used = ? WHERE token_hash = ?",
+                    [
+                        (last_used.strftime("%Y-%m-%d %H:%M:%S"), token_hash)
+                        for token_hash, last_used in pending.items()
+                    ],
+                )
+            logger.debug(f"Flushed token usage for {len(pending)} tokens")
+            return len(pending)
+        except Exception as e:
+            # Keep anything newer that was recorded while the flush was running
+            for token_hash, last_used in pending.items():
+                self._pending_token_usage.setdefault(token_hash, last_used)
+            logger.error(f"Failed to flush token usage: {str(e)}", exc_info=True)
+            raise
+
+    def start_token_usage_flusher(self, interval: float) -> None:
+        """Start a background task that flushes buffered token usage periodically.
+
+        The task is stopped, and a final flush performed, by `close`.
+
+        Args:
+            interval (float): Seconds between flushes
+        """
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_token_usage_periodically(interval))
+
+    async def _flush_token_usage_periodically(self, interval: float) -> None:
+        """Flush buffered token usage every `interval` seconds until cancelled.
+
+        Args:
+            interval (float): Seconds between flushes
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush_token_usage()
+            except Exception:
+                # Already logged; the timestamps are retried on the next tick
+                pass
+
+    # Job leases
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take or renew the lease on a periodic job, so one worker process runs it at a time.
+
+        Args:
+            name (str): The job's name
+            owner (str): Identifies the worker process asking for the lease
+            ttl (float): Seconds until the lease lapses unless renewed
+
+        Returns:
+            bool: True if `owner` now holds the lease, False if another owner does
 
         Raises:
             Exception: If database operation fails
         """
         try:
-            async with self.conn.cursor() as cursor:
-                await cursor.execute(
-                    """
-                    UPDATE device_tokens
-                    SET last_used = CURRENT_TIMESTAMP WHERE token_hash = ?
-                    """,
-                    (token_hash,),
+            now = time.time()
+            query = """
+                INSERT INTO job_leases (name, owner, expires_at) VALUES (:name, :owner, :expires_at)
+                ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE job_leases.owner = excluded.owner OR job_leases.expires_at < :now
+            """
+            async with self.transaction():
+                cursor = await self.conn.execute(
+                    query, {"name": name, "owner": owner, "expires_at": now + ttl, "now": now}
                 )
-                await self.conn.commit()
-                logger.info("Token usage updated successfully")
+            return cursor.rowcount == 1
         except Exception as e:
-            logger.error(f"Failed to update token usage: {str(e)}", exc_info=True)
+            logger.error(f"Failed to acquire lease {name}: {str(e)}", exc_info=True)
+            raise
+
+    async def release_lease(self, name: str, owner: str) -> None:
+        """Give up a lease so another worker can take it without waiting for it to lapse.
+
+        Args:
+            name (str): The job's name
+            owner (str): The worker process holding the lease; leases held by others are untouched
+
+        Raises:
+            Exception: If database operation fails
+        """
+        try:
+            async with self.transaction():
+                await self.conn.execute("DELETE FROM job_leases WHERE name = ? AND owner = ?", (name, owner))
+        except Exception as e:
+            logger.error(f"Failed to release lease {name}: {str(e)}", exc_info=True)
             raise
 
     async def create_or_verify_user(self, email: str) -> int | None:
@@ -940,7 +1975,7 @@ class DatabaseManager:
             Exception: If database operation fails
         """
         try:
-            async with self.conn.cursor() as cursor:
+            async with self.transaction(), self.conn.cursor() as cursor:
                 await cursor.execute("SELECT user_id FROM users WHERE email = ?", (email,))
                 row = await cursor.fetchone()
 
@@ -955,9 +1990,7 @@ class DatabaseManager:
                     )
                     user_id = cursor.lastrowid
                     logger.info(f"New user created successfully: {email}")
-
-                await self.conn.commit()
-                return user_id
+            return user_id
         except Exception as e:
             logger.error(f"Failed to create or verify user {email}: {str(e)}", exc_info=True)
             raise
@@ -968,8 +2001,9 @@ class DatabaseManager:
         Args:
             picture_id (int): The ID of the picture to delete.
         """
-        await self.conn.execute("DELETE FROM pictures WHERE picture_id = ?", (picture_id,))
-        await self.conn.commit()
+        async with self.transaction():
+            await self.conn.execute("DELETE FROM pictures WHERE picture_id = ?", (picture_id,))
+        self._feed_changed()
 
     async def delete_foodshare_restrictions(self, foodshare_id: int) -> None:
         """Delete all restrictions associated with a specific foodshare.
@@ -977,8 +2011,9 @@ class DatabaseManager:
         Args:
             foodshare_id (int): The ID of the foodshare.
         """
-        await self.conn.execute("DELETE FROM foodshare_restrictions WHERE foodshare_id = ?", (foodshare_id,))
-        await self.conn.commit()
+        async with self.transaction():
+            await self.conn.execute("DELETE FROM foodshare_restrictions WHERE foodshare_id = ?", (foodshare_id,))
+        self._feed_changed()
 
     async def delete_foodshare_record(self, foodshare_id: int) -> None:
         """Delete a foodshare record from the database.
@@ -986,5 +2021,6 @@ class DatabaseManager:
         Args:
             foodshare_id (int): The ID of the foodshare to delete.
         """
-        await self.conn.execute("DELETE FROM foodshares WHERE foodshare_id = ?", (foodshare_id,))
-        await self.conn.commit()
+        async with self.transaction():
+            await self.conn.execute("DELETE FROM foodshares WHERE foodshare_id = ?", (foodshare_id,))
+        self._feed_changed()
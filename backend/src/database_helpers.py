@@ -17,26 +17,53 @@ Data Classes:
     User: Represents a user in the system with ID, email, verification status, and ban status
     OTPRecord: Stores one-time password information for email verification
     DeviceSession: Represents a user session with associated user ID and ban status
-    PictureMetadata: Contains metadata for stored pictures including expiration and file path
+    PictureRendition: One stored size of a picture
+    PictureMetadata: Contains metadata for stored pictures including expiration, file path and renditions
     Foodshare: Represents a foodshare listing with details, restrictions, and creator info
     Survey: Stores survey responses related to foodshares
+    FoodshareChange: Net change to one foodshare for delta sync
+    FoodshareChanges: Result of a delta sync query with its new position
+    FoodsharePage: One page of the active feed with the position of the next one
 
 Functions:
     validate_email_format: Validates email addresses follow maine.edu domain format
     sanitize_string: Sanitizes input strings to prevent injection attacks
+    normalize_label: Collapses whitespace in a restriction label
+    restriction_key: Case-insensitive key that near-duplicate restriction labels share
     validate_datetime_format: Validates ISO format date/time strings
+    sqlite_datetime: Formats a timestamp the way SQLite's datetime() does
     hash_token: Hashes tokens using SHA256 for secure storage
     generate_secure_token: Creates cryptographically secure random tokens
+    encode_changes_cursor: Encodes a delta sync position as an opaque cursor
+    decode_changes_cursor: Decodes a delta sync cursor
+    encode_feed_cursor: Encodes a feed page position as an opaque cursor
+    decode_feed_cursor: Decodes a feed page cursor
+
+Constants:
+    SESSION_MAX_IDLE: How long a device session token may go unused before it expires
+    FEED_SORTS: Orders the active feed can be paged in
 
 Usage:
     Import this module to access data classes and utility functions for database operations.
 """
 
+import base64
+import binascii
 import hashlib
+import json
 import re
 import secrets
-from dataclasses import dataclass
-from datetime import datetime
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+# Device session tokens unused for longer than this are rejected, and later pruned
+SESSION_MAX_IDLE = timedelta(days=30)
+
+# Orders the active feed can be paged in: 'ending' soonest first, or 'newest' created first
+FEED_SORTS = ("ending", "newest")
+
+# Largest value SQLite can store in or compare against an INTEGER column
+SQLITE_MAX_INT = 2**63 - 1
 
 
 @dataclass
@@ -87,6 +114,19 @@ class DeviceSession:
     last_used: datetime
 
 
+@dataclass
+class PictureRendition:
+    """Data class representing one stored size of a picture.
+
+    Attributes:
+        size (int): Width and height of the square image in pixels
+        filepath (str): Path to the rendition file
+    """
+
+    size: int
+    filepath: str
+
+
 @dataclass
 class PictureMetadata:
     """Data class representing picture metadata.
@@ -94,14 +134,16 @@ class PictureMetadata:
     Attributes:
         picture_id (int): Unique identifier for the picture
         expires (datetime): When the picture expires
-        filepath (str): Path to the picture file
+        filepath (str): Path to the full-size picture file
         mimetype (str): MIME type of the picture
+        renditions (list[PictureRendition]): Every stored size, smallest first
     """
 
     picture_id: int
     expires: datetime
     filepath: str
     mimetype: str
+    renditions: list[PictureRendition] = field(default_factory=list)
 
 
 @dataclass
@@ -148,6 +190,51 @@ class Survey:
     foodshare: Foodshare | None = None
 
 
+@dataclass
+class FoodshareChange:
+    """Data class representing the net change to one foodshare since a sync cursor.
+
+    Attributes:
+        foodshare_id (int): ID of the changed foodshare
+        change (str): 'created' or 'updated' if the foodshare is in the active feed,
+            otherwise why it left the feed: 'closed', 'expired' or 'deleted'
+        foodshare (Foodshare | None): The current foodshare if it is in the active feed
+    """
+
+    foodshare_id: int
+    change: str
+    foodshare: Foodshare | None = None
+
+
+@dataclass
+class FoodshareChanges:
+    """Data class representing the result of a delta sync query.
+
+    Attributes:
+        changes (list[FoodshareChange]): One entry per foodshare changed since the cursor
+        last_change_id (int): Highest change log ID included in the result
+        as_of (datetime): UTC time the result reflects, used to detect later expiries
+    """
+
+    changes: list[FoodshareChange]
+    last_change_id: int
+    as_of: datetime
+
+
+@dataclass
+class FoodsharePage:
+    """Data class representing one page of the active feed.
+
+    Attributes:
+        foodshares (list[Foodshare]): The foodshares on the page, in feed order
+        next_key (list | None): Sort key of the last foodshare, to start the next page after;
+            None on the last page
+    """
+
+    foodshares: list[Foodshare]
+    next_key: list | None = None
+
+
 def validate_email_format(email: str) -> bool:
     """Validate that an email address has a valid format.
 
@@ -190,6 +277,30 @@ def sanitize_string(input_str: str) -> str:
     return sanitized[:500]
 
 
+def normalize_label(label: str) -> str:
+    """Normalize a restriction label for storage.
+
+    Args:
+        label (str): The label as submitted, e.g. '  Nut-Free '
+
+    Returns:
+        str: The label with surrounding whitespace removed and inner runs collapsed to one space
+    """
+    return " ".join(label.split())
+
+
+def restriction_key(label: str) -> str:
+    """Return the key that identifies a restriction label regardless of case or spacing.
+
+    Args:
+        label (str): The restriction label
+
+    Returns:
+        str: The normalized, case-folded label; 'vegan' and ' VEGAN' share a key
+    """
+    return normalize_label(label).casefold()
+
+
 def validate_datetime_format(date_string: str | datetime) -> bool:
     """Validate that a date string is properly formatted.
 
@@ -209,6 +320,26 @@ def validate_datetime_format(date_string: str | datetime) -> bool:
         return False
 
 
+def sqlite_datetime(value: str | datetime) -> str:
+    """Format a timestamp the way SQLite's `datetime()` does.
+
+    Stored timestamps mix 'T' and space separators and UTC offsets; queries
+    compare them through `datetime()`, which converts them to UTC and drops
+    fractional seconds. This gives the same value in Python, e.g. for a keyset.
+
+    Args:
+        value (str | datetime): An ISO format timestamp; naive values are taken as UTC
+
+    Returns:
+        str: The UTC time as 'YYYY-MM-DD HH:MM:SS'
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
 def hash_token(token: str) -> str:
     """Hash a token using SHA256.
 
@@ -228,3 +359,76 @@ def generate_secure_token() -> str:
         str: A securely generated URL-safe token
     """
     return secrets.token_urlsafe(32)
+
+
+def encode_changes_cursor(change_id: int, as_of: datetime) -> str:
+    """Encode a delta sync position as an opaque cursor string.
+
+    Args:
+        change_id (int): Highest foodshare change log ID the client has seen
+        as_of (datetime): UTC time the client's view of the feed reflects
+
+    Returns:
+        str: The cursor, to be passed back unchanged as `since`
+    """
+    return f"{change_id}-{int(as_of.timestamp())}"
+
+
+def decode_changes_cursor(cursor: str) -> tuple[int, datetime]:
+    """Decode a cursor produced by `encode_changes_cursor`.
+
+    Args:
+        cursor (str): The cursor string
+
+    Returns:
+        tuple[int, datetime]: The change log ID and the UTC time of the cursor
+
+    Raises:
+        ValueError: If the cursor is malformed or either part is out of range
+    """
+    change_id, _, timestamp = cursor.partition("-")
+    if not change_id.isdigit() or not timestamp.isdigit():
+        raise ValueError(f"Invalid changes cursor: {cursor!r}")
+    if int(change_id) > SQLITE_MAX_INT:
+        raise ValueError(f"Changes cursor ID out of range: {cursor!r}")
+    try:
+        as_of = datetime.fromtimestamp(int(timestamp), tz=timezone.utc)
+    except (OverflowError, OSError) as e:
+        raise ValueError(f"Changes cursor time out of range: {cursor!r}") from e
+    return int(change_id), as_of
+
+
+def encode_feed_cursor(sort: str, key: list) -> str:
+    """Encode a position in the paged feed as an opaque cursor string.
+
+    Args:
+        sort (str): The order being paged, one of FEED_SORTS
+        key (list): Sort key of the last foodshare the client has seen
+
+    Returns:
+        str: The cursor, to be passed back unchanged as `cursor`
+    """
+    return base64.urlsafe_b64encode(json.dumps([sort, *key]).encode()).decode().rstrip("=")
+
+
+def decode_feed_cursor(cursor: str) -> tuple[str, list]:
+    """Decode a cursor produced by `encode_feed_cursor`.
+
+    Args:
+        cursor (str): The cursor string
+
+    Returns:
+        tuple[str, list]: The sort order and the sort key to continue after
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        sort, *key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid feed cursor: {cursor!r}") from e
+    # 'ending' pages by (ends, foodshare_id) and 'newest' by foodshare_id
+    expected = (str, int) if sort == "ending" else (int,)
+    if sort not in FEED_SORTS or len(key) != len(expected) or not all(map(isinstance, key, expected)):
+        raise ValueError(f"Invalid feed cursor: {cursor!r}")
+    return sort, key
@@ -0,0 +1,155 @@
+"""In-process event broadcasting for the Foodshare backend.
+
+This module lets GET /foodshares/events push feed changes to connected clients
+instead of having every client poll GET /foodshares. Each subscriber owns a small
+bounded queue, so an idle connection costs a few kilobytes of memory and no
+database work. A subscriber that falls behind is evicted rather than allowed to
+grow its queue; the client reconnects and catches up with GET /foodshares/changes.
+
+Events only reach subscribers connected to the worker process that published
+them. Clients should treat the stream as a latency hint and keep the changes
+cursor as their source of truth.
+
+Classes:
+    FoodshareEvent: A single feed event and its Server-Sent Events encoding
+    Subscriber: One connected client's bounded event queue
+    EventHub: Broadcasts events to every subscriber
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from functools import cached_property
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FoodshareEvent:
+    """Data class representing a change to the active feed.
+
+    Attributes:
+        event (str): One of 'created', 'closed' or 'expired'
+        foodshare_id (int): The ID of the foodshare that changed
+        data (dict): JSON payload sent to clients
+    """
+
+    event: str
+    foodshare_id: int
+    data: dict = field(default_factory=dict)
+
+    @cached_property
+    def message(self) -> bytes:
+        """The event encoded once as a Server-Sent Events message, shared by every subscriber."""
+        payload = {"foodshare_id": self.foodshare_id, **self.data}
+        return f"event: {self.event}\ndata: {json.dumps(payload, default=str)}\n\n".encode()
+
+
+class Subscriber:
+    """A connected client's bounded queue of pending events.
+
+    A `None` item in the queue means the subscriber was closed, either because
+    it was evicted or because the hub is shutting down.
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        """Initialize the Subscriber.
+
+        Args:
+            queue_size (int): Maximum number of undelivered events before the subscriber is evicted
+        """
+        self.queue: asyncio.Queue[FoodshareEvent | None] = asyncio.Queue(maxsize=queue_size)
+        self.evicted = False
+
+    async def next_event(self, heartbeat_interval: float) -> FoodshareEvent | None:
+        """Wait for the next event.
+
+        Args:
+            heartbeat_interval (float): Seconds to wait before giving up so the caller can send a heartbeat
+
+        Returns:
+            FoodshareEvent | None: The next event, or None if the interval elapsed
+
+        Raises:
+            EOFError: If the subscriber has been closed
+        """
+        try:
+            event = await asyncio.wait_for(self.queue.get(), heartbeat_interval)
+        except TimeoutError:
+            return None
+        if event is None:
+            raise EOFError("Subscriber closed")
+        return event
+
+    def close(self) -> None:
+        """Discard pending events and wake the reader with the close marker."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class EventHub:
+    """Fans feed events out to every connected subscriber.
+
+    Publishing never blocks: an event is put on each subscriber's queue without
+    waiting, and a subscriber whose queue is full is evicted.
+    """
+
+    def __init__(self, queue_size: int = 32) -> None:
+        """Initialize the EventHub.
+
+        Args:
+            queue_size (int): Per-subscriber queue bound
+        """
+        self.queue_size = queue_size
+        self._subscribers: set[Subscriber] = set()
+
+    def __len__(self) -> int:
+        """Return the number of connected subscribers."""
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscriber:
+        """Register a new subscriber.
+
+        Returns:
+            Subscriber: The subscriber to read events from
+        """
+        subscriber = Subscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        logger.debug(f"Event subscriber added ({len(self._subscribers)} connected)")
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """Remove a subscriber. Unknown subscribers are ignored.
+
+        Args:
+            subscriber (Subscriber): The subscriber to remove
+        """
+        self._subscribers.discard(subscriber)
+
+    def publish(self, event: FoodshareEvent) -> None:
+        """Deliver an event to every subscriber, evicting those that are full.
+
+        Args:
+            event (FoodshareEvent): The event to deliver
+        """
+        evicted = []
+        for subscriber in self._subscribers:
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                evicted.append(subscriber)
+
+        for subscriber in evicted:
+            self._subscribers.discard(subscriber)
+            subscriber.evicted = True
+            subscriber.close()
+        if evicted:
+            logger.warning(f"Evicted {len(evicted)} slow event subscribers")
+
+    def close(self) -> None:
+        """Disconnect every subscriber."""
+        for subscriber in self._subscribers:
+            subscriber.close()
+        self._subscribers.clear()
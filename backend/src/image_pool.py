@@ -0,0 +1,150 @@
+"""Image worker pool for the Foodshare backend.
+
+Decoding, resizing and WebP-encoding an upload holds the GIL for most of its
+runtime, so running it on a thread stalls every other request served by the same
+process. ImagePool runs `process_image` in a pool of worker processes instead and
+bounds how many images may be queued or in progress at once, so an upload burst
+is turned away with a retryable error rather than piling up work.
+
+WebP encoding effort is configurable. When enough images are already pending,
+new ones are encoded with a faster `method` so the queue drains sooner, at the
+cost of slightly larger files.
+
+Classes:
+    ImagePoolFull: Raised when the pool has no room for another image
+    ImagePool: Bounded process pool for image processing
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src.image_utils import WEBP_METHOD, WEBP_QUALITY, process_image_bytes, warm_up
+
+logger = logging.getLogger(__name__)
+
+
+class ImagePoolFull(Exception):
+    """Raised when the maximum number of images is already queued or in progress."""
+
+
+class ImagePool:
+    """Runs image processing in worker processes with bounded queue depth.
+
+    With `max_workers=0` images are processed on the event loop's default
+    thread pool, as before the pool existed; the queue bound still applies.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 0,
+        max_pending: int = 16,
+        quality: int = WEBP_QUALITY,
+        method: int = WEBP_METHOD,
+        fast_method: int = 2,
+        fast_method_depth: int = 0,
+    ) -> None:
+        """Initialize the ImagePool.
+
+        Args:
+            max_workers (int): Number of worker processes; 0 processes images on threads instead
+            max_pending (int): Maximum number of images queued or in progress before `process` rejects new ones
+            quality (int): WebP quality from 0 to 100
+            method (int): WebP compression effort from 0 (fastest) to 6 (smallest)
+            fast_method (int): WebP compression effort used while the pool is busy
+            fast_method_depth (int): Number of pending images at which new ones use `fast_method`; 0 disables
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.quality = quality
+        self.method = method
+        self.fast_method = fast_method
+        self.fast_method_depth = fast_method_depth
+        self.pending = 0
+        self._executor: Executor | None = self._new_executor()
+
+    def _new_executor(self) -> Executor | None:
+        """Create the worker process pool, or None when using threads.
+
+        Workers are started with 'spawn' so they do not inherit the parent's
+        database threads and open connections.
+
+        Returns:
+            Executor | None: The process pool, or None for the default thread pool
+        """
+        if self.max_workers <= 0:
+            return None
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def warm_up(self) -> None:
+        """Start every worker process and load Pillow in it before the first upload.
+
+        Raises:
+            Exception: If a worker fails to start
+        """
+        if self._executor is None:
+            return
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(self._executor, warm_up) for _ in range(self.max_workers)))
+        logger.info(f"Image pool warmed up with {len(set(pids))} worker processes")
+
+    def current_method(self) -> int:
+        """Return the WebP method for an image submitted now.
+
+        Returns:
+            int: `fast_method` if at least `fast_method_depth` images are pending, otherwise `method`
+        """
+        if self.fast_method_depth > 0 and self.pending >= self.fast_method_depth:
+            return min(self.method, self.fast_method)
+        return self.method
+
+    async def process(self, file_stream: bytes) -> dict[int, bytes]:
+        """Process an image into the stored WebP renditions.
+
+        Args:
+            file_stream (bytes): The raw uploaded image data
+
+        Returns:
+            dict[int, bytes]: The processed WebP image data, keyed by rendition size
+
+        Raises:
+            ImagePoolFull: If `max_pending` images are already queued or in progress
+            Exception: If image processing fails
+        """
+        if self.pending >= self.max_pending:
+            logger.warning(f"Image pool saturated ({self.pending} images pending)")
+            raise ImagePoolFull(f"{self.pending} images already pending")
+
+        method = self.current_method()
+        if method != self.method:
+            logger.debug(f"Image pool busy ({self.pending} pending); encoding with method {method}")
+
+        self.pending += 1
+        executor = self._executor
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, process_image_bytes, file_stream, self.quality, method)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed while decoding a hostile image); replace the pool for later uploads
+            if self._executor is executor:
+                logger.error("Image worker process died; restarting the image pool", exc_info=True)
+                self._restart()
+            raise
+        finally:
+            self.pending -= 1
+
+    def _restart(self) -> None:
+        """Replace a broken process pool with a fresh one."""
+        broken = self._executor
+        self._executor = self._new_executor()
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+
+    async def close(self) -> None:
+        """Shut down the worker processes, cancelling images that have not started."""
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
@@ -2,10 +2,13 @@
 
 This module provides functions to process uploaded images, including square cropping,
 resizing, and converting to optimized WebP format for efficient storage and delivery.
+Each upload is decoded once and encoded at every size in RENDITION_SIZES so clients
+can download the smallest image that fits their layout.
 """
 
 import io
 import logging
+import os
 
 from PIL import Image, ImageOps
 
@@ -20,38 +23,135 @@ except ImportError:
     logger = logging.getLogger(__name__)
     logger.warning("pillow-heif not installed; HEIC images may fail to process")
 
+# Keep at least this much headroom over the target size when shrinking by an integer
+# factor, so the final Lanczos pass still has enough source pixels to filter well
+REDUCING_GAP = 1.5
 
-def process_image(file_stream: bytes, target_size: int = 800) -> io.BytesIO:
+# Modes that Image.reduce supports; anything else is converted to RGB first
+REDUCIBLE_MODES = {"L", "LA", "RGB", "RGBA", "CMYK", "YCbCr", "I", "F", "PA"}
+
+# Square sizes stored for every upload: list thumbnails, detail view, and full size
+RENDITION_SIZES = (160, 400, 800)
+
+# Default WebP encoder settings. Quality 80 provides excellent balance between size and
+# visual fidelity; method 6 is libwebp's highest (and slowest) compression effort
+WEBP_QUALITY = 80
+WEBP_METHOD = 6
+
+# Largest image accepted, checked from the header before any pixel data is decoded.
+# Leaves room for 48 MP phone photos while refusing decompression bombs
+MAX_IMAGE_PIXELS = 50_000_000
+
+
+class ImageTooLarge(ValueError):
+    """Raised when an image's header declares more than the allowed number of pixels."""
+
+
+def check_image_dimensions(file_stream: bytes, max_pixels: int = MAX_IMAGE_PIXELS) -> tuple[int, int]:
+    """Read an image's dimensions from its header and reject absurd pixel counts.
+
+    Only the header is parsed; no pixel data is decoded, so this is cheap enough to
+    run on the request path before an upload is queued for processing.
+
+    Args:
+        file_stream (bytes): The input buffer containing raw image data.
+        max_pixels (int): Maximum width * height. Defaults to MAX_IMAGE_PIXELS.
+
+    Returns:
+        tuple[int, int]: The image's width and height.
+
+    Raises:
+        ImageTooLarge: If the image has more than `max_pixels` pixels.
+        PIL.UnidentifiedImageError: If the data is not a recognized image format.
+    """
+    try:
+        with Image.open(io.BytesIO(file_stream)) as img:
+            width, height = img.size
+    except Image.DecompressionBombError as e:
+        # Pillow refuses to open images past twice its own pixel limit
+        raise ImageTooLarge(str(e)) from e
+    if width * height > max_pixels:
+        raise ImageTooLarge(f"Image is {width}x{height}, more than {max_pixels} pixels")
+    return width, height
+
+
+def process_image(
+    file_stream: bytes, target_size: int = 800, quality: int = WEBP_QUALITY, method: int = WEBP_METHOD
+) -> io.BytesIO:
     """Process an image to be square, resized, and converted to optimized WebP.
 
+    Convenience wrapper around `process_image_renditions` for a single size.
+
+    Args:
+        file_stream (bytes): The input buffer containing raw image data.
+        target_size (int): The target width and height for the square image. Defaults to 800.
+        quality (int): WebP quality from 0 to 100. Defaults to WEBP_QUALITY.
+        method (int): WebP compression effort from 0 (fastest) to 6 (smallest). Defaults to WEBP_METHOD.
+
+    Returns:
+        io.BytesIO: A buffer containing the processed WebP image data.
+
+    Raises:
+        Exception: If image processing fails.
+    """
+    return process_image_renditions(file_stream, (target_size,), quality, method)[target_size]
+
+
+def process_image_renditions(
+    file_stream: bytes,
+    sizes: tuple[int, ...] = RENDITION_SIZES,
+    quality: int = WEBP_QUALITY,
+    method: int = WEBP_METHOD,
+) -> dict[int, io.BytesIO]:
+    """Process an image into square WebP renditions of several sizes from one decode.
+
     This function performs the following operations:
     1. Opens the image from the input buffer.
-    2. Converts it to RGB format (handling RGBA/CMYK).
+    2. Decodes it close to the largest size: JPEGs are scaled down by the decoder
+       (`draft`), HEICs use a large enough embedded thumbnail if there is one, and
+       anything still much larger than needed is shrunk by an integer factor
+       (`reduce`) before any full-size copy is made.
     3. Crops the image to a centered square based on its shortest dimension.
-    4. Resizes the image to the target dimensions using high-quality Lanczos filtering.
-    5. Saves the resulting image to a BytesIO buffer as WebP with 80% quality.
+    4. Converts it to RGB format (handling RGBA/CMYK).
+    5. Resizes the square to every requested size using high-quality Lanczos filtering.
+    6. Saves each rendition to a BytesIO buffer as WebP with the given quality and method.
 
     Args:
         file_stream (bytes): The input buffer containing raw image data.
-        target_size (int): The target width and height for the square image. Defaults to 800.
+        sizes (tuple[int, ...]): Widths (and heights) of the square renditions. Defaults to RENDITION_SIZES.
+        quality (int): WebP quality from 0 to 100. Defaults to WEBP_QUALITY.
+        method (int): WebP compression effort from 0 (fastest) to 6 (smallest). Defaults to WEBP_METHOD.
 
     Returns:
-        io.BytesIO: A buffer containing the processed WebP image data.
+        dict[int, io.BytesIO]: Buffers containing the processed WebP image data, keyed by size.
 
     Raises:
+        ImageTooLarge: If the image has more than MAX_IMAGE_PIXELS pixels.
         Exception: If image processing fails.
     """
+    target_size = max(sizes)
     try:
         # Load image using Pillow
         logger.debug(f"Attempting to process image of size {len(file_stream)} bytes")
         with Image.open(io.BytesIO(file_stream)) as img:
             logger.debug(f"Opened image: {img.format}, {img.size}, {img.mode}")
+            if img.width * img.height > MAX_IMAGE_PIXELS:
+                raise ImageTooLarge(f"Image is {img.width}x{img.height}, more than {MAX_IMAGE_PIXELS} pixels")
+
+            # Decode at the smallest scale that still covers the target (JPEG DCT scaling, HEIC thumbnails)
+            img.draft("RGB", (target_size, target_size))
+
+            # Pre-downscale by an integer factor while the image is still un-rotated and un-converted
+            factor = int(min(img.size) / (target_size * REDUCING_GAP))
+            if factor > 1:
+                if img.mode not in REDUCIBLE_MODES:
+                    img = img.convert("RGB")
+                img = img.reduce(factor)
+                logger.debug(f"Reduced image by {factor}x to {img.size}")
+
             # Handle orientation based on EXIF data
             img = ImageOps.exif_transpose(img)
 
-            # Convert to RGB to ensure compatibility and remove transparency/CMYK issues
-            img = img.convert("RGB")
-
             # 1. Square Crop (Center Crop)
             width, height = img.size
             if width > height:
@@ -67,19 +167,53 @@ def process_image(file_stream: bytes, target_size: int = 800) -> io.BytesIO:
 
             img = img.crop((left, top, right, bottom))
 
-            # 2. Resize to target dimensions
-            # Using LANCZOS (formerly ANTIALIAS) for highest quality downsampling
-            img = img.resize((target_size, target_size), Image.Resampling.LANCZOS)
+            # Convert to RGB to ensure compatibility and remove transparency/CMYK issues
+            img = img.convert("RGB")
+
+            renditions = {}
+            for size in sorted(set(sizes), reverse=True):
+                # 2. Resize to target dimensions
+                # Using LANCZOS (formerly ANTIALIAS) for highest quality downsampling
+                resized = img.resize((size, size), Image.Resampling.LANCZOS)
 
-            # 3. Save as optimized WebP
-            output = io.BytesIO()
-            # Quality 80 provides excellent balance between size and visual fidelity
-            img.save(output, format="WEBP", quality=80, method=6)  # method=6 is highest compression effort
-            output.seek(0)
+                # 3. Save as optimized WebP
+                output = io.BytesIO()
+                resized.save(output, format="WEBP", quality=quality, method=method)
+                output.seek(0)
+                renditions[size] = output
+                logger.debug(f"Rendition {size} processed successfully. Size: {output.getbuffer().nbytes} bytes")
 
-            logger.debug(f"Image processed successfully. Final size: {output.getbuffer().nbytes} bytes")
-            return output
+            return renditions
 
     except Exception as e:
         logger.error(f"Failed to process image: {str(e)}", exc_info=True)
         raise
+
+
+def process_image_bytes(file_stream: bytes, quality: int = WEBP_QUALITY, method: int = WEBP_METHOD) -> dict[int, bytes]:
+    """Process an image into every rendition and return the encoded WebP bytes.
+
+    Wrapper around `process_image_renditions` for worker processes, where
+    returning plain bytes keeps the result cheap to send back to the parent.
+
+    Args:
+        file_stream (bytes): The input buffer containing raw image data.
+        quality (int): WebP quality from 0 to 100.
+        method (int): WebP compression effort from 0 (fastest) to 6 (smallest).
+
+    Returns:
+        dict[int, bytes]: The processed WebP image data, keyed by rendition size.
+    """
+    renditions = process_image_renditions(file_stream, quality=quality, method=method)
+    return {size: buffer.getvalue() for size, buffer in renditions.items()}
+
+
+def warm_up() -> int:
+    """Encode a tiny image so a worker process has Pillow and its codecs loaded.
+
+    Returns:
+        int: The worker's process ID
+    """
+    output = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(output, format="WEBP")
+    return os.getpid()
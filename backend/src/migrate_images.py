@@ -0,0 +1,57 @@
+"""Command that moves stored pictures into the sharded directory layout.
+
+Pictures saved before LocalFileStorage sharded its upload folder sit directly in
+it. This command moves each of them into its shard directory and rewrites the
+paths recorded in the pictures and picture_renditions tables. It is safe to run
+while the server is up and to run again after an interruption.
+
+Old flat URIs keep working after the move: nginx falls back to the sharded
+location for '/images/<name>' requests (see nginx/vhost.d/default).
+
+Usage:
+    python -m src.migrate_images [--db database.sqlite] [--upload-folder images]
+
+    or, in the deployed container:
+        ./manage.sh migrate-images
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+
+from src.database import DatabaseManager
+from src.service import StorageService
+from src.storage import LocalFileStorage
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate(db_path: str, upload_folder: str) -> int:
+    """Move flat picture files into shard directories and update their paths.
+
+    Args:
+        db_path (str): Path of the SQLite database
+        upload_folder (str): Directory the pictures are stored in
+
+    Returns:
+        int: The number of picture and rendition rows updated
+    """
+    db = DatabaseManager(db_path)
+    await db.connect()
+    service = StorageService(db, LocalFileStorage(upload_folder))
+    try:
+        await db.init_tables()
+        return await service.migrate_to_sharded_layout()
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.getenv("DB_PATH", "database.sqlite"))
+    parser.add_argument("--upload-folder", default=os.getenv("UPLOAD_FOLDER", "images"))
+    args = parser.parse_args()
+    updated = asyncio.run(migrate(args.db, args.upload_folder))
+    print(f"Updated {updated} picture paths")
@@ -0,0 +1,70 @@
+"""Command that applies pending schema migrations to the database.
+
+The server applies them itself at startup; this command lets them be inspected
+with `--dry-run` first, or applied ahead of a deploy so the new workers start on
+a database that is already current. It is safe to run while the server is up:
+each migration runs in its own transaction, and migrations that a starting
+worker has already applied are skipped.
+
+Usage:
+    python -m src.migrate_schema [--db database.sqlite] [--dry-run]
+
+    or, in the deployed container:
+        ./manage.sh migrate-schema [--dry-run]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+
+from src.database import DatabaseManager
+from src.migrations import Migration, schema_version
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate_schema(db_path: str, dry_run: bool) -> tuple[int, list[Migration]]:
+    """Apply the pending migrations.
+
+    Args:
+        db_path (str): Path of the SQLite database
+        dry_run (bool): List the pending migrations without applying them
+
+    Returns:
+        tuple[int, list[Migration]]: The schema version afterwards and the migrations applied (or pending)
+    """
+    db = DatabaseManager(db_path)
+    await db.connect()
+    try:
+        migrations = await db.migrate(dry_run=dry_run)
+        return await schema_version(db.conn), migrations
+    finally:
+        await db.close()
+
+
+async def print_statements(migrations: list[Migration]) -> None:
+    """Print the SQL of each migration.
+
+    Args:
+        migrations (list[Migration]): The migrations to print
+    """
+    for migration in migrations:
+        print(f"-- {migration.name}")
+        for statement in await migration.statements():
+            print(statement)
+        print()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.getenv("DB_PATH", "database.sqlite"))
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    version, migrations = asyncio.run(migrate_schema(args.db, args.dry_run))
+    if args.dry_run:
+        asyncio.run(print_statements(migrations))
+    action = "Would apply" if args.dry_run else "Applied"
+    names = ", ".join(migration.name for migration in migrations) or "nothing"
+    print(f"Schema version {version}. {action} {len(migrations)} migrations: {names}.")
@@ -0,0 +1,227 @@
+"""Versioned schema migrations for the Foodshare database.
+
+The schema is built by the numbered SQL scripts in `src/sql/migrations`
+('0001_baseline.sql', '0002_feed_indexes.sql', ...), applied in order. The
+version of the last script applied is stored in the database header as
+`PRAGMA user_version`, so a database that is already current costs a single
+pragma read at startup, and a migration can change or drop anything, not only
+create what is missing.
+
+Each migration runs in its own `BEGIN IMMEDIATE` transaction together with the
+`user_version` bump, so it is applied completely or not at all. The version is
+read again once the write lock is held: when several worker processes start at
+once, the first one applies a migration and the others skip it.
+
+Writing migrations:
+    * Never edit a migration that has been deployed; add a new one instead.
+    * Use IF NOT EXISTS / IF EXISTS so a migration also applies to databases
+      created before versioning, which may already have some of its objects.
+    * Building an index holds the write lock until it is done. Readers carry on
+      under WAL, but writers in other worker processes wait (up to their busy
+      timeout), so give large index builds a migration of their own rather than
+      grouping them with other slow statements.
+
+Classes:
+    Migration: One numbered migration script
+"""
+
+import logging
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import aiosqlite
+import anyio
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).parent / "sql" / "migrations"
+
+# Columns the baseline schema has that databases created before versioning may lack.
+# CREATE TABLE IF NOT EXISTS leaves their tables untouched, so the baseline adds them
+BASELINE_COLUMNS = {
+    "pictures": {
+        "content_hash": "TEXT",
+        "ref_count": "INTEGER NOT NULL DEFAULT 1",
+    },
+}
+
+# Indexes on baseline columns, created once the columns exist
+BASELINE_COLUMN_INDEXES = ("CREATE INDEX IF NOT EXISTS idx_pictures_content_hash ON pictures(content_hash)",)
+
+_FILENAME = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+
+@dataclass(frozen=True)
+class Migration:
+    """Data class representing one migration script.
+
+    Attributes:
+        version (int): The schema version the database is at once the script has run
+        name (str): The script's file name without its extension, e.g. '0002_feed_indexes'
+        path (Path): Path of the SQL script
+    """
+
+    version: int
+    name: str
+    path: Path
+
+    async def statements(self) -> list[str]:
+        """Read the script and split it into statements.
+
+        Returns:
+            list[str]: The SQL statements, in order
+        """
+        return split_statements(await anyio.Path(self.path).read_text())
+
+
+def discover_migrations(directory: Path = MIGRATIONS_DIR) -> tuple[Migration, ...]:
+    """List the migration scripts in a directory, ordered by version.
+
+    Args:
+        directory (Path): Directory holding 'NNNN_name.sql' scripts
+
+    Returns:
+        tuple[Migration, ...]: The migrations, numbered 1, 2, 3, ... without gaps
+
+    Raises:
+        ValueError: If a script is misnamed, or versions repeat or skip a number
+    """
+    migrations = []
+    for path in directory.iterdir():
+        match = _FILENAME.match(path.name)
+        if match is None:
+            raise ValueError(f"Migration file {path.name} is not named NNNN_name.sql")
+        migrations.append(Migration(int(match.group(1)), path.stem, path))
+    migrations.sort(key=lambda migration: migration.version)
+    for expected, migration in enumerate(migrations, start=1):
+        if migration.version != expected:
+            raise ValueError(f"Expected migration {expected:04d}, found {migration.name}")
+    return tuple(migrations)
+
+
+# Discovered once per process; scripts are only read when they have to be applied
+MIGRATIONS = discover_migrations()
+
+
+def split_statements(script: str) -> list[str]:
+    """Split an SQL script into complete statements.
+
+    Trigger bodies contain semicolons of their own, so the script is cut where
+    SQLite considers a statement complete rather than at every semicolon.
+
+    Args:
+        script (str): The SQL script
+
+    Returns:
+        list[str]: The statements, each ending with a semicolon
+
+    Raises:
+        ValueError: If the script ends with an incomplete statement
+    """
+    statements, pending = [], ""
+    for line in script.splitlines(keepends=True):
+        pending += line
+        if sqlite3.complete_statement(pending):
+            statements.append(pending.strip())
+            pending = ""
+    if any(line.strip() and not line.strip().startswith("--") for line in pending.splitlines()):
+        raise ValueError(f"Incomplete SQL statement at the end of the script: {pending.strip()}")
+    return statements
+
+
+async def schema_version(conn: aiosqlite.Connection) -> int:
+    """Return the version of the last migration applied to a database.
+
+    Args:
+        conn (aiosqlite.Connection): The database connection
+
+    Returns:
+        int: The `user_version` pragma; 0 for a new database or one created before versioning
+    """
+    async with conn.execute("PRAGMA user_version") as cursor:
+        return (await cursor.fetchone())[0]
+
+
+async def _add_baseline_columns(conn: aiosqlite.Connection) -> None:
+    """Add the columns in BASELINE_COLUMNS that an existing database lacks, then their indexes.
+
+    Args:
+        conn (aiosqlite.Connection): The database connection, inside the baseline's transaction
+    """
+    for table, columns in BASELINE_COLUMNS.items():
+        async with conn.execute(f"PRAGMA table_info({table})") as cursor:
+            existing = {row[1] for row in await cursor.fetchall()}
+        for column, definition in columns.items():
+            if column not in existing:
+                await conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                logger.info(f"Added column {table}.{column}")
+    for index in BASELINE_COLUMN_INDEXES:
+        await conn.execute(index)
+
+
+async def _apply(conn: aiosqlite.Connection, migration: Migration) -> bool:
+    """Apply one migration and record its version, in a single transaction.
+
+    Args:
+        conn (aiosqlite.Connection): The database connection
+        migration (Migration): The migration to apply
+
+    Returns:
+        bool: True if applied, False if another process applied it first
+
+    Raises:
+        Exception: If a statement fails, after rolling the migration back
+    """
+    statements = await migration.statements()
+    start = time.perf_counter()
+    # Take the write lock up front so two processes cannot both apply the migration
+    await conn.execute("BEGIN IMMEDIATE")
+    try:
+        if await schema_version(conn) >= migration.version:
+            await conn.rollback()
+            return False
+        for statement in statements:
+            await conn.execute(statement)
+        if migration.version == 1:
+            await _add_baseline_columns(conn)
+        # PRAGMA does not take parameters; the version is an int from the file name
+        await conn.execute(f"PRAGMA user_version = {migration.version}")
+        await conn.commit()
+    except BaseException:
+        await conn.rollback()
+        raise
+    logger.info(f"Applied migration {migration.name} in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return True
+
+
+async def migrate(
+    conn: aiosqlite.Connection, migrations: tuple[Migration, ...] = MIGRATIONS, dry_run: bool = False
+) -> list[Migration]:
+    """Bring a database up to the latest schema version.
+
+    Args:
+        conn (aiosqlite.Connection): The database connection, with no transaction open
+        migrations (tuple[Migration, ...]): The migrations to apply, from `discover_migrations`
+        dry_run (bool): Only report the migrations that would be applied
+
+    Returns:
+        list[Migration]: The migrations applied (or, with `dry_run`, pending)
+
+    Raises:
+        Exception: If a migration fails; the ones before it stay applied
+    """
+    try:
+        version = await schema_version(conn)
+        latest = migrations[-1].version if migrations else 0
+        if version > latest:
+            logger.warning(f"Database schema version {version} is newer than this code's {latest}")
+        pending = [migration for migration in migrations if migration.version > version]
+        if dry_run:
+            return pending
+        return [migration for migration in pending if await _apply(conn, migration)]
+    except Exception as e:
+        logger.error(f"Failed to migrate the database schema: {str(e)}", exc_info=True)
+        raise
@@ -0,0 +1,65 @@
+"""Command that removes picture files no database record references.
+
+A crash between saving an upload's files and recording them, or in the middle of
+writing one, leaves files in the upload folder that nothing points to. This
+command walks the folder in batches, checks each batch against the pictures and
+picture_renditions tables and removes the orphans, then reports how many files
+and bytes were reclaimed. It is safe to run while the server is up: files newer
+than the grace period are never removed.
+
+Usage:
+    python -m src.reconcile_images [--dry-run] [--grace-period 3600] [--batch-size 500]
+
+    or, in the deployed container:
+        ./manage.sh reconcile-images [--dry-run]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+
+from src.database import DatabaseManager
+from src.service import StorageService
+from src.storage import LocalFileStorage, OrphanReport
+
+logger = logging.getLogger(__name__)
+
+
+async def reconcile(
+    db_path: str, upload_folder: str, grace_period: float, batch_size: int, dry_run: bool
+) -> OrphanReport:
+    """Remove orphan files from the upload folder.
+
+    Args:
+        db_path (str): Path of the SQLite database
+        upload_folder (str): Directory the pictures are stored in
+        grace_period (float): Minimum age in seconds of a file to be removed
+        batch_size (int): Files per database lookup
+        dry_run (bool): Count orphans without removing them
+
+    Returns:
+        OrphanReport: Files scanned, orphans removed and bytes reclaimed
+    """
+    db = DatabaseManager(db_path)
+    await db.connect()
+    service = StorageService(db, LocalFileStorage(upload_folder))
+    try:
+        await db.init_tables()
+        return await service.reconcile_orphan_files(grace_period, batch_size, dry_run)
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.getenv("DB_PATH", "database.sqlite"))
+    parser.add_argument("--upload-folder", default=os.getenv("UPLOAD_FOLDER", "images"))
+    parser.add_argument("--grace-period", type=float, default=3600)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    report = asyncio.run(reconcile(args.db, args.upload_folder, args.grace_period, args.batch_size, args.dry_run))
+    action = "Would remove" if report.dry_run else "Removed"
+    print(f"Scanned {report.scanned} files. {action} {report.orphans} orphans ({report.bytes_reclaimed} bytes).")
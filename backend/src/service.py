@@ -7,21 +7,31 @@ that involve both persistent storage and file system operations.
 
 Key features:
 - Picture upload and management with automatic cleanup of expired files
+- Content-addressed pictures: identical uploads share one set of files, reference counted
 - User registration with email validation
 - Foodshare creation with associated picture handling
 - Survey submission and retrieval
 - Database and file system coordination
+- Publishing feed events to connected GET /foodshares/events clients
+- Periodic cleanup of expired pictures, ended foodshares, OTP codes and idle device tokens
 - Error handling and resource cleanup
 - Input sanitization and validation
 
 Classes:
+    CleanupReport: What one run of the cleanup job removed
     StorageService: Main service class for coordinating storage operations
 
 Methods:
     __init__: Initialize the service with database and storage managers
-    close: Close the database connection
+    close: Disconnect event subscribers and close the database connection
+    start_expiry_watcher: Start publishing 'expired' events in the background
+    start_cleanup_scheduler: Start running the cleanup job periodically in the background
+    run_cleanup: Remove one batch each of expired and stale records
+    publish_expired_foodshares: Publish 'expired' events for foodshares that ended since a time
     add_picture_with_file: Save a picture file and record its metadata
     cleanup_expired_pictures: Delete expired picture files from storage and database
+    migrate_to_sharded_layout: Move flat picture files into shard directories and update their paths
+    reconcile_orphan_files: Remove stored files that no picture references
     create_foodshare_with_picture: Create foodshare with associated picture
     register_user: Register a new user in the system
     get_user: Retrieve user by ID, email, or token
@@ -33,21 +43,60 @@ Methods:
 """
 
 import asyncio
+import hashlib
 import logging
-from datetime import datetime
+import os
+import random
+import secrets
+import socket
+import time
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
 
 from src.database import DatabaseManager
 from src.database_helpers import (
+    SESSION_MAX_IDLE,
     User,
     sanitize_string,
     validate_datetime_format,
     validate_email_format,
 )
-from src.image_utils import process_image
-from src.storage import LocalFileStorage
+from src.events import EventHub, FoodshareEvent
+from src.image_pool import ImagePool, ImagePoolFull
+from src.storage import LocalFileStorage, OrphanReport
 
 logger = logging.getLogger(__name__)
 
+# Name of the lease that elects the worker process running the cleanup job
+CLEANUP_LEASE = "cleanup"
+
+# Expired pictures deleted per database transaction, and picture files unlinked at once
+CLEANUP_CHUNK_SIZE = 200
+CLEANUP_UNLINK_CONCURRENCY = 16
+
+# How long the foodshare change log is kept; clients that have not synced for longer refetch the feed
+CHANGE_LOG_RETENTION = timedelta(days=7)
+
+
+@dataclass
+class CleanupReport:
+    """Data class summarizing one run of the cleanup job.
+
+    Attributes:
+        picture_files (int): Files of expired pictures deleted
+        foodshares (int): Ended foodshares deactivated
+        otp_codes (int): Expired OTP codes deleted
+        device_tokens (int): Idle device tokens deleted
+        foodshare_changes (int): Change log entries past retention deleted
+    """
+
+    picture_files: int = 0
+    foodshares: int = 0
+    otp_codes: int = 0
+    device_tokens: int = 0
+    foodshare_changes: int = 0
+
 
 class StorageService:
     """Service class for managing storage operations including pictures and foodshares.
@@ -56,23 +105,189 @@ class StorageService:
     foodshare creation with associated pictures, and survey submissions.
     """
 
-    def __init__(self, db: DatabaseManager, storage: LocalFileStorage) -> None:
+    def __init__(
+        self,
+        db: DatabaseManager,
+        storage: LocalFileStorage,
+        events: EventHub | None = None,
+        images: ImagePool | None = None,
+        content_addressed: bool = True,
+    ) -> None:
         """Initialize the StorageService.
 
         Args:
             db (DatabaseManager): Database manager instance for database operations
             storage (LocalFileStorage): Storage instance for file operations
+            events (EventHub | None): Hub that feed events are published to; a new one is created if omitted
+            images (ImagePool | None): Pool that processes uploaded images; a thread-backed one is created if omitted
+            content_addressed (bool): Reuse the stored picture when the same upload is posted again
         """
         self.db = db
         self.storage = storage
+        self.events = events if events is not None else EventHub()
+        self.images = images if images is not None else ImagePool()
+        self.content_addressed = content_addressed
+        self._expiry_task: asyncio.Task | None = None
+        self._expiry_interval = 0.0
+        self._cleanup_task: asyncio.Task | None = None
+        # Unique per process, so worker processes sharing the database can tell their leases apart
+        self._lease_owner = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
 
     async def close(self) -> None:
         """Close the database connection.
 
-        This method closes the database connection to free up resources.
+        This method disconnects event subscribers, stops the expiry watcher, cleanup
+        scheduler and image workers, and closes the database connection to free up resources.
         """
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._expiry_task
+            self._expiry_task = None
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._cleanup_task
+            self._cleanup_task = None
+            # Let another worker take over without waiting for the lease to lapse
+            with suppress(Exception):
+                await self.db.release_lease(CLEANUP_LEASE, self._lease_owner)
+        self.events.close()
+        await self.images.close()
         await self.db.close()
 
+    def start_expiry_watcher(self, interval: float) -> None:
+        """Start a background task that publishes 'expired' events.
+
+        Expiry is not a write, so nothing else would notify subscribers when a
+        foodshare's end time passes. The task is stopped by `close`.
+
+        Args:
+            interval (float): Seconds between checks
+        """
+        if self._expiry_task is None:
+            self._expiry_interval = interval
+            self._expiry_task = asyncio.create_task(self._publish_expired_periodically(interval))
+
+    async def publish_expired_foodshares(self, since: datetime) -> datetime:
+        """Publish an 'expired' event for every active foodshare that ended after `since`.
+
+        Args:
+            since (datetime): UTC time of the previous check
+
+        Returns:
+            datetime: The time this check covers up to, to pass as `since` next time
+        """
+        result = await self.db.get_foodshare_changes(await self.db.get_latest_change_id(), since)
+        if result is None:
+            return since
+        for change in result.changes:
+            if change.change == "expired":
+                self.events.publish(FoodshareEvent("expired", change.foodshare_id))
+        return result.as_of
+
+    async def _publish_expired_periodically(self, interval: float) -> None:
+        """Publish 'expired' events every `interval` seconds until cancelled.
+
+        Args:
+            interval (float): Seconds between checks
+        """
+        since = datetime.now(tz=timezone.utc)
+        while True:
+            await asyncio.sleep(interval)
+            if not self.events:
+                # Nobody is listening; skip the query
+                since = datetime.now(tz=timezone.utc)
+                continue
+            try:
+                since = await self.publish_expired_foodshares(since)
+            except Exception as e:
+                logger.error(f"Failed to publish expired foodshares: {str(e)}", exc_info=True)
+
+    def start_cleanup_scheduler(self, interval: float, jitter: float, batch_size: int) -> None:
+        """Start a background task that runs the cleanup job periodically.
+
+        Every worker process starts the task, but on each tick only the holder
+        of the cleanup lease in the database runs the job. The holder renews the
+        lease every tick; if it stops, another worker takes over once the lease
+        lapses. The task is stopped, and the lease released, by `close`.
+
+        Args:
+            interval (float): Seconds between runs
+            jitter (float): Up to this many extra seconds are added to each wait, so workers do not wake together
+            batch_size (int): Maximum number of rows of each kind removed per run
+        """
+        if self._cleanup_task is None:
+            self._cleanup_task = asyncio.create_task(self._cleanup_periodically(interval, jitter, batch_size))
+
+    async def run_cleanup(self, batch_size: int) -> CleanupReport:
+        """Remove one batch each of expired pictures, ended foodshares, expired OTP codes, idle tokens and old changes.
+
+        Expiry is announced by the expiry watcher, which only sees foodshares that
+        are still active, so ended foodshares are left active until two watcher
+        intervals have passed and every worker's watcher has published them.
+        Anything beyond `batch_size` is left for the next run, so a backlog is
+        worked off gradually rather than in one long write.
+
+        Args:
+            batch_size (int): Maximum number of rows of each kind to remove
+
+        Returns:
+            CleanupReport: What was removed
+        """
+        report = CleanupReport()
+        report.picture_files = await self.cleanup_expired_pictures(limit=batch_size)
+
+        grace = timedelta(seconds=2 * self._expiry_interval)
+        report.foodshares = len(await self.db.deactivate_ended_foodshares(batch_size, grace))
+
+        report.otp_codes = await self.db.delete_expired_otps(batch_size)
+        # A day of slack beyond the session lifetime covers usage other workers have not flushed yet
+        report.device_tokens = await self.db.delete_stale_device_tokens(
+            SESSION_MAX_IDLE + timedelta(days=1), batch_size
+        )
+        report.foodshare_changes = await self.db.prune_foodshare_changes(CHANGE_LOG_RETENTION, batch_size)
+
+        logger.info(f"Cleanup finished: {report}")
+        return report
+
+    async def _cleanup_periodically(self, interval: float, jitter: float, batch_size: int) -> None:
+        """Run the cleanup job every `interval` (plus jitter) seconds while holding the lease, until cancelled.
+
+        Args:
+            interval (float): Seconds between runs
+            jitter (float): Maximum extra seconds added to each wait
+            batch_size (int): Maximum number of rows of each kind removed per run
+        """
+        # Outlive two of the longest waits, so the holder keeps the lease while it is running
+        lease_ttl = 2 * (interval + jitter)
+        while True:
+            await asyncio.sleep(interval + random.uniform(0, jitter))
+            try:
+                if not await self.db.acquire_lease(CLEANUP_LEASE, self._lease_owner, lease_ttl):
+                    logger.debug("Cleanup lease held by another worker; skipping")
+                    continue
+                await self.run_cleanup(batch_size)
+            except Exception as e:
+                logger.error(f"Cleanup failed: {str(e)}", exc_info=True)
+
+    async def _publish_created(self, foodshare_id: int) -> None:
+        """Publish a 'created' event carrying the full foodshare, if anyone is listening.
+
+        A failure is logged rather than raised, since the foodshare itself was created.
+
+        Args:
+            foodshare_id (int): The ID of the new foodshare
+        """
+        if not self.events:
+            return
+        try:
+            foodshare = await self.db.get_foodshare(foodshare_id)
+            if foodshare and foodshare.active:
+                self.events.publish(FoodshareEvent("created", foodshare_id, asdict(foodshare)))
+        except Exception as e:
+            logger.error(f"Failed to publish created event for foodshare {foodshare_id}: {str(e)}", exc_info=True)
+
     async def add_picture_with_file(
         self,
         file_stream: bytes,
@@ -82,8 +297,14 @@ class StorageService:
     ) -> int | None:
         """Save a picture file and record its metadata in the database.
 
-        This method automatically processes the image into an 800x800 square WebP format
-        for optimal storage and fast mobile delivery.
+        This method automatically processes the image into square WebP renditions
+        (160, 400 and 800 pixels) from a single decode, so list views can download a
+        small thumbnail while detail views use the full size. The largest rendition is
+        the picture's main file.
+
+        In content-addressed mode the upload is hashed first. If a live picture
+        with the same hash exists, it gains a reference and is returned without
+        decoding or encoding anything.
 
         Args:
             file_stream (bytes): The file stream containing the original picture data
@@ -93,50 +314,179 @@ class StorageService:
 
         Returns:
             int | None: The ID of the created picture record, or None if failed
+
+        Raises:
+            ImagePoolFull: If the image pool is saturated and the upload should be retried later
         """
-        filepath = None
+        filepaths: dict[int, str] = {}
         try:
-            # CPU-intensive processing is offloaded to a thread to keep the event loop responsive
-            processed_buffer = await asyncio.to_thread(process_image, file_stream)
-
-            # All processed images are WebP
-            webp_extension = "webp"
-            webp_mimetype = "image/webp"
-
-            filepath = await self.storage.save(processed_buffer.getvalue(), webp_extension)
-
-            picture_id = await self.db.add_picture(expires=expires, filepath=filepath, mimetype=webp_mimetype)
-            return picture_id
-
+            content_hash = None
+            if self.content_addressed:
+                content_hash = hashlib.sha256(file_stream).hexdigest()
+                picture_id = await self.db.acquire_picture(content_hash, expires)
+                if picture_id:
+                    return picture_id
+
+            filepaths = await self._save_renditions(file_stream)
+            return await self._add_picture_record(filepaths, expires, content_hash)
+
+        except ImagePoolFull:
+            raise
         except Exception as e:
             # Log the error with full traceback for debugging
             logger.error(f"Error processing/saving picture: {e}", exc_info=True)
-            if filepath:
+            for filepath in filepaths.values():
                 await self.storage.delete(filepath)
             return None
 
-    async def cleanup_expired_pictures(self) -> int:
-        """Delete expired picture files from storage and database.
+    async def _save_renditions(self, file_stream: bytes) -> dict[int, str]:
+        """Process an upload into WebP renditions and save their files.
 
-        This method removes all expired pictures from both the filesystem and database.
-        It returns the count of successfully deleted files.
+        Args:
+            file_stream (bytes): The original picture data
 
         Returns:
-            int: The number of expired pictures successfully deleted
+            dict[int, str]: URI of each saved rendition, keyed by size in pixels
+
+        Raises:
+            ImagePoolFull: If the image pool is saturated and the upload should be retried later
+            Exception: If processing or saving fails; files saved so far are deleted first
         """
-        deleted_count = 0
+        # CPU-intensive processing runs in the image worker pool to keep the event loop responsive
+        processed = await self.images.process(file_stream)
 
-        filepaths_to_delete = await self.db.delete_expired_pictures()
+        filepaths: dict[int, str] = {}
+        try:
+            for size, data in processed.items():
+                # All processed images are WebP
+                filepaths[size] = await self.storage.save(data, "webp")
+        except Exception:
+            for filepath in filepaths.values():
+                await self.storage.delete(filepath)
+            raise
+        return filepaths
 
-        for filepath in filepaths_to_delete:
-            success = await self.storage.delete(filepath)
-            if success:
-                deleted_count += 1
-            else:
+    async def _add_picture_record(
+        self, filepaths: dict[int, str], expires: datetime, content_hash: str | None
+    ) -> int | None:
+        """Record saved renditions as a picture, the largest one being its main file.
+
+        Args:
+            filepaths (dict[int, str]): URI of each saved rendition, keyed by size in pixels
+            expires (datetime): The expiration date/time for the picture
+            content_hash (str | None): SHA-256 of the original upload, in content-addressed mode
+
+        Returns:
+            int | None: The ID of the created picture record
+        """
+        return await self.db.add_picture(
+            expires=expires,
+            filepath=filepaths[max(filepaths)],
+            mimetype="image/webp",
+            renditions=filepaths,
+            content_hash=content_hash,
+        )
+
+    async def cleanup_expired_pictures(
+        self,
+        limit: int | None = None,
+        chunk_size: int = CLEANUP_CHUNK_SIZE,
+        concurrency: int = CLEANUP_UNLINK_CONCURRENCY,
+    ) -> int:
+        """Delete expired picture files from storage and database.
+
+        This method removes expired pictures, including every rendition, from both
+        the filesystem and database. A shared picture expires only when its latest
+        reference does, so no file still in use is removed. It returns the count of successfully deleted files.
+
+        Records are deleted one chunk per transaction, and each chunk's files are
+        unlinked concurrently before the next chunk is deleted, so a large backlog
+        neither holds the write lock for long nor loads every path into memory.
+
+        Args:
+            limit (int | None): Maximum number of pictures to delete, or None for all
+            chunk_size (int): Maximum number of pictures deleted per transaction
+            concurrency (int): Maximum number of files unlinked at once
+
+        Returns:
+            int: The number of expired picture files successfully deleted
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def delete_file(filepath: str) -> bool:
+            async with semaphore:
+                success = await self.storage.delete(filepath)
+            if not success:
                 logger.warning(f"Failed to delete physical file: {filepath}")
+            return success
+
+        deleted_count = 0
+        async for filepaths in self.db.iter_expired_pictures(chunk_size, limit):
+            results = await asyncio.gather(*(delete_file(filepath) for filepath in filepaths))
+            deleted_count += sum(results)
 
         return deleted_count
 
+    async def migrate_to_sharded_layout(self) -> int:
+        """Move picture files saved before the sharded layout and update their recorded paths.
+
+        Files are moved first and paths rewritten after, so a crash in between
+        leaves moved files whose paths are still flat; running the migration again
+        picks those up, since any flat path whose sharded file exists is rewritten.
+
+        Returns:
+            int: The number of picture and rendition rows updated
+        """
+        moved = await self.storage.shard_flat_files()
+        logger.info(f"Moved {len(moved)} picture files into shard directories")
+
+        filepaths = {}
+        for filepath in await self.db.get_picture_filepaths():
+            sharded = self.storage.sharded_uri(filepath)
+            if sharded != filepath and await self.storage.exists(sharded):
+                filepaths[filepath] = sharded
+        return await self.db.rewrite_picture_filepaths(filepaths)
+
+    async def reconcile_orphan_files(
+        self, grace_period: float = 3600, batch_size: int = 500, dry_run: bool = False
+    ) -> OrphanReport:
+        """Remove files in the upload folder that no picture or rendition references.
+
+        Orphans are left behind by a crash between saving a file and recording it,
+        or in the middle of writing one (temporary files). The upload folder is
+        streamed in batches and each batch is checked against the database in one
+        query. Files younger than `grace_period` are skipped, since an upload in
+        progress saves its files before recording them. A sharded file is also kept
+        while a record still has its flat path, as after `migrate_to_sharded_layout`
+        moved the file but was interrupted before rewriting the record.
+
+        Args:
+            grace_period (float): Minimum age in seconds of a file to be removed
+            batch_size (int): Files per database lookup
+            dry_run (bool): Count orphans without removing them
+
+        Returns:
+            OrphanReport: Files scanned, orphans removed and bytes reclaimed
+        """
+        report = OrphanReport(dry_run=dry_run)
+        cutoff = time.time() - grace_period
+        async for batch in self.storage.iter_files(batch_size):
+            report.scanned += len(batch)
+            filepaths = {file.uri for file in batch} | {self.storage.flat_uri(file.uri) for file in batch}
+            referenced = await self.db.get_referenced_filepaths(list(filepaths))
+            for file in batch:
+                if referenced & {file.uri, self.storage.flat_uri(file.uri)} or file.modified > cutoff:
+                    continue
+                if dry_run or await self.storage.remove(file):
+                    report.orphans += 1
+                    report.bytes_reclaimed += file.size
+
+        logger.info(
+            f"{'Found' if dry_run else 'Removed'} {report.orphans} orphan files "
+            f"({report.bytes_reclaimed} bytes) out of {report.scanned}"
+        )
+        return report
+
     async def create_foodshare_with_picture(
         self,
         name: str,
@@ -156,6 +506,12 @@ class StorageService:
         uploading and associating a picture with it, and linking any provided
         dietary restrictions.
 
+        The image is processed and its files saved first. The picture, the
+        foodshare and its restrictions are then written in one database
+        transaction, so a failure leaves neither records nor files behind. In
+        content-addressed mode an upload matching a live picture skips
+        processing and takes a reference to that picture instead.
+
         Args:
             name (str): The name of the foodshare
             location (str): The location where the foodshare is available
@@ -170,6 +526,9 @@ class StorageService:
 
         Returns:
             int | None: The ID of the created foodshare, or None if failed
+
+        Raises:
+            ImagePoolFull: If the image pool is saturated and the upload should be retried later
         """
         # Validate inputs
         if not name or not location:
@@ -186,25 +545,82 @@ class StorageService:
         if not validate_datetime_format(picture_expires):
             return None
 
-        picture_id = await self.add_picture_with_file(file_stream, extension, mimetype, picture_expires)
-
-        if not picture_id:
+        content_hash = hashlib.sha256(file_stream).hexdigest() if self.content_addressed else None
+        filepaths: dict[int, str] = {}
+        try:
+            # Encode before the transaction, so the write lock is not held while the image is processed
+            if content_hash is None or not await self.db.find_picture(content_hash):
+                filepaths = await self._save_renditions(file_stream)
+            records = (name, location, ends, active, user_id, picture_expires, restrictions)
+            foodshare_id = await self._add_foodshare_records(*records, filepaths, content_hash)
+            if foodshare_id is None:
+                # The matching picture expired between the lookup and the transaction; store this upload after all
+                filepaths = await self._save_renditions(file_stream)
+                foodshare_id = await self._add_foodshare_records(*records, filepaths, content_hash)
+        except ImagePoolFull:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to create foodshare '{name}': {str(e)}", exc_info=True)
+            for filepath in filepaths.values():
+                await self.storage.delete(filepath)
             return None
 
-        foodshare_id = await self.db.add_foodshare(
-            name=name,
-            location=location,
-            ends=ends,
-            active=active,
-            user_fk_id=user_id,
-            picture_fk_id=picture_id,
-        )
+        if foodshare_id:
+            await self._publish_created(foodshare_id)
+
+        return foodshare_id
+
+    async def _add_foodshare_records(
+        self,
+        name: str,
+        location: str,
+        ends: datetime,
+        active: bool,
+        user_id: int,
+        picture_expires: datetime,
+        restrictions: list[str] | None,
+        filepaths: dict[int, str],
+        content_hash: str | None,
+    ) -> int | None:
+        """Write a foodshare, its picture and its restrictions in one transaction.
 
-        # If foodshare was successfully created, link any provided restrictions
-        if foodshare_id and restrictions:
-            for restriction in restrictions:
-                await self.db.add_restriction_to_foodshare_by_name(foodshare_id, restriction)
+        Args:
+            name (str): The sanitized name of the foodshare
+            location (str): The sanitized location of the foodshare
+            ends (datetime): When the foodshare ends
+            active (bool): Whether the foodshare is currently active
+            user_id (int): The ID of the user creating the foodshare
+            picture_expires (datetime): The expiration date/time for the picture
+            restrictions (list[str] | None): Restriction labels to link
+            filepaths (dict[int, str]): Saved renditions to record as a new picture, or empty to reuse
+                the live picture with `content_hash`
+            content_hash (str | None): SHA-256 of the original upload, in content-addressed mode
 
+        Returns:
+            int | None: The ID of the created foodshare, or None if there were no renditions and
+                no live picture to reuse; nothing is written then
+
+        Raises:
+            Exception: If database operation fails; nothing is written
+        """
+        async with self.db.transaction():
+            if filepaths:
+                picture_id = await self._add_picture_record(filepaths, picture_expires, content_hash)
+            else:
+                picture_id = await self.db.acquire_picture(content_hash, picture_expires) if content_hash else None
+                if picture_id is None:
+                    return None
+
+            foodshare_id = await self.db.add_foodshare(
+                name=name,
+                location=location,
+                ends=ends,
+                active=active,
+                user_fk_id=user_id,
+                picture_fk_id=picture_id,
+            )
+            if foodshare_id and restrictions:
+                await self.db.add_foodshare_restrictions(foodshare_id, restrictions)
         return foodshare_id
 
     async def register_user(self, email: str) -> int | None:
@@ -260,6 +676,9 @@ class StorageService:
     async def delete_foodshare(self, foodshare_id: int) -> bool:
         """Delete a foodshare and its associated picture.
 
+        The records are deleted in one transaction; picture files are only
+        removed once it has committed.
+
         Args:
             foodshare_id (int): The ID of the foodshare to delete
 
@@ -270,17 +689,20 @@ class StorageService:
         if not foodshare:
             return False
 
-        # Handle file and picture record deletion
-        if foodshare.picture:
-            # Delete physical file
-            await self.storage.delete(foodshare.picture.filepath)
-            # Delete database record
-            await self.db.delete_picture(foodshare.picture.picture_id)
+        async with self.db.transaction():
+            # Drop this foodshare's reference to its picture; the record and files go with the last one
+            last_reference = bool(foodshare.picture) and await self.db.release_picture(foodshare.picture.picture_id)
+
+            # Handle foodshare dependencies (restrictions)
+            await self.db.delete_foodshare_restrictions(foodshare_id)
 
-        # Handle foodshare dependencies (restrictions)
-        await self.db.delete_foodshare_restrictions(foodshare_id)
+            # Handle the foodshare record itself
+            await self.db.delete_foodshare_record(foodshare_id)
 
-        # Handle the foodshare record itself
-        await self.db.delete_foodshare_record(foodshare_id)
+        if last_reference:
+            # Delete physical files, the main one and every rendition
+            filepaths = {foodshare.picture.filepath, *(r.filepath for r in foodshare.picture.renditions)}
+            for filepath in filepaths:
+                await self.storage.delete(filepath)
 
         return True
@@ -0,0 +1,140 @@
+-- Baseline schema: every table as of the first versioned migration
+-- Databases created before migrations were versioned (user_version 0) already have some or all of
+-- it, so every statement is IF NOT EXISTS
+
+-- Users table
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    email TEXT UNIQUE NOT NULL,
+    verified INTEGER DEFAULT 0,
+    banned INTEGER DEFAULT 0,
+    is_admin INTEGER DEFAULT 0
+);
+
+-- Device tokens table
+CREATE TABLE IF NOT EXISTS device_tokens (
+    token_hash TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY(user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- Pictures table
+-- Identical uploads share one picture: content_hash is the SHA-256 of the original upload and
+-- ref_count the number of foodshares using it. content_hash and ref_count are added to older
+-- databases after this script (see BASELINE_COLUMNS in src/migrations.py)
+CREATE TABLE IF NOT EXISTS pictures (
+    picture_id INTEGER PRIMARY KEY,
+    expires TIMESTAMP NOT NULL,
+    filepath TEXT NOT NULL,
+    mimetype TEXT NOT NULL,
+    content_hash TEXT,
+    ref_count INTEGER NOT NULL DEFAULT 1
+);
+
+-- Picture renditions table (one square WebP per size, generated from the same upload)
+CREATE TABLE IF NOT EXISTS picture_renditions (
+    picture_id INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    filepath TEXT NOT NULL,
+    FOREIGN KEY(picture_id) REFERENCES pictures(picture_id) ON DELETE CASCADE,
+    PRIMARY KEY (picture_id, size)
+);
+
+-- Foodshares table
+CREATE TABLE IF NOT EXISTS foodshares (
+    foodshare_id INTEGER PRIMARY KEY,
+    name TEXT,
+    location TEXT,
+    ends TIMESTAMP NOT NULL,
+    active INTEGER DEFAULT 1 CHECK(active IN (0, 1)),
+    user_fk_id INTEGER REFERENCES users(user_id) ON DELETE SET NULL,
+    picture_fk_id INTEGER REFERENCES pictures(picture_id) ON DELETE SET NULL
+);
+
+-- Restrictions table
+CREATE TABLE IF NOT EXISTS restrictions (
+    restriction_id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL UNIQUE
+);
+
+-- Foodshare restrictions junction table
+CREATE TABLE IF NOT EXISTS foodshare_restrictions (
+    foodshare_id INTEGER,
+    restriction_id INTEGER,
+    FOREIGN KEY(foodshare_id) REFERENCES foodshares(foodshare_id) ON DELETE CASCADE,
+    FOREIGN KEY(restriction_id) REFERENCES restrictions(restriction_id) ON DELETE CASCADE,
+    PRIMARY KEY (foodshare_id, restriction_id)
+);
+
+-- Surveys table
+CREATE TABLE IF NOT EXISTS surveys (
+    survey_id INTEGER PRIMARY KEY,
+    num_participants INTEGER DEFAULT 0,
+    experience INTEGER DEFAULT 0,
+    other_thoughts TEXT,
+    foodshare_fk_id INTEGER REFERENCES foodshares(foodshare_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS otp_codes (
+    email TEXT PRIMARY KEY,
+    otp TEXT NOT NULL,
+    expires_at DATETIME NOT NULL
+);
+
+-- Foodshare change log backing GET /foodshares/changes
+-- change_id is AUTOINCREMENT so ids are never reused and serve as a monotonic sync cursor
+CREATE TABLE IF NOT EXISTS foodshare_changes (
+    change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    foodshare_id INTEGER NOT NULL,
+    change_type TEXT NOT NULL CHECK(change_type IN ('created', 'updated', 'closed', 'deleted')),
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_foodshares_log_insert
+AFTER INSERT ON foodshares
+BEGIN
+    INSERT INTO foodshare_changes (foodshare_id, change_type) VALUES (new.foodshare_id, 'created');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_foodshares_log_update
+AFTER UPDATE ON foodshares
+BEGIN
+    INSERT INTO foodshare_changes (foodshare_id, change_type)
+    VALUES (new.foodshare_id, CASE WHEN old.active = 1 AND new.active = 0 THEN 'closed' ELSE 'updated' END);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_foodshares_log_delete
+AFTER DELETE ON foodshares
+BEGIN
+    INSERT INTO foodshare_changes (foodshare_id, change_type) VALUES (old.foodshare_id, 'deleted');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_foodshare_restrictions_log_insert
+AFTER INSERT ON foodshare_restrictions
+BEGIN
+    INSERT INTO foodshare_changes (foodshare_id, change_type) VALUES (new.foodshare_id, 'updated');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_foodshare_restrictions_log_delete
+AFTER DELETE ON foodshare_restrictions
+BEGIN
+    INSERT INTO foodshare_changes (foodshare_id, change_type) VALUES (old.foodshare_id, 'updated');
+END;
+
+-- Leases that let one worker process at a time run a periodic job (e.g. the cleanup scheduler)
+-- expires_at is a Unix timestamp; another worker may take the lease once it has passed
+CREATE TABLE IF NOT EXISTS job_leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+
+-- Indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_foodshares_user_fk ON foodshares(user_fk_id);
+CREATE INDEX IF NOT EXISTS idx_foodshares_active ON foodshares(active);
+CREATE INDEX IF NOT EXISTS idx_foodshares_ends ON foodshares(ends);
+CREATE INDEX IF NOT EXISTS idx_pictures_expires ON pictures(expires);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+CREATE INDEX IF NOT EXISTS idx_device_tokens_user_id ON device_tokens(user_id);
@@ -0,0 +1,11 @@
+-- Indexes for the active feed and its restriction filter
+
+-- Every feed query filters on active = 1 and a range of ends. Only active rows are indexed, so
+-- closed foodshares piling up in history do not slow the feed down. The separate single-column
+-- indexes it replaces could not serve both terms, and the planner preferred the active one
+DROP INDEX IF EXISTS idx_foodshares_active;
+DROP INDEX IF EXISTS idx_foodshares_ends;
+CREATE INDEX IF NOT EXISTS idx_foodshares_active_ends ON foodshares(ends) WHERE active = 1;
+
+-- The primary key orders links by foodshare; filtering the feed by restriction needs the other direction
+CREATE INDEX IF NOT EXISTS idx_foodshare_restrictions_restriction ON foodshare_restrictions(restriction_id, foodshare_id);
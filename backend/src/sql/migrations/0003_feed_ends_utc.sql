@@ -0,0 +1,6 @@
+-- Index the active feed on ends converted to UTC
+
+-- Stored ends values use a 'T' separator and a UTC offset, while the feed compares against
+-- datetime('now'), so queries wrap them in datetime(). A plain index on ends cannot serve those
+-- predicates; this expression index can
+CREATE INDEX IF NOT EXISTS idx_foodshares_active_ends_utc ON foodshares(datetime(ends)) WHERE active = 1;
@@ -0,0 +1,5 @@
+-- Drop the plain index on ends
+
+-- Every query on ends now compares datetime(ends), which idx_foodshares_active_ends_utc serves;
+-- nothing uses the index on the raw column any more, and it only slowed down writes
+DROP INDEX IF EXISTS idx_foodshares_active_ends;
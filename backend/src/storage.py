@@ -3,11 +3,25 @@
 This module provides the LocalFileStorage class for managing file uploads and deletions
 using the local filesystem. It handles saving files with unique filenames and provides
 methods for deleting files when needed.
+
+Files are fanned out into two levels of subdirectories named after the first four
+characters of the filename (e.g. 'ab/cd/abcd1234-....webp'), so no directory grows
+past a few files however many uploads accumulate. Files saved before the sharded
+layout sit directly in the upload folder until `shard_flat_files` moves them.
+
+Files are written to a hidden temporary file in the target directory, flushed to
+disk and renamed into place, so a crash mid-write never leaves a truncated image
+at a public path. Temporary files and files whose database record was never
+written are found by `iter_files` and removed by the orphan reconciliation in
+StorageService.
 """
 
 import logging
 import os
 import uuid
+from collections.abc import AsyncIterator, Iterator
+from contextlib import suppress
+from dataclasses import dataclass
 
 import anyio
 from anyio import Path
@@ -15,6 +29,46 @@ from anyio import Path
 # Initialize module-level logger
 logger = logging.getLogger(__name__)
 
+# Public URI prefix that nginx serves the upload folder under
+URI_PREFIX = "/images/"
+
+# Suffix of files being written; they are renamed to their final name once complete
+TEMP_SUFFIX = ".tmp"
+
+
+@dataclass
+class StoredFile:
+    """Data class representing a file in the upload folder.
+
+    Attributes:
+        uri (str): The public URI the file is served under
+        path (str): The path of the file on disk
+        size (int): Size in bytes
+        modified (float): Modification time as a Unix timestamp
+    """
+
+    uri: str
+    path: str
+    size: int
+    modified: float
+
+
+@dataclass
+class OrphanReport:
+    """Data class summarizing an orphan file reconciliation.
+
+    Attributes:
+        scanned (int): Files examined
+        orphans (int): Unreferenced files removed (or, in a dry run, that would be)
+        bytes_reclaimed (int): Total size of those files
+        dry_run (bool): Whether files were left in place
+    """
+
+    scanned: int = 0
+    orphans: int = 0
+    bytes_reclaimed: int = 0
+    dry_run: bool = False
+
 
 class LocalFileStorage:
     """Local file storage manager for handling file uploads and deletions."""
@@ -32,42 +86,202 @@ class LocalFileStorage:
             logger.error(f"Initialization error: Failed to create upload folder at {self.upload_folder}. Error: {e}")
             raise
 
+    @staticmethod
+    def shard_path(filename: str) -> str:
+        """Return a filename's path relative to the upload folder in the sharded layout.
+
+        Args:
+            filename (str): The bare filename
+
+        Returns:
+            str: The relative path (e.g., 'ab/cd/abcd1234.webp')
+        """
+        return f"{filename[:2]}/{filename[2:4]}/{filename}"
+
+    @classmethod
+    def sharded_uri(cls, uri: str) -> str:
+        """Return the sharded-layout URI of a file.
+
+        Args:
+            uri (str): The public URI of the file, flat or sharded
+
+        Returns:
+            str: The public URI in the sharded layout (e.g., '/images/ab/cd/abcd1234.webp')
+        """
+        return f"{URI_PREFIX}{cls.shard_path(os.path.basename(uri))}"
+
+    @staticmethod
+    def flat_uri(uri: str) -> str:
+        """Return the URI a file had before the sharded layout.
+
+        Args:
+            uri (str): The public URI of the file, flat or sharded
+
+        Returns:
+            str: The public URI in the flat layout (e.g., '/images/abcd1234.webp')
+        """
+        return f"{URI_PREFIX}{os.path.basename(uri)}"
+
+    def local_path(self, uri: str) -> str:
+        """Map a public URI to the file's location on disk.
+
+        Only the filename is taken from the URI, so it cannot point outside the
+        upload folder. URIs in the sharded form map into the shard directories;
+        anything else maps to a flat file in the upload folder.
+
+        Args:
+            uri (str): The public URI of the file (e.g., '/images/ab/cd/uuid.png')
+
+        Returns:
+            str: The path of the file on disk
+        """
+        filename = os.path.basename(uri)
+        if uri == self.sharded_uri(uri):
+            return os.path.join(self.upload_folder, self.shard_path(filename))
+        return os.path.join(self.upload_folder, filename)
+
     async def save(self, file_stream: bytes, extension: str) -> str:
         """Save a file stream to disk with a unique filename.
 
         Returns:
-            str: The public URI path for the saved file (e.g., '/images/uuid.png')
+            str: The public URI path for the saved file (e.g., '/images/ab/cd/uuid.png')
         """
         filename = f"{uuid.uuid4()}.{extension}"
-        filepath = os.path.join(self.upload_folder, filename)
+        uri = f"{URI_PREFIX}{self.shard_path(filename)}"
+        filepath = Path(self.local_path(uri))
+        # Hidden and in the same directory, so the final rename is atomic
+        temp_path = filepath.with_name(f".{filename}{TEMP_SUFFIX}")
 
         try:
-            async with await anyio.open_file(filepath, "wb") as f:
+            await filepath.parent.mkdir(parents=True, exist_ok=True)
+            async with await anyio.open_file(temp_path, "wb") as f:
                 await f.write(file_stream)
+                await f.flush()
+                await anyio.to_thread.run_sync(os.fsync, f.wrapped.fileno())
+            await temp_path.rename(filepath)
             # Return a standardized public URI
-            return f"/images/{filename}"
+            return uri
         except OSError as e:
             logger.error(f"Write error: Failed to save file to {filepath}. Error: {e}")
+            with suppress(OSError):
+                await temp_path.unlink(missing_ok=True)
             raise
 
     async def delete(self, uri: str) -> bool:
         """Delete a file from disk based on its public URI.
 
         Args:
-            uri (str): The public URI of the file (e.g., '/images/uuid.png')
+            uri (str): The public URI of the file (e.g., '/images/ab/cd/uuid.png')
 
         Returns:
             bool: True if deletion was successful, False otherwise.
         """
         try:
-            # Extract the filename from the URI
-            filename = os.path.basename(uri)
-            filepath = os.path.join(self.upload_folder, filename)
-
-            path = Path(filepath)
-            if await path.exists():
-                await path.unlink()
+            # A single unlink, not an exists() check first; a missing file counts as deleted
+            await Path(self.local_path(uri)).unlink(missing_ok=True)
             return True
         except OSError as e:
             logger.error(f"Disk error: Failed during deletion of {uri}. Error: {e}")
             return False
+
+    async def exists(self, uri: str) -> bool:
+        """Check whether the file behind a public URI exists.
+
+        Args:
+            uri (str): The public URI of the file
+
+        Returns:
+            bool: True if the file exists
+        """
+        return await Path(self.local_path(uri)).is_file()
+
+    async def shard_flat_files(self) -> list[str]:
+        """Move files saved before the sharded layout into their shard directories.
+
+        Each file is renamed within the upload folder, so the move is atomic and
+        needs no copy. A file whose sharded path is already taken is left in place.
+
+        Returns:
+            list[str]: The public URIs, in the old flat form, of the files that were moved
+
+        Raises:
+            OSError: If the upload folder cannot be listed
+        """
+        moved = []
+        # List first so renaming does not disturb the directory iteration
+        entries = [entry async for entry in Path(self.upload_folder).iterdir()]
+        for entry in entries:
+            if not await entry.is_file():
+                continue
+            uri = f"{URI_PREFIX}{entry.name}"
+            target = Path(self.local_path(self.sharded_uri(uri)))
+            try:
+                if await target.exists():
+                    logger.warning(f"Not moving {entry.name}: {target} already exists")
+                    continue
+                await target.parent.mkdir(parents=True, exist_ok=True)
+                await entry.rename(target)
+                moved.append(uri)
+            except OSError as e:
+                logger.error(f"Disk error: Failed to move {entry} into its shard. Error: {e}")
+        return moved
+
+    def _walk(self) -> Iterator[StoredFile]:
+        """Yield every file in the upload folder and its shard directories, one directory at a time.
+
+        Yields:
+            StoredFile: Each file found
+        """
+        directories = [self.upload_folder]
+        while directories:
+            directory = directories.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            directories.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            stat = entry.stat(follow_symlinks=False)
+                            relative = os.path.relpath(entry.path, self.upload_folder).replace(os.sep, "/")
+                            yield StoredFile(f"{URI_PREFIX}{relative}", entry.path, stat.st_size, stat.st_mtime)
+            except OSError as e:
+                logger.error(f"Disk error: Failed to list {directory}. Error: {e}")
+
+    async def iter_files(self, batch_size: int = 500) -> AsyncIterator[list[StoredFile]]:
+        """Stream the files in the upload folder in batches.
+
+        The folder is walked lazily in a worker thread, so memory use is bounded by
+        `batch_size` however many files are stored.
+
+        Args:
+            batch_size (int): Maximum number of files per batch
+
+        Yields:
+            list[StoredFile]: The next batch of files
+        """
+        walker = self._walk()
+
+        def next_batch() -> list[StoredFile]:
+            return [file for _, file in zip(range(batch_size), walker, strict=False)]
+
+        while batch := await anyio.to_thread.run_sync(next_batch):
+            yield batch
+
+    async def remove(self, file: StoredFile) -> bool:
+        """Delete a file found by `iter_files`.
+
+        Unlike `delete`, the file's own path is used, which also reaches temporary
+        files that have no public URI.
+
+        Args:
+            file (StoredFile): The file to delete
+
+        Returns:
+            bool: True if the file is gone, False if deleting it failed
+        """
+        try:
+            await Path(file.path).unlink(missing_ok=True)
+            return True
+        except OSError as e:
+            logger.error(f"Disk error: Failed to delete {file.path}. Error: {e}")
+            return False
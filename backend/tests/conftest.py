@@ -48,6 +48,8 @@ async def fixture_test_app(tmp_path):
     quart_app.config["TESTING"] = True
     # Use a temporary directory for images during tests
     quart_app.config["UPLOAD_FOLDER"] = str(tmp_path / "images")
+    # Process images on threads rather than spawning worker processes for every test
+    quart_app.config["IMAGE_WORKERS"] = 0
 
     # Inject MockService for tests
     quart_app.email_service = MockService()
@@ -1,6 +1,8 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
-from src.app import adapt_datetime, convert_datetime
+from src.app import adapt_datetime, convert_datetime, next_expiry
+from src.cache import FeedCache
+from src.database_helpers import Foodshare
 
 
 def test_adapt_datetime():
@@ -26,3 +28,22 @@ def test_convert_datetime_with_microseconds():
     iso_bytes = b"2023-10-27T12:00:00.123456"
     dt = convert_datetime(iso_bytes)
     assert dt.microsecond == 123456
+
+
+def test_next_expiry_skips_ended_foodshares():
+    """Verify that foodshares which already ended do not set the feed expiry."""
+    now = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+    foodshares = [
+        Foodshare(1, "Ended", "Union", (now - timedelta(seconds=2)).isoformat(), [], True),
+        Foodshare(2, "Later", "Union", (now + timedelta(hours=2)).isoformat(), [], True),
+        Foodshare(3, "Soon", "Union", (now + timedelta(hours=1)).isoformat(), [], True),
+    ]
+    assert next_expiry(foodshares, now.timestamp()) == (now + timedelta(hours=1)).timestamp()
+    assert next_expiry(foodshares[:1], now.timestamp()) is None
+
+
+def test_feed_cache_ignores_past_expiry():
+    """Verify that a snapshot built with an expiry already in the past is still served."""
+    cache = FeedCache(max_age=10)
+    cache.put(1, b"[]", next_expiry=0.0)
+    assert cache.get(1) is not None
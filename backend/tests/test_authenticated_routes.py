@@ -50,3 +50,57 @@ async def test_expired_token(authenticated_client):
     response = await authenticated_client.get("/foodshares")
     assert response.status_code == 401
     assert (await response.get_json())["error"] == "Session expired. Please log in again."
+
+
+async def test_cached_session_invalidated_on_logout(authenticated_client):
+    """Verify that a cached session is rejected immediately after logout."""
+    response = await authenticated_client.get("/foodshares")
+    assert response.status_code == 200
+
+    response = await authenticated_client.post("/auth/logout")
+    assert response.status_code == 200
+
+    response = await authenticated_client.get("/foodshares")
+    assert response.status_code == 401
+
+
+async def test_cached_session_invalidated_on_ban(authenticated_client):
+    """Verify that banning a user takes effect even when their session is cached."""
+    from src.app import app as quart_app
+
+    response = await authenticated_client.get("/auth/me")
+    assert response.status_code == 200
+    user_id = (await response.get_json())["user_id"]
+
+    await quart_app.storage.db.update_user_status(user_id, banned=True)
+
+    response = await authenticated_client.get("/foodshares")
+    assert response.status_code == 403
+
+
+async def test_cached_session_invalidated_on_user_deletion(authenticated_client):
+    """Verify that deleting a user revokes their cached session."""
+    from src.app import app as quart_app
+
+    response = await authenticated_client.get("/auth/me")
+    user_id = (await response.get_json())["user_id"]
+
+    await quart_app.storage.db.delete_user_by_id(user_id)
+
+    response = await authenticated_client.get("/foodshares")
+    assert response.status_code == 401
+
+
+async def test_cached_session_skips_database(authenticated_client):
+    """Verify that a hot token is authorized without any database queries."""
+    from src.app import app as quart_app
+
+    await authenticated_client.get("/auth/me")
+
+    statements = []
+    await quart_app.storage.db.conn.set_trace_callback(statements.append)
+    response = await authenticated_client.get("/auth/me")
+    await quart_app.storage.db.conn.set_trace_callback(None)
+
+    assert response.status_code == 200
+    assert statements == []
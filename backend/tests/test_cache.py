@@ -0,0 +1,104 @@
+from unittest.mock import patch
+
+from src.cache import RestrictionCache, SessionCache
+from src.database_helpers import DeviceSession, User
+
+
+def make_entry(user_id: int):
+    session = DeviceSession(user_id=user_id, banned=0, last_used=None)
+    user = User(user_id=user_id, email=f"user{user_id}@maine.edu")
+    return session, user
+
+
+def test_session_cache_hit_and_miss():
+    """Verify that cached sessions are returned and unknown tokens miss."""
+    cache = SessionCache()
+    session, user = make_entry(1)
+    cache.put("token", session, user, cache.generation)
+
+    assert cache.get("token") == (session, user)
+    assert cache.get("other") is None
+
+
+def test_session_cache_ttl_expiry():
+    """Verify that entries are dropped once their TTL has passed."""
+    cache = SessionCache(ttl=10)
+    with patch("src.cache.time.monotonic", return_value=100.0):
+        cache.put("token", *make_entry(1), cache.generation)
+    with patch("src.cache.time.monotonic", return_value=109.0):
+        assert cache.get("token") is not None
+    with patch("src.cache.time.monotonic", return_value=111.0):
+        assert cache.get("token") is None
+    assert len(cache) == 0
+
+
+def test_session_cache_lru_eviction():
+    """Verify that the least recently used entry is evicted when full."""
+    cache = SessionCache(max_size=2)
+    cache.put("a", *make_entry(1), cache.generation)
+    cache.put("b", *make_entry(2), cache.generation)
+    cache.get("a")
+    cache.put("c", *make_entry(3), cache.generation)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_session_cache_invalidate_user():
+    """Verify that all tokens of a user are dropped together."""
+    cache = SessionCache()
+    cache.put("phone", *make_entry(1), cache.generation)
+    cache.put("tablet", *make_entry(1), cache.generation)
+    cache.put("other", *make_entry(2), cache.generation)
+
+    cache.invalidate_user(1)
+
+    assert cache.get("phone") is None
+    assert cache.get("tablet") is None
+    assert cache.get("other") is not None
+
+
+def test_session_cache_rejects_stale_generation():
+    """Verify that a session loaded before an invalidation is not cached."""
+    cache = SessionCache()
+    generation = cache.generation
+    cache.invalidate_token("token")
+    cache.put("token", *make_entry(1), generation)
+
+    assert cache.get("token") is None
+
+
+def test_session_cache_disabled_with_zero_ttl():
+    """Verify that a TTL of zero disables caching."""
+    cache = SessionCache(ttl=0)
+    cache.put("token", *make_entry(1), cache.generation)
+    assert cache.get("token") is None
+
+
+def test_restriction_cache_maps_both_ways():
+    """Verify that labels resolve to IDs regardless of case and spacing, and IDs to the stored label."""
+    cache = RestrictionCache()
+    cache.add(1, "Vegan")
+    cache.add(2, "Nut-Free")
+
+    assert cache.get_id(" vegan ") == 1
+    assert cache.get_id("NUT-FREE") == 2
+    assert cache.get_label(2) == "Nut-Free"
+    assert cache.get_id("Halal") is None
+    assert cache.get_label(3) is None
+    assert len(cache) == 2
+
+
+def test_restriction_cache_prefers_oldest_near_duplicate():
+    """Verify that near-duplicate labels already stored resolve to the first one's ID but keep their own label."""
+    cache = RestrictionCache()
+    cache.add(1, "Vegan")
+    cache.add(5, "vegan")
+
+    assert cache.get_id("VEGAN") == 1
+    assert cache.get_label(5) == "vegan"
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get_id("Vegan") is None
@@ -0,0 +1,38 @@
+import pytest
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from src.core import StreamingLimitBody
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_streaming_limit_body_chunked_over_limit():
+    """Verify that a body without Content-Length is cut off once the streamed bytes exceed the limit."""
+    body = StreamingLimitBody(None, 10)
+    chunks = []
+    body.append(b"123456")
+    chunks.append(await body.__anext__())
+    body.append(b"789012")
+
+    with pytest.raises(RequestEntityTooLarge):
+        await body.__anext__()
+    assert chunks == [b"123456"]
+    assert body.received == 12
+
+
+async def test_streaming_limit_body_within_limit():
+    """Verify that a streamed body under the limit is delivered unchanged."""
+    body = StreamingLimitBody(None, 10)
+    body.append(b"12345")
+    body.append(b"67890")
+    body.set_complete()
+
+    assert await body == b"1234567890"
+
+
+async def test_streaming_limit_body_content_length_over_limit():
+    """Verify that a declared Content-Length over the limit is rejected before any data is read."""
+    body = StreamingLimitBody(11, 10)
+
+    with pytest.raises(RequestEntityTooLarge):
+        await body
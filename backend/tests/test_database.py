@@ -1,8 +1,20 @@
+import asyncio
+import sqlite3
 from datetime import datetime, timedelta, timezone
 
 import pytest
 
-from src.database_helpers import DeviceSession, Foodshare, OTPRecord, PictureMetadata, Survey, User
+from src.database import DatabaseManager
+from src.database_helpers import (
+    DeviceSession,
+    Foodshare,
+    OTPRecord,
+    PictureMetadata,
+    Survey,
+    User,
+    decode_changes_cursor,
+    encode_changes_cursor,
+)
 
 # Mark all tests in this file as async
 pytestmark = pytest.mark.asyncio
@@ -16,12 +28,71 @@ async def test_tables_initialized(db_manager):
     async with db_manager.conn.execute("SELECT name FROM sqlite_master WHERE type='table'") as cursor:
         tables = [row["name"] for row in await cursor.fetchall()]
 
-    # Check for a few core tables expected from init_tables.sql
+    # Check for a few core tables expected from the baseline migration
     assert "users" in tables
     assert "pictures" in tables
     assert "foodshares" in tables
 
 
+async def test_read_pool_serves_reads(tmp_path):
+    """Verify that a file-backed manager serves reads from read-only pool connections."""
+    manager = DatabaseManager(str(tmp_path / "pool.sqlite"), read_pool_size=2)
+    await manager.connect()
+    await manager.init_tables()
+    try:
+        assert len(manager._read_conns) == 2
+
+        # Writes on the writer connection are visible to the pooled readers
+        user_id = await manager.add_user("pool@maine.edu")
+        user = await manager.get_user(user_id)
+        assert user is not None
+        assert user.email == "pool@maine.edu"
+
+        # Pooled connections refuse writes
+        async with manager._reader() as conn:
+            assert conn is not manager.conn
+            with pytest.raises(sqlite3.OperationalError):
+                await conn.execute("DELETE FROM users")
+    finally:
+        await manager.close()
+
+
+async def test_read_pool_disabled_for_memory_db():
+    """Verify that in-memory databases route reads through the writer connection."""
+    manager = DatabaseManager(":memory:", read_pool_size=4)
+    await manager.connect()
+    try:
+        assert manager.read_pool_size == 0
+        async with manager._reader() as conn:
+            assert conn is manager.conn
+    finally:
+        await manager.close()
+
+
+async def test_init_tables_adds_missing_columns(tmp_path):
+    """Verify that init_tables upgrades a database created before pictures were reference counted."""
+    path = str(tmp_path / "old.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE pictures (picture_id INTEGER PRIMARY KEY, expires TIMESTAMP NOT NULL,"
+            " filepath TEXT NOT NULL, mimetype TEXT NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO pictures (expires, filepath, mimetype) VALUES ('2099-01-01', '/images/a.webp', 'image/webp')"
+        )
+
+    manager = DatabaseManager(path)
+    await manager.connect()
+    try:
+        await manager.init_tables()
+        # Running again on an up-to-date database is a no-op
+        await manager.init_tables()
+        async with manager.conn.execute("SELECT content_hash, ref_count FROM pictures") as cursor:
+            assert tuple(await cursor.fetchone()) == (None, 1)
+    finally:
+        await manager.close()
+
+
 ### B. User Management ###
 
 
@@ -133,6 +204,21 @@ async def test_get_picture_not_found(db_manager):
     assert picture is None
 
 
+async def test_acquire_and_release_picture(db_manager):
+    """Test that pictures are shared by content hash and deleted with their last reference."""
+    expires = datetime.now(tz=timezone.utc) + timedelta(days=1)
+    picture_id = await db_manager.add_picture(expires, "/images/a.webp", "image/webp", content_hash="abc")
+
+    assert await db_manager.acquire_picture("abc", expires) == picture_id
+    assert await db_manager.acquire_picture("other", expires) is None
+
+    assert await db_manager.release_picture(picture_id) is False
+    assert await db_manager.get_picture(picture_id) is not None
+    assert await db_manager.release_picture(picture_id) is True
+    assert await db_manager.get_picture(picture_id) is None
+    assert await db_manager.release_picture(picture_id) is False
+
+
 async def test_delete_expired_pictures(db_manager):
     """Test that only expired pictures are deleted and their filepaths returned."""
     past_date = datetime.now(tz=timezone.utc) - timedelta(days=1)
@@ -221,6 +307,151 @@ async def test_foodshare_restrictions(db_manager):
     assert "Vegan" in foodshare.restrictions
 
 
+async def test_add_foodshare_restrictions(db_manager):
+    """Test linking several restrictions at once, creating only the missing ones."""
+    fs_id = await db_manager.add_foodshare("Bagels", "Lobby", datetime.now(tz=timezone.utc) + timedelta(hours=1), True)
+    existing_id = await db_manager.get_or_create_restriction("Vegan")
+
+    await db_manager.add_foodshare_restrictions(fs_id, ["Vegan", "Nut-Free", "Vegan"])
+    await db_manager.add_foodshare_restrictions(fs_id, ["Nut-Free"])
+
+    foodshare = await db_manager.get_foodshare(fs_id)
+    assert sorted(foodshare.restrictions) == ["Nut-Free", "Vegan"]
+    assert await db_manager.get_or_create_restriction("Vegan") == existing_id
+    async with db_manager.conn.execute("SELECT COUNT(*) FROM restrictions") as cursor:
+        assert (await cursor.fetchone())[0] == 2
+
+
+async def test_restriction_labels_are_normalized(db_manager):
+    """Test that labels differing only in case or spacing share one restriction."""
+    fs_id = await db_manager.add_foodshare("Bagels", "Lobby", datetime.now(tz=timezone.utc) + timedelta(hours=1), True)
+
+    await db_manager.add_foodshare_restrictions(fs_id, ["  Gluten   Free ", "vegan", "VEGAN", " "])
+    await db_manager.add_restriction_to_foodshare_by_name(fs_id, "gluten free")
+
+    foodshare = await db_manager.get_foodshare(fs_id)
+    assert sorted(foodshare.restrictions) == ["Gluten Free", "vegan"]
+    assert await db_manager.get_or_create_restriction("Vegan ") == await db_manager.get_or_create_restriction("vegan")
+    assert await db_manager.get_or_create_restriction("  ") is None
+    async with db_manager.conn.execute("SELECT COUNT(*) FROM restrictions") as cursor:
+        assert (await cursor.fetchone())[0] == 2
+
+
+async def test_known_restrictions_skip_lookups(db_manager):
+    """Test that linking cached restrictions only writes the links, and new ones are cached on insert."""
+    ends = datetime.now(tz=timezone.utc) + timedelta(hours=1)
+    fs_id = await db_manager.add_foodshare("Bagels", "Lobby", ends, True)
+    await db_manager.add_foodshare_restrictions(fs_id, ["Vegan", "Halal"])
+    assert db_manager.restrictions.get_id("vegan") is not None
+
+    statements = []
+    await db_manager.conn.set_trace_callback(statements.append)
+    other_id = await db_manager.add_foodshare("Wraps", "Lobby", ends, True)
+    await db_manager.add_foodshare_restrictions(other_id, ["Halal", "Vegan"])
+    await db_manager.conn.set_trace_callback(None)
+
+    assert not [statement for statement in statements if "restrictions (label)" in statement or "SELECT" in statement]
+    assert sorted((await db_manager.get_foodshare(other_id)).restrictions) == ["Halal", "Vegan"]
+
+
+async def test_restriction_cache_reloads_unknown_ids(tmp_path):
+    """Test that restrictions created by another worker process are picked up by writes and feed loads."""
+    db_path = str(tmp_path / "shared.sqlite")
+    first, second = DatabaseManager(db_path), DatabaseManager(db_path)
+    for db in (first, second):
+        await db.connect()
+        await db.init_tables()
+    try:
+        ends = datetime.now(tz=timezone.utc) + timedelta(hours=1)
+        fs_id = await second.add_foodshare("Bagels", "Lobby", ends, True)
+        await second.add_foodshare_restrictions(fs_id, ["Kosher"])
+
+        # The first manager has never seen 'Kosher', in either direction
+        assert (await first.get_foodshare(fs_id)).restrictions == ["Kosher"]
+        assert await first.get_or_create_restriction("kosher") == second.restrictions.get_id("Kosher")
+    finally:
+        await first.close()
+        await second.close()
+
+
+async def test_new_restrictions_survive_cache_reload(db_manager):
+    """Test that restrictions created in a unit of work are linked even if the cache is reloaded meanwhile."""
+    fs_id = await db_manager.add_foodshare("Bagels", "Lobby", datetime.now(tz=timezone.utc) + timedelta(hours=1), True)
+
+    def reload_cache(statement):
+        # What a pooled reader reloading the cache sees: only committed restrictions, of which there are none
+        if "INSERT INTO restrictions" in statement:
+            db_manager.restrictions.clear()
+
+    await db_manager.conn.set_trace_callback(reload_cache)
+    await db_manager.add_foodshare_restrictions(fs_id, ["Vegan", "Halal"])
+    await db_manager.conn.set_trace_callback(None)
+
+    assert sorted((await db_manager.get_foodshare(fs_id)).restrictions) == ["Halal", "Vegan"]
+
+
+async def test_transaction_rolls_back_on_error(db_manager):
+    """Test that writer methods inside a failed unit of work leave nothing behind."""
+    version = db_manager.feed_version
+    ends = datetime.now(tz=timezone.utc) + timedelta(hours=1)
+
+    with pytest.raises(RuntimeError):
+        async with db_manager.transaction():
+            fs_id = await db_manager.add_foodshare("Bagels", "Lobby", ends, True)
+            await db_manager.add_foodshare_restrictions(fs_id, ["Vegan"])
+            raise RuntimeError("boom")
+
+    assert await db_manager.get_foodshare(fs_id) is None
+    async with db_manager.conn.execute("SELECT COUNT(*) FROM restrictions") as cursor:
+        assert (await cursor.fetchone())[0] == 0
+    # A rollback moves the feed version too, in case the rolled-back rows were read
+    assert db_manager.feed_version == version + 1
+
+    async with db_manager.transaction():
+        fs_id = await db_manager.add_foodshare("Bagels", "Lobby", ends, True)
+        await db_manager.add_foodshare_restrictions(fs_id, ["Vegan"])
+        # The feed version only moves once the unit of work commits
+        assert db_manager.feed_version == version + 1
+    assert db_manager.feed_version == version + 2
+    assert (await db_manager.get_foodshare(fs_id)).restrictions == ["Vegan"]
+
+
+async def test_transaction_blocks_other_writers(db_manager):
+    """Test that a writer in another task waits for an open unit of work instead of committing it halfway."""
+    ends = datetime.now(tz=timezone.utc) + timedelta(hours=1)
+    other_writer = None
+
+    with pytest.raises(RuntimeError):
+        async with db_manager.transaction():
+            await db_manager.add_foodshare("Bagels", "Lobby", ends, True)
+            other_writer = asyncio.create_task(db_manager.add_survey(3, 5, "Tasty"))
+            await asyncio.sleep(0.01)
+            assert not other_writer.done()
+            raise RuntimeError("boom")
+
+    survey_id = await other_writer
+    assert await db_manager.get_survey(survey_id)
+    assert await db_manager.get_all_active_foodshares() == []
+
+
+async def test_reads_wait_for_unit_of_work_without_pool(db_manager):
+    """Test that with the read pool off, other tasks cannot read a unit of work's uncommitted rows."""
+    ends = datetime.now(tz=timezone.utc) + timedelta(hours=1)
+    reader = None
+
+    with pytest.raises(RuntimeError):
+        async with db_manager.transaction():
+            await db_manager.add_foodshare("Bagels", "Lobby", ends, True)
+            # The owner of the unit of work reads its own writes
+            assert len(await db_manager.get_all_active_foodshares()) == 1
+            reader = asyncio.create_task(db_manager.get_all_active_foodshares())
+            await asyncio.sleep(0.01)
+            assert not reader.done()
+            raise RuntimeError("boom")
+
+    assert await reader == []
+
+
 async def test_get_all_active_foodshares(db_manager):
     """Test retrieving only the active foodshares."""
     ends_date = datetime.now(tz=timezone.utc) + timedelta(hours=1)
@@ -239,6 +470,150 @@ async def test_get_all_active_foodshares(db_manager):
     assert "Inactive" not in names
 
 
+async def test_get_all_active_foodshares_single_query(db_manager):
+    """Test that the feed loads creators, pictures and restrictions in one statement."""
+    ends_date = datetime.now(tz=timezone.utc) + timedelta(hours=1)
+    user_id = await db_manager.add_user("feed@maine.edu")
+    pic_id = await db_manager.add_picture(ends_date, "/images/feed.webp", "image/webp")
+
+    for i in range(5):
+        fs_id = await db_manager.add_foodshare(f"Share {i}", "Union", ends_date, True, user_id, pic_id)
+        await db_manager.add_restriction_to_foodshare_by_name(fs_id, "Vegan")
+        await db_manager.add_restriction_to_foodshare_by_name(fs_id, "Nut-Free, Soy-Free")
+
+    statements = []
+    await db_manager.conn.set_trace_callback(statements.append)
+    active_shares = await db_manager.get_all_active_foodshares()
+    await db_manager.conn.set_trace_callback(None)
+
+    assert len(statements) == 1
+    assert len(active_shares) == 5
+    for fs in active_shares:
+        assert fs.creator.email == "feed@maine.edu"
+        assert fs.picture.filepath == "/images/feed.webp"
+        assert sorted(fs.restrictions) == ["Nut-Free, Soy-Free", "Vegan"]
+
+
+async def test_active_feed_uses_partial_index(db_manager):
+    """Test that the feed, expiry and cleanup queries read the partial index of active foodshares."""
+    ends = datetime.now(tz=timezone.utc) + timedelta(hours=1)
+    await db_manager.add_foodshare("Bagels", "Lobby", ends, True)
+
+    statements = []
+    await db_manager.conn.set_trace_callback(statements.append)
+    await db_manager.get_all_active_foodshares()
+    await db_manager.get_foodshare_changes(0, datetime.now(tz=timezone.utc) - timedelta(minutes=5))
+    await db_manager.deactivate_ended_foodshares(limit=10)
+    await db_manager.conn.set_trace_callback(None)
+
+    feed = next(statement for statement in statements if "datetime(f.ends) > datetime('now')" in statement)
+    expired = next(statement for statement in statements if "datetime(ends) <= '" in statement)
+    cleanup = next(statement for statement in statements if statement.lstrip().startswith("UPDATE foodshares"))
+    for statement in (feed, expired, cleanup):
+        async with db_manager.conn.execute(f"EXPLAIN QUERY PLAN {statement}") as cursor:
+            plan = [row["detail"] for row in await cursor.fetchall()]
+        assert any("USING INDEX idx_foodshares_active_ends_utc" in step for step in plan), plan
+        # No full table scan of foodshares
+        assert not [step for step in plan if step in ("SCAN f", "SCAN foodshares")], plan
+
+
+async def test_get_active_foodshares_by_restrictions(db_manager):
+    """Test filtering the feed by restriction labels with any and all matching."""
+    ends = datetime.now(tz=timezone.utc) + timedelta(hours=1)
+    ids = {}
+    for name, labels in [
+        ("Salad", ["Vegan", "Gluten-Free"]),
+        ("Curry", ["Vegan"]),
+        ("Bread", ["Nut-Free"]),
+        ("Pie", []),
+    ]:
+        ids[name] = await db_manager.add_foodshare(name, "Union", ends, True)
+        await db_manager.add_foodshare_restrictions(ids[name], labels)
+    closed_id = await db_manager.add_foodshare("Closed Salad", "Union", ends, False)
+    await db_manager.add_foodshare_restrictions(closed_id, ["Vegan"])
+
+    async def names(labels, match_all=False):
+        return sorted(f.name for f in await db_manager.get_all_active_foodshares(labels, match_all=match_all))
+
+    assert await names(["vegan"]) == ["Curry", "Salad"]
+    assert await names(["Vegan", "Nut-Free"]) == ["Bread", "Curry", "Salad"]
+    assert await names(["Vegan", "Gluten-Free"], match_all=True) == ["Salad"]
+    assert await names(["Vegan", "VEGAN "], match_all=True) == ["Curry", "Salad"]
+    # Unknown labels match nothing, so they never satisfy 'all'
+    assert await names(["Vegan", "Halal"]) == ["Curry", "Salad"]
+    assert await names(["Vegan", "Halal"], match_all=True) == []
+    assert await names(["Halal"]) == []
+    # The filtered feed still loads every label of a matching foodshare
+    salad = (await db_manager.get_all_active_foodshares(["Gluten-Free"]))[0]
+    assert sorted(salad.restrictions) == ["Gluten-Free", "Vegan"]
+
+
+async def test_active_foodshares_page_keyset(db_manager):
+    """Test paging the feed in both orders without gaps or repeats, even as foodshares are added."""
+    now = datetime.now(tz=timezone.utc)
+    ids = []
+    # Two foodshares end together, so ties are broken by ID
+    for hours in (3, 1, 2, 2, 5):
+        ids.append(await db_manager.add_foodshare(f"Ends in {hours}h", "Union", now + timedelta(hours=hours), True))
+    await db_manager.add_foodshare("Closed", "Union", now + timedelta(hours=1), False)
+    await db_manager.add_foodshare_restrictions(ids[0], ["Vegan"])
+    await db_manager.add_foodshare_restrictions(ids[2], ["Vegan"])
+
+    async def collect(sort, **kwargs):
+        seen, after = [], None
+        while True:
+            page = await db_manager.get_active_foodshares_page(sort, limit=2, after=after, **kwargs)
+            assert len(page.foodshares) <= 2
+            seen += [f.foodshare_id for f in page.foodshares]
+            if page.next_key is None:
+                return seen
+            after = page.next_key
+            # Added mid-pagination: ends last, so the 'ending' walk still reaches it
+            if len(seen) == 2:
+                ids.append(await db_manager.add_foodshare("Late", "Union", now + timedelta(hours=9), True))
+
+    assert await collect("ending") == [ids[1], ids[2], ids[3], ids[0], ids[4], ids[5]]
+    # Added after the first page, so newer than every key still to come
+    assert await collect("newest") == [ids[5], ids[4], ids[3], ids[2], ids[1], ids[0]]
+    assert len(ids) == 7
+    assert await collect("ending", restrictions=["vegan"]) == [ids[2], ids[0]]
+    assert (await db_manager.get_active_foodshares_page(restrictions=["Halal"])).foodshares == []
+
+    with pytest.raises(ValueError):
+        await db_manager.get_active_foodshares_page("oldest")
+
+
+async def test_active_foodshares_page_uses_partial_index(db_manager):
+    """Test that pages in both orders are picked from the partial index rather than a table scan."""
+    ends = datetime.now(tz=timezone.utc) + timedelta(hours=1)
+    fs_id = await db_manager.add_foodshare("Bagels", "Lobby", ends, True)
+
+    for sort, after in [("ending", ["2000-01-01", 0]), ("newest", [fs_id + 1])]:
+        statements = []
+        await db_manager.conn.set_trace_callback(statements.append)
+        page = await db_manager.get_active_foodshares_page(sort, limit=5, after=after)
+        await db_manager.conn.set_trace_callback(None)
+        assert [f.foodshare_id for f in page.foodshares] == [fs_id]
+
+        statement = next(statement for statement in statements if "ORDER BY" in statement)
+        async with db_manager.conn.execute(f"EXPLAIN QUERY PLAN {statement}") as cursor:
+            plan = [row["detail"] for row in await cursor.fetchall()]
+        assert any("USING INDEX idx_foodshares_active_ends_utc" in step for step in plan), plan
+        assert not [step for step in plan if step in ("SCAN f", "SCAN foodshares")], plan
+
+
+async def test_restriction_filter_uses_covering_index(db_manager):
+    """Test that the restriction filter is answered from the covering index rather than a scan."""
+    query = """
+        SELECT foodshare_id FROM foodshare_restrictions
+        WHERE restriction_id IN (?, ?)
+        GROUP BY foodshare_id HAVING COUNT(*) = 2
+    """
+    async with db_manager.conn.execute(f"EXPLAIN QUERY PLAN {query}", (1, 2)) as cursor:
+        plan = " ".join(row["detail"] for row in await cursor.fetchall())
+    assert "USING COVERING INDEX idx_foodshare_restrictions_restriction" in plan
+
+
 async def test_deactivate_foodshare(db_manager):
     """Test setting a foodshare to inactive."""
     fs_id = await db_manager.add_foodshare(
@@ -250,7 +625,8 @@ async def test_deactivate_foodshare(db_manager):
     assert fs_before.active is True
 
     # Deactivate
-    await db_manager.deactivate_foodshare(fs_id)
+    assert await db_manager.deactivate_foodshare(fs_id) == fs_id
+    assert await db_manager.deactivate_foodshare(fs_id + 1) is None
 
     # Verify inactive
     fs_after = await db_manager.get_foodshare(fs_id)
@@ -297,6 +673,26 @@ async def test_get_all_surveys(db_manager):
     assert any(s.other_thoughts == "Okay" for s in surveys)
 
 
+async def test_get_all_surveys_batches_foodshares(db_manager):
+    """Test that surveys sharing a foodshare are loaded with one batched foodshare query."""
+    ends = datetime.now(tz=timezone.utc) + timedelta(hours=1)
+    fs_a = await db_manager.add_foodshare("Survey A", "Loc A", ends, True)
+    fs_b = await db_manager.add_foodshare("Survey B", "Loc B", ends, True)
+    for fs_id in (fs_a, fs_a, fs_b, None):
+        await db_manager.add_survey(1, 5, "Fine", fs_id)
+
+    statements = []
+    await db_manager.conn.set_trace_callback(statements.append)
+    surveys = await db_manager.get_all_surveys()
+    await db_manager.conn.set_trace_callback(None)
+
+    assert len(statements) == 2
+    assert [s.foodshare.name if s.foodshare else None for s in surveys] == ["Survey A", "Survey A", "Survey B", None]
+
+    page = await db_manager.get_all_surveys(limit=2, after_id=surveys[0].survey_id)
+    assert [s.survey_id for s in page] == [surveys[1].survey_id, surveys[2].survey_id]
+
+
 ### F. Authentication & Sessions (OTPs and Device Tokens) ###
 
 
@@ -384,3 +780,227 @@ async def test_update_token_usage(db_manager):
         success = False
 
     assert success is True
+
+
+async def test_token_usage_is_buffered_until_flush(db_manager):
+    """Test that token usage is held in memory and written in one batch on flush."""
+    user_id = await db_manager.add_user("buffered@maine.edu")
+    for token_hash in ("hash_a", "hash_b"):
+        await db_manager.create_device_token(user_id, token_hash)
+    stale = (datetime.now() - timedelta(days=29)).isoformat()
+    await db_manager.conn.execute("UPDATE device_tokens SET last_used = ?", (stale,))
+    await db_manager.conn.commit()
+
+    await db_manager.update_token_usage("hash_a")
+    await db_manager.update_token_usage("hash_b")
+    await db_manager.update_token_usage("hash_a")
+
+    # Nothing written yet, but the session already reflects the buffered timestamp
+    async with db_manager.conn.execute("SELECT last_used FROM device_tokens WHERE token_hash = 'hash_a'") as cursor:
+        assert (await cursor.fetchone())["last_used"] == stale
+    session = await db_manager.get_session_by_token("hash_a")
+    assert datetime.now(tz=timezone.utc).replace(tzinfo=None) - session.last_used < timedelta(minutes=1)
+
+    assert await db_manager.flush_token_usage() == 2
+    assert await db_manager.flush_token_usage() == 0
+
+    async with db_manager.conn.execute("SELECT last_used FROM device_tokens") as cursor:
+        rows = await cursor.fetchall()
+    assert all(row["last_used"] != stale for row in rows)
+
+
+async def test_close_flushes_token_usage(tmp_path):
+    """Test that buffered token usage is persisted when the manager is closed."""
+    db_path = str(tmp_path / "flush.sqlite")
+    manager = DatabaseManager(db_path)
+    await manager.connect()
+    await manager.init_tables()
+    user_id = await manager.add_user("close_flush@maine.edu")
+    await manager.create_device_token(user_id, "close_hash")
+    await manager.conn.execute("UPDATE device_tokens SET last_used = '2000-01-01 00:00:00'")
+    await manager.conn.commit()
+
+    manager.start_token_usage_flusher(interval=3600)
+    await manager.update_token_usage("close_hash")
+    await manager.close()
+
+    reopened = DatabaseManager(db_path)
+    await reopened.connect()
+    session = await reopened.get_session_by_token("close_hash")
+    await reopened.close()
+    assert session.last_used.year > 2000
+
+
+async def test_foodshare_changes_log(db_manager):
+    """Test that writes to foodshares are recorded in the change log and collapsed per foodshare."""
+    ends = datetime.now(timezone.utc) + timedelta(hours=1)
+    start = await db_manager.get_latest_change_id()
+    since = datetime.now(timezone.utc)
+
+    fs_id = await db_manager.add_foodshare("Logged Pizza", "Union", ends, True)
+    await db_manager.add_restriction_to_foodshare_by_name(fs_id, "Vegan")
+    assert await db_manager.get_latest_change_id() == start + 2
+
+    result = await db_manager.get_foodshare_changes(start, since)
+    assert result is not None
+    assert [(c.foodshare_id, c.change) for c in result.changes] == [(fs_id, "created")]
+    assert result.changes[0].foodshare.restrictions == ["Vegan"]
+    assert result.last_change_id == start + 2
+
+    await db_manager.deactivate_foodshare(fs_id)
+    result = await db_manager.get_foodshare_changes(result.last_change_id, result.as_of)
+    assert [(c.foodshare_id, c.change, c.foodshare) for c in result.changes] == [(fs_id, "closed", None)]
+
+
+async def test_get_foodshare_changes_expired_after_cleanup(db_manager):
+    """Test that a foodshare deactivated by cleanup is still reported as expired, not closed."""
+    now = datetime.now(tz=timezone.utc)
+    since = now - timedelta(hours=1)
+    since_change_id = await db_manager.get_latest_change_id()
+    ended_id = await db_manager.add_foodshare("Ended", "Union", now - timedelta(minutes=5), True)
+    closed_id = await db_manager.add_foodshare("Closed", "Union", now + timedelta(hours=1), True)
+    await db_manager.deactivate_foodshare(closed_id)
+
+    before = await db_manager.get_foodshare_changes(since_change_id, since)
+    assert await db_manager.deactivate_ended_foodshares(limit=10) == [ended_id]
+    after = await db_manager.get_foodshare_changes(since_change_id, since)
+
+    for result in (before, after):
+        assert {(c.foodshare_id, c.change) for c in result.changes} == {(ended_id, "expired"), (closed_id, "closed")}
+
+
+async def test_changes_cursor_round_trip():
+    """Test encoding and decoding of delta sync cursors."""
+    as_of = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    assert decode_changes_cursor(encode_changes_cursor(42, as_of)) == (42, as_of)
+
+    for bad in ("", "42", "a-b", "-1-5", "1-2-3", "1-99999999999999999999999", f"{2**63}-5"):
+        with pytest.raises(ValueError):
+            decode_changes_cursor(bad)
+
+
+### H. Cleanup ###
+
+
+async def test_delete_expired_pictures_limit(db_manager):
+    """Test that expired pictures are deleted at most `limit` at a time."""
+    past_date = datetime.now(tz=timezone.utc) - timedelta(days=1)
+    for i in range(3):
+        await db_manager.add_picture(past_date, f"/images/old{i}.webp", "image/webp")
+
+    assert await db_manager.delete_expired_pictures(limit=2) == ["/images/old0.webp", "/images/old1.webp"]
+    assert await db_manager.delete_expired_pictures(limit=2) == ["/images/old2.webp"]
+    assert await db_manager.delete_expired_pictures(limit=2) == []
+
+
+async def test_deactivate_ended_foodshares(db_manager):
+    """Test that ended foodshares are deactivated in batches, comparing end times as datetimes."""
+    now = datetime.now(tz=timezone.utc)
+    # ISO timestamps later the same day would compare as not ended against CURRENT_TIMESTAMP as strings
+    ended_ids = [
+        await db_manager.add_foodshare(f"Ended {i}", "Union", now - timedelta(minutes=i + 1), True) for i in range(3)
+    ]
+    live_id = await db_manager.add_foodshare("Live", "Union", now + timedelta(hours=1), True)
+    closed_id = await db_manager.add_foodshare("Closed", "Union", now - timedelta(hours=1), False)
+
+    first = await db_manager.deactivate_ended_foodshares(limit=2)
+    second = await db_manager.deactivate_ended_foodshares(limit=2)
+    assert len(first) == 2
+    assert sorted(first + second) == ended_ids
+    assert await db_manager.deactivate_ended_foodshares(limit=2) == []
+
+    assert (await db_manager.get_foodshare(live_id)).active is True
+    assert closed_id not in first + second
+
+    recent_id = await db_manager.add_foodshare("Recent", "Union", now - timedelta(seconds=30), True)
+    assert await db_manager.deactivate_ended_foodshares(limit=2, grace=timedelta(minutes=1)) == []
+    assert await db_manager.deactivate_ended_foodshares(limit=2) == [recent_id]
+
+
+async def test_delete_expired_otps(db_manager):
+    """Test that only expired OTP codes are pruned, up to the limit."""
+    now = datetime.now(tz=timezone.utc)
+    for i in range(3):
+        await db_manager.save_otp(OTPRecord(f"old{i}@maine.edu", "111111", now - timedelta(minutes=1)))
+    await db_manager.save_otp(OTPRecord("new@maine.edu", "222222", now + timedelta(minutes=10)))
+
+    assert await db_manager.delete_expired_otps(limit=2) == 2
+    assert await db_manager.delete_expired_otps(limit=2) == 1
+    assert await db_manager.delete_expired_otps(limit=2) == 0
+    assert await db_manager.get_otp("new@maine.edu") is not None
+
+
+async def test_delete_stale_device_tokens(db_manager):
+    """Test that idle tokens are pruned, except those with unflushed usage, and dropped from the session cache."""
+    user_id = await db_manager.add_user("stale@maine.edu")
+    for token_hash in ("stale_a", "stale_b", "fresh"):
+        await db_manager.create_device_token(user_id, token_hash)
+    await db_manager.conn.execute(
+        "UPDATE device_tokens SET last_used = '2000-01-01 00:00:00' WHERE token_hash LIKE 'stale%'"
+    )
+    await db_manager.conn.commit()
+    await db_manager.update_token_usage("stale_b")
+    session = await db_manager.get_session_by_token("stale_a")
+    user = await db_manager.get_user(user_id)
+    db_manager.session_cache.put("stale_a", session, user, db_manager.session_cache.generation)
+
+    assert await db_manager.delete_stale_device_tokens(timedelta(days=31), limit=10) == 1
+    assert await db_manager.get_session_by_token("stale_a") is None
+    assert db_manager.session_cache.get("stale_a") is None
+    assert await db_manager.get_session_by_token("stale_b") is not None
+    assert await db_manager.get_session_by_token("fresh") is not None
+
+
+async def test_prune_foodshare_changes(db_manager):
+    """Test that old change log entries are pruned oldest first, up to the limit, keeping the newest."""
+    ends = datetime.now(tz=timezone.utc) + timedelta(hours=1)
+    for i in range(4):
+        await db_manager.add_foodshare(f"Share {i}", "Union", ends, True)
+    await db_manager.conn.execute("UPDATE foodshare_changes SET changed_at = '2000-01-01 00:00:00'")
+    await db_manager.conn.commit()
+    fresh_id = await db_manager.add_foodshare("Fresh", "Union", ends, True)
+    latest = await db_manager.get_latest_change_id()
+
+    assert await db_manager.prune_foodshare_changes(timedelta(days=7), limit=3) == 3
+    assert await db_manager.prune_foodshare_changes(timedelta(days=7), limit=3) == 1
+    assert await db_manager.prune_foodshare_changes(timedelta(days=7), limit=3) == 0
+    async with db_manager.conn.execute("SELECT change_id, foodshare_id FROM foodshare_changes") as cursor:
+        assert [tuple(row) for row in await cursor.fetchall()] == [(latest, fresh_id)]
+
+    # The newest entry survives even once it is old, so a pruned cursor is still detected
+    await db_manager.conn.execute("UPDATE foodshare_changes SET changed_at = '2000-01-01 00:00:00'")
+    await db_manager.conn.commit()
+    assert await db_manager.prune_foodshare_changes(timedelta(days=7), limit=3) == 0
+    assert await db_manager.get_foodshare_changes(0, datetime.now(tz=timezone.utc)) is None
+
+
+async def test_acquire_lease(db_manager):
+    """Test that a lease has one holder at a time, is renewable, and can be taken once lapsed or released."""
+    assert await db_manager.acquire_lease("job", "worker-a", ttl=60) is True
+    assert await db_manager.acquire_lease("job", "worker-b", ttl=60) is False
+    assert await db_manager.acquire_lease("job", "worker-a", ttl=60) is True
+
+    await db_manager.release_lease("job", "worker-b")
+    assert await db_manager.acquire_lease("job", "worker-b", ttl=60) is False
+    await db_manager.release_lease("job", "worker-a")
+    assert await db_manager.acquire_lease("job", "worker-b", ttl=-1) is True
+    # worker-b's lease has lapsed
+    assert await db_manager.acquire_lease("job", "worker-a", ttl=60) is True
+
+
+async def test_iter_expired_pictures_chunks(db_manager):
+    """Test that expired pictures are deleted one committed chunk at a time."""
+    past_date = datetime.now(tz=timezone.utc) - timedelta(days=1)
+    for i in range(5):
+        await db_manager.add_picture(past_date, f"/images/old{i}.webp", "image/webp", {160: f"/images/old{i}-160.webp"})
+
+    chunks = db_manager.iter_expired_pictures(chunk_size=2)
+    first = await anext(chunks)
+    assert sorted(first) == ["/images/old0-160.webp", "/images/old0.webp", "/images/old1-160.webp", "/images/old1.webp"]
+    # The chunk is already committed; stopping here leaves the rest for later
+    await chunks.aclose()
+    async with db_manager.conn.execute("SELECT COUNT(*) FROM pictures") as cursor:
+        assert (await cursor.fetchone())[0] == 3
+
+    remaining = [chunk async for chunk in db_manager.iter_expired_pictures(chunk_size=2)]
+    assert [len(chunk) for chunk in remaining] == [4, 2]
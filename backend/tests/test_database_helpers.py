@@ -9,9 +9,14 @@ from src.database_helpers import (
     PictureMetadata,
     Survey,
     User,
+    decode_feed_cursor,
+    encode_feed_cursor,
     generate_secure_token,
     hash_token,
+    normalize_label,
+    restriction_key,
     sanitize_string,
+    sqlite_datetime,
     validate_datetime_format,
     validate_email_format,
 )
@@ -123,6 +128,21 @@ class TestUtilityFunctions:
     def test_sanitize_string_valid(self, input_str, expected):
         assert sanitize_string(input_str) == expected
 
+    @pytest.mark.parametrize(
+        "label, expected",
+        [
+            ("Vegan", "Vegan"),
+            ("  Nut-Free ", "Nut-Free"),  # Strip whitespace
+            ("Gluten \t  Free", "Gluten Free"),  # Collapse inner whitespace
+        ],
+    )
+    def test_normalize_label(self, label, expected):
+        assert normalize_label(label) == expected
+
+    def test_restriction_key_ignores_case_and_spacing(self):
+        assert restriction_key(" VEGAN ") == restriction_key("vegan") == "vegan"
+        assert restriction_key("Gluten  Free") == restriction_key("gluten free")
+
     @pytest.mark.parametrize(
         "date_input", ["2023-10-25T12:00:00", "2023-10-25T12:00:00+00:00", "2023-10-25", datetime.now()]
     )
@@ -166,3 +186,24 @@ class TestUtilityFunctions:
         # Make sure no standard base64 unsafe characters are present
         assert "+" not in token
         assert "/" not in token
+
+    @pytest.mark.parametrize(
+        "value",
+        ["2026-10-17T10:35:23.594345+02:00", "2026-10-17 08:35:23", "2026-10-17T08:35:23.5+00:00"],
+    )
+    def test_sqlite_datetime_normalizes_to_utc(self, value):
+        assert sqlite_datetime(value) == "2026-10-17 08:35:23"
+
+    def test_feed_cursor_round_trip(self):
+        for sort, key in [("ending", ["2026-01-01 10:00:00", 7]), ("newest", [42])]:
+            cursor = encode_feed_cursor(sort, key)
+            assert "=" not in cursor
+            assert decode_feed_cursor(cursor) == (sort, key)
+
+    @pytest.mark.parametrize(
+        "cursor",
+        ["", "not a cursor", encode_feed_cursor("oldest", [1]), encode_feed_cursor("ending", [3]), "bnVsbA"],
+    )
+    def test_decode_feed_cursor_invalid(self, cursor):
+        with pytest.raises(ValueError):
+            decode_feed_cursor(cursor)
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from src.events import EventHub, FoodshareEvent
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_event_hub_broadcast():
+    """Verify that a published event reaches every subscriber."""
+    hub = EventHub()
+    first, second = hub.subscribe(), hub.subscribe()
+    event = FoodshareEvent("closed", 7)
+    hub.publish(event)
+
+    assert await first.next_event(1) is event
+    assert await second.next_event(1) is event
+    assert event.message == b'event: closed\ndata: {"foodshare_id": 7}\n\n'
+
+
+async def test_event_hub_heartbeat_timeout():
+    """Verify that waiting on an idle subscriber times out instead of blocking."""
+    hub = EventHub()
+    subscriber = hub.subscribe()
+    assert await subscriber.next_event(0.01) is None
+
+
+async def test_event_hub_evicts_slow_subscriber():
+    """Verify that a subscriber whose queue is full is evicted without affecting others."""
+    hub = EventHub(queue_size=2)
+    slow, fast = hub.subscribe(), hub.subscribe()
+    for foodshare_id in range(3):
+        hub.publish(FoodshareEvent("closed", foodshare_id))
+        await fast.next_event(1)
+
+    assert slow.evicted
+    assert not fast.evicted
+    assert len(hub) == 1
+    with pytest.raises(EOFError):
+        await slow.next_event(1)
+
+
+async def test_event_hub_close():
+    """Verify that closing the hub disconnects every subscriber."""
+    hub = EventHub()
+    subscriber = hub.subscribe()
+    hub.publish(FoodshareEvent("created", 1, {"name": "Pizza"}))
+    hub.close()
+
+    assert len(hub) == 0
+    with pytest.raises(EOFError):
+        await subscriber.next_event(1)
+
+
+async def test_foodshare_event_payload():
+    """Verify that event data is merged into the JSON payload."""
+    event = FoodshareEvent("created", 3, {"name": "Pizza"})
+    event_line, data_line, _, _ = event.message.decode().split("\n")
+    assert event_line == "event: created"
+    assert json.loads(data_line.removeprefix("data: ")) == {"foodshare_id": 3, "name": "Pizza"}
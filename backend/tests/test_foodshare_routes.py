@@ -1,10 +1,17 @@
+import asyncio
+import gzip
 import io
+import json
+import struct
+import zlib
 from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
 
 import pytest
 from PIL import Image
 
 from src.app import app as quart_app
+from src.database_helpers import encode_changes_cursor
 
 pytestmark = pytest.mark.asyncio
 
@@ -45,6 +52,7 @@ async def test_create_foodshare_success(authenticated_client):
     assert res_json["name"] == "Free Pizza"
     assert "foodshare_id" in res_json
     assert res_json["active"] is True
+    assert [r["size"] for r in res_json["picture"]["renditions"]] == [160, 400, 800]
 
 
 async def test_get_foodshares_active_filtering(authenticated_client, admin_client):
@@ -106,6 +114,97 @@ async def test_get_foodshares_active_filtering(authenticated_client, admin_clien
     assert res_json[0]["name"] == "Active Pizza"
 
 
+async def test_get_foodshares_database_error_is_json(authenticated_client):
+    """Verify that a failure loading the cached feed is reported as a JSON error."""
+    db = quart_app.storage.db
+    db.feed_version += 1  # make sure the feed is rebuilt rather than served from the cache
+    with patch.object(db, "get_all_active_foodshares", side_effect=RuntimeError("disk I/O error")):
+        response = await authenticated_client.get("/foodshares")
+
+    assert response.status_code == 500
+    assert "error" in await response.get_json()
+
+
+async def test_get_foodshares_filtered_by_restrictions(authenticated_client):
+    """Verify that GET /foodshares filters by restrictions with any/all matching and leaves the full feed alone."""
+    db = quart_app.storage.db
+    ends = datetime.now(timezone.utc) + timedelta(hours=2)
+    for name, labels in [("Salad", ["Vegan", "Gluten-Free"]), ("Curry", ["Vegan"]), ("Bread", ["Nut-Free"])]:
+        fs_id = await db.add_foodshare(name, "Union", ends, True)
+        await db.add_foodshare_restrictions(fs_id, labels)
+
+    async def names(query: str) -> list[str]:
+        response = await authenticated_client.get(f"/foodshares?{query}")
+        assert response.status_code == 200
+        return sorted(f["name"] for f in await response.get_json())
+
+    assert await names("restrictions=Vegan,Nut-Free") == ["Bread", "Curry", "Salad"]
+    assert await names("restrictions=vegan&match=any") == ["Curry", "Salad"]
+    assert await names("restrictions=Vegan,%20Gluten-Free&match=all") == ["Salad"]
+    # An empty filter is the whole feed
+    assert await names("restrictions=") == ["Bread", "Curry", "Salad"]
+
+    response = await authenticated_client.get("/foodshares?restrictions=Vegan&match=some")
+    assert response.status_code == 400
+
+
+async def test_get_foodshares_paginated(authenticated_client):
+    """Verify that GET /foodshares pages the feed with a cursor when asked and returns a plain list otherwise."""
+    db = quart_app.storage.db
+    now = datetime.now(timezone.utc)
+    for name, hours in [("Soup", 3), ("Bagels", 1), ("Pizza", 2)]:
+        fs_id = await db.add_foodshare(name, "Union", now + timedelta(hours=hours), True)
+        await db.add_foodshare_restrictions(fs_id, ["Vegan"] if name != "Pizza" else [])
+
+    async def walk(query: str) -> list[str]:
+        names, cursor = [], None
+        while True:
+            page_query = f"{query}&cursor={cursor}" if cursor else query
+            response = await authenticated_client.get(f"/foodshares?{page_query}")
+            assert response.status_code == 200
+            body = await response.get_json()
+            assert len(body["foodshares"]) <= 2
+            names += [f["name"] for f in body["foodshares"]]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return names
+
+    assert await walk("limit=2") == ["Bagels", "Pizza", "Soup"]
+    assert await walk("limit=2&sort=newest") == ["Pizza", "Bagels", "Soup"]
+    assert await walk("limit=2&restrictions=vegan") == ["Bagels", "Soup"]
+
+    # Without paging parameters the response is still the whole feed as a list
+    response = await authenticated_client.get("/foodshares")
+    assert len(await response.get_json()) == 3
+
+    first = await (await authenticated_client.get("/foodshares?limit=1&sort=newest")).get_json()
+    for query in [
+        "limit=0",
+        "limit=abc",
+        "sort=oldest",
+        "cursor=garbage",
+        f"sort=ending&cursor={first['next_cursor']}",
+    ]:
+        response = await authenticated_client.get(f"/foodshares?{query}")
+        assert response.status_code == 400, query
+
+
+async def test_close_foodshare_reports_closed_id(authenticated_client):
+    """Verify that closing a foodshare returns and announces its own ID, not the last one created."""
+    db = quart_app.storage.db
+    ends = datetime.now(timezone.utc) + timedelta(hours=1)
+    first_id = await db.add_foodshare("First Pizza", "Union", ends, True, 1)
+    second_id = await db.add_foodshare("Second Pizza", "Union", ends, True, 1)
+    subscriber = quart_app.storage.events.subscribe()
+
+    response = await authenticated_client.post("/foodshares/close", json={"foodshare_id": first_id})
+    assert response.status_code == 200
+    assert (await response.get_json())["foodshare_id"] == first_id
+    event = await subscriber.next_event(1)
+    assert (event.event, event.foodshare_id) == ("closed", first_id)
+    assert (await db.get_foodshare(second_id)).active is True
+
+
 async def test_close_foodshare_permissions(authenticated_client, admin_client):
     """Verify that only the creator can close a foodshare."""
     db = quart_app.storage.db
@@ -130,3 +229,322 @@ async def test_close_foodshare_permissions(authenticated_client, admin_client):
     fs = await db.get_foodshare(fs_id)
     assert fs
     assert fs.active is False
+
+
+async def test_get_foodshares_etag_not_modified(authenticated_client):
+    """Verify that an unchanged feed is answered with 304 without querying the database."""
+    db = quart_app.storage.db
+    await db.add_foodshare("ETag Pizza", "Union", datetime.now(timezone.utc) + timedelta(hours=1), True, 1)
+
+    response = await authenticated_client.get("/foodshares")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag
+
+    statements = []
+    await db.conn.set_trace_callback(statements.append)
+    response = await authenticated_client.get("/foodshares", headers={"If-None-Match": etag})
+    await db.conn.set_trace_callback(None)
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert await response.get_data() == b""
+    assert statements == []
+
+
+async def test_get_foodshares_etag_changes_on_write(authenticated_client):
+    """Verify that creating and closing foodshares invalidates the feed ETag."""
+    db = quart_app.storage.db
+    response = await authenticated_client.get("/foodshares")
+    empty_etag = response.headers["ETag"]
+
+    fs_id = await db.add_foodshare("New Pizza", "Union", datetime.now(timezone.utc) + timedelta(hours=1), True, 1)
+    response = await authenticated_client.get("/foodshares", headers={"If-None-Match": empty_etag})
+    assert response.status_code == 200
+    created_etag = response.headers["ETag"]
+    assert created_etag != empty_etag
+
+    await authenticated_client.post("/foodshares/close", json={"foodshare_id": fs_id})
+    response = await authenticated_client.get("/foodshares", headers={"If-None-Match": created_etag})
+    assert response.status_code == 200
+    assert await response.get_json() == []
+    assert response.headers["ETag"] == empty_etag
+
+
+async def test_get_foodshares_etag_revalidated_after_expiry(authenticated_client):
+    """Verify that the cached validator is not trusted past the earliest foodshare end time."""
+    db = quart_app.storage.db
+    ends = datetime.now(timezone.utc) + timedelta(hours=1)
+    await db.add_foodshare("Ending Pizza", "Union", ends, True, 1)
+
+    response = await authenticated_client.get("/foodshares")
+    assert response.status_code == 200
+    assert quart_app.feed_cache.get(db.feed_version) is not None
+
+    with patch("src.cache.time.time", return_value=ends.timestamp() + 1):
+        assert quart_app.feed_cache.get(db.feed_version) is None
+
+
+async def test_get_foodshares_ended_but_active_is_cached(authenticated_client):
+    """Verify that a foodshare that ended but is not yet closed leaves the feed and does not defeat the cache."""
+    db = quart_app.storage.db
+    now = datetime.now(timezone.utc)
+    await db.add_foodshare("Ended Pizza", "Union", now - timedelta(seconds=2), True, 1)
+    await db.add_foodshare("Live Pizza", "Union", now + timedelta(hours=1), True, 1)
+
+    with patch.object(db, "get_all_active_foodshares", wraps=db.get_all_active_foodshares) as load:
+        for _ in range(5):
+            response = await authenticated_client.get("/foodshares")
+            assert [f["name"] for f in await response.get_json()] == ["Live Pizza"]
+
+    assert load.await_count == 1
+
+
+async def test_get_foodshares_gzip(authenticated_client):
+    """Verify that the pre-compressed feed is served to clients that accept gzip."""
+    db = quart_app.storage.db
+    await db.add_foodshare("Gzip Pizza", "Union", datetime.now(timezone.utc) + timedelta(hours=1), True, 1)
+
+    response = await authenticated_client.get("/foodshares", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    feed = json.loads(gzip.decompress(await response.get_data()))
+    assert feed[0]["name"] == "Gzip Pizza"
+
+    plain = await authenticated_client.get("/foodshares")
+    assert "Content-Encoding" not in plain.headers
+    assert plain.headers["ETag"] != response.headers["ETag"]
+
+
+async def test_get_foodshares_concurrent_readers_share_one_build(authenticated_client):
+    """Verify that concurrent requests after a write trigger a single feed query."""
+    db = quart_app.storage.db
+    await db.add_foodshare("Shared Pizza", "Union", datetime.now(timezone.utc) + timedelta(hours=1), True, 1)
+    await authenticated_client.get("/auth/me")  # warm the session cache
+
+    statements = []
+    await db.conn.set_trace_callback(statements.append)
+    responses = await asyncio.gather(*(authenticated_client.get("/foodshares") for _ in range(20)))
+    await db.conn.set_trace_callback(None)
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.headers["ETag"] for r in responses}) == 1
+    assert len([s for s in statements if "FROM foodshares" in s]) == 1
+
+
+async def test_get_foodshare_changes(authenticated_client):
+    """Verify that the changes endpoint reports created, updated, closed and deleted foodshares."""
+    db = quart_app.storage.db
+    ends = datetime.now(timezone.utc) + timedelta(hours=1)
+    closed_id = await db.add_foodshare("Closing Pizza", "Union", ends, True, 1)
+    deleted_id = await db.add_foodshare("Deleted Pizza", "Union", ends, True, 1)
+    updated_id = await db.add_foodshare("Updated Pizza", "Union", ends, True, 1)
+
+    response = await authenticated_client.get("/foodshares")
+    cursor = response.headers["X-Changes-Cursor"]
+
+    created_id = await db.add_foodshare("Created Pizza", "Union", ends, True, 1)
+    await db.add_restriction_to_foodshare_by_name(updated_id, "Vegan")
+    await authenticated_client.post("/foodshares/close", json={"foodshare_id": closed_id})
+    await db.delete_foodshare_record(deleted_id)
+
+    response = await authenticated_client.get(f"/foodshares/changes?since={cursor}")
+    assert response.status_code == 200
+    res_json = await response.get_json()
+    changes = {c["foodshare_id"]: c for c in res_json["changes"]}
+    assert changes[created_id]["change"] == "created"
+    assert changes[created_id]["foodshare"]["name"] == "Created Pizza"
+    assert changes[updated_id]["change"] == "updated"
+    assert changes[updated_id]["foodshare"]["restrictions"] == ["Vegan"]
+    assert changes[closed_id] == {"foodshare_id": closed_id, "change": "closed", "foodshare": None}
+    assert changes[deleted_id] == {"foodshare_id": deleted_id, "change": "deleted", "foodshare": None}
+
+    # Nothing changed since the returned cursor
+    response = await authenticated_client.get(f"/foodshares/changes?since={res_json['cursor']}")
+    assert (await response.get_json())["changes"] == []
+
+
+async def test_get_foodshare_changes_reports_expired(authenticated_client):
+    """Verify that foodshares whose end time passed after the cursor are reported as expired."""
+    db = quart_app.storage.db
+    fs_id = await db.add_foodshare("Ended Pizza", "Union", datetime.now(timezone.utc) - timedelta(minutes=30), True, 1)
+
+    cursor = encode_changes_cursor(await db.get_latest_change_id(), datetime.now(timezone.utc) - timedelta(hours=1))
+    response = await authenticated_client.get(f"/foodshares/changes?since={cursor}")
+    assert response.status_code == 200
+    assert (await response.get_json())["changes"] == [{"foodshare_id": fs_id, "change": "expired", "foodshare": None}]
+
+
+async def test_get_foodshare_changes_invalid_cursor(authenticated_client):
+    """Verify that a missing, malformed or pruned cursor is rejected."""
+    db = quart_app.storage.db
+    response = await authenticated_client.get("/foodshares/changes")
+    assert response.status_code == 400
+
+    for since in ("not-a-cursor", "1-99999999999999999999999", f"{2**63}-5"):
+        response = await authenticated_client.get(f"/foodshares/changes?since={since}")
+        assert response.status_code == 400, since
+
+    for i in range(3):
+        await db.add_foodshare(f"Pizza {i}", "Union", datetime.now(timezone.utc) + timedelta(hours=1), True, 1)
+    await db.conn.execute("UPDATE foodshare_changes SET changed_at = '2000-01-01 00:00:00' WHERE change_id < 3")
+    await db.conn.commit()
+    await quart_app.storage.run_cleanup(batch_size=10)
+    response = await authenticated_client.get(
+        f"/foodshares/changes?since={encode_changes_cursor(0, datetime.now(timezone.utc))}"
+    )
+    assert response.status_code == 410
+
+
+async def test_foodshare_events_stream(authenticated_client):
+    """Verify that created, closed and expired foodshares are pushed to event stream subscribers."""
+    storage = quart_app.storage
+    img_buf = io.BytesIO()
+    Image.new("RGB", (100, 100), color="red").save(img_buf, format="JPEG")
+
+    async with authenticated_client.client.request(
+        "/foodshares/events", headers=authenticated_client.headers
+    ) as connection:
+        await connection.send_complete()
+        assert await asyncio.wait_for(connection.receive(), 1) == b": connected\n\n"
+        assert connection.headers["Content-Type"] == "text/event-stream"
+
+        fs_id = await storage.create_foodshare_with_picture(
+            name="Streamed Pizza",
+            location="Union",
+            ends=datetime.now(timezone.utc) + timedelta(hours=1),
+            active=True,
+            user_id=1,
+            file_stream=img_buf.getvalue(),
+            extension="jpg",
+            mimetype="image/jpeg",
+            picture_expires=datetime.now(timezone.utc) + timedelta(days=1),
+        )
+        message = (await asyncio.wait_for(connection.receive(), 1)).decode()
+        assert message.startswith("event: created\n")
+        assert json.loads(message.split("data: ", 1)[1])["name"] == "Streamed Pizza"
+
+        await authenticated_client.post("/foodshares/close", json={"foodshare_id": fs_id})
+        message = await asyncio.wait_for(connection.receive(), 1)
+        assert message == f'event: closed\ndata: {{"foodshare_id": {fs_id}}}\n\n'.encode()
+
+        ended = (datetime.now(timezone.utc) - timedelta(minutes=1)).strftime("%Y-%m-%d %H:%M:%S")
+        insert = await storage.db.conn.execute(
+            "INSERT INTO foodshares (name, location, ends, active, user_fk_id) VALUES (?, ?, ?, ?, ?)",
+            ("Ended Pizza", "Union", ended, 1, 1),
+        )
+        await storage.db.conn.commit()
+        await storage.publish_expired_foodshares(datetime.now(timezone.utc) - timedelta(hours=1))
+        message = await asyncio.wait_for(connection.receive(), 1)
+        assert message == f'event: expired\ndata: {{"foodshare_id": {insert.lastrowid}}}\n\n'.encode()
+
+        await connection.disconnect()
+
+    assert len(storage.events) == 0
+
+
+async def test_foodshare_events_heartbeat(authenticated_client):
+    """Verify that an idle event stream sends heartbeat comments."""
+    quart_app.config["EVENTS_HEARTBEAT_INTERVAL"] = 0.01
+    try:
+        async with authenticated_client.client.request(
+            "/foodshares/events", headers=authenticated_client.headers
+        ) as connection:
+            await connection.send_complete()
+            await asyncio.wait_for(connection.receive(), 1)
+            assert await asyncio.wait_for(connection.receive(), 1) == b": heartbeat\n\n"
+            await connection.disconnect()
+    finally:
+        quart_app.config["EVENTS_HEARTBEAT_INTERVAL"] = 15.0
+
+
+async def test_create_foodshare_image_pool_saturated(authenticated_client):
+    """Verify that uploads are rejected with 503 and Retry-After while the image pool is full."""
+    from werkzeug.datastructures import FileStorage
+
+    img_buf = io.BytesIO()
+    Image.new("RGB", (100, 100), color="blue").save(img_buf, format="JPEG")
+    img_buf.seek(0)
+    form_data = {
+        "name": "Busy Pizza",
+        "location": "Union Hall",
+        "ends": (datetime.now() + timedelta(hours=2)).isoformat(),
+        "picture_expires": (datetime.now() + timedelta(days=1)).isoformat(),
+    }
+    files = {"picture": FileStorage(img_buf, filename="pizza.jpg", content_type="image/jpeg")}
+
+    images = quart_app.storage.images
+    images.pending = images.max_pending
+    try:
+        response = await authenticated_client.client.post(
+            "/foodshares", form=form_data, files=files, headers=authenticated_client.headers
+        )
+    finally:
+        images.pending = 0
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    assert await quart_app.storage.db.get_all_active_foodshares() == []
+
+
+async def test_create_foodshare_body_too_large(authenticated_client):
+    """Verify that a request body over MAX_CONTENT_LENGTH is rejected with a JSON 413."""
+    from werkzeug.datastructures import FileStorage
+
+    form_data = {
+        "name": "Huge Pizza",
+        "location": "Union Hall",
+        "ends": (datetime.now() + timedelta(hours=2)).isoformat(),
+        "picture_expires": (datetime.now() + timedelta(days=1)).isoformat(),
+    }
+    files = {"picture": FileStorage(io.BytesIO(b"x" * 4096), filename="pizza.jpg", content_type="image/jpeg")}
+
+    with patch.dict(quart_app.config, {"MAX_CONTENT_LENGTH": 1024}):
+        response = await authenticated_client.client.post(
+            "/foodshares", form=form_data, files=files, headers=authenticated_client.headers
+        )
+
+    assert response.status_code == 413
+    assert "File too large" in (await response.get_json())["error"]
+    assert await quart_app.storage.db.get_all_active_foodshares() == []
+
+
+@pytest.mark.parametrize(
+    "image_data, error",
+    [
+        (b"not an image", "Invalid image file."),
+        ("huge", "Image dimensions too large."),
+        ("bomb", "Image dimensions too large."),
+    ],
+)
+async def test_create_foodshare_rejects_bad_image_header(authenticated_client, image_data, error):
+    """Verify that uploads that are not images or declare huge dimensions are rejected before processing."""
+    from werkzeug.datastructures import FileStorage
+
+    if image_data == "huge":
+        img_buf = io.BytesIO()
+        Image.new("1", (8000, 8000)).save(img_buf, format="PNG")
+        image_data = img_buf.getvalue()
+    elif image_data == "bomb":
+        # Only a 20000x20000 header and an empty data chunk; Pillow refuses to open it at all
+        chunks = [(b"IHDR", struct.pack(">IIBBBBB", 20000, 20000, 8, 2, 0, 0, 0)), (b"IDAT", b"")]
+        image_data = b"\x89PNG\r\n\x1a\n" + b"".join(
+            struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+            for kind, body in chunks
+        )
+    form_data = {
+        "name": "Bad Pizza",
+        "location": "Union Hall",
+        "ends": (datetime.now() + timedelta(hours=2)).isoformat(),
+        "picture_expires": (datetime.now() + timedelta(days=1)).isoformat(),
+    }
+    files = {"picture": FileStorage(io.BytesIO(image_data), filename="pizza.png", content_type="image/png")}
+
+    with patch.object(quart_app.storage.images, "process") as process:
+        response = await authenticated_client.client.post(
+            "/foodshares", form=form_data, files=files, headers=authenticated_client.headers
+        )
+
+    assert response.status_code == 400
+    assert (await response.get_json())["error"] == error
+    process.assert_not_called()
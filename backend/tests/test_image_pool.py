@@ -0,0 +1,108 @@
+import asyncio
+import io
+import os
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from src.image_pool import ImagePool, ImagePoolFull
+
+pytestmark = pytest.mark.asyncio
+
+
+def create_test_image(size=(1000, 500)):
+    """Helper to create a test image in memory."""
+    buf = io.BytesIO()
+    Image.new("RGB", size, color="red").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+async def test_image_pool_processes_in_worker_process():
+    """Verify that images are processed by warmed-up worker processes."""
+    pool = ImagePool(max_workers=1)
+    try:
+        await pool.warm_up()
+        result = await pool.process(create_test_image())
+    finally:
+        await pool.close()
+
+    assert sorted(result) == [160, 400, 800]
+    with Image.open(io.BytesIO(result[800])) as img:
+        assert img.size == (800, 800)
+        assert img.format == "WEBP"
+
+
+async def test_image_pool_thread_fallback():
+    """Verify that a pool without workers processes images on threads."""
+    pool = ImagePool(max_workers=0)
+    await pool.warm_up()
+    result = await pool.process(create_test_image(size=(400, 800)))
+    await pool.close()
+
+    with Image.open(io.BytesIO(result[800])) as img:
+        assert img.size == (800, 800)
+
+
+async def test_image_pool_rejects_when_saturated():
+    """Verify that uploads beyond the queue depth are rejected until capacity frees up."""
+    pool = ImagePool(max_workers=0, max_pending=2)
+    data = create_test_image()
+    in_flight = [asyncio.create_task(pool.process(data)) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert pool.pending == 2
+
+    with pytest.raises(ImagePoolFull):
+        await pool.process(data)
+
+    await asyncio.gather(*in_flight)
+    assert pool.pending == 0
+    assert await pool.process(data)
+
+
+async def test_image_pool_invalid_image():
+    """Verify that processing errors propagate and release the queue slot."""
+    pool = ImagePool(max_workers=0)
+    with pytest.raises(Exception):
+        await pool.process(b"not an image")
+    assert pool.pending == 0
+
+
+@pytest.mark.skipif(os.name != "posix", reason="requires POSIX signals")
+async def test_image_pool_restarts_after_worker_crash():
+    """Verify that the pool replaces its workers after one dies."""
+    pool = ImagePool(max_workers=1)
+    try:
+        await pool.warm_up()
+        broken = pool._executor
+        for pid in list(broken._processes):
+            os.kill(pid, 9)
+        with pytest.raises(Exception):
+            await pool.process(create_test_image())
+        assert pool._executor is not broken
+        assert await pool.process(create_test_image())
+    finally:
+        await pool.close()
+
+
+async def test_image_pool_adaptive_method():
+    """Verify that a faster WebP method is chosen once enough images are pending."""
+    pool = ImagePool(max_workers=0, method=6, fast_method=2, fast_method_depth=2)
+    assert pool.current_method() == 6
+    pool.pending = 1
+    assert pool.current_method() == 6
+    pool.pending = 2
+    assert pool.current_method() == 2
+
+    disabled = ImagePool(max_workers=0, method=6, fast_method_depth=0)
+    disabled.pending = 10
+    assert disabled.current_method() == 6
+
+
+async def test_image_pool_passes_encoder_settings():
+    """Verify that the configured quality and chosen method reach the encoder."""
+    pool = ImagePool(max_workers=0, quality=55, method=6, fast_method=1, fast_method_depth=1)
+    pool.pending = 1
+    with patch("src.image_pool.process_image_bytes", return_value={800: b"webp"}) as process:
+        assert await pool.process(b"image") == {800: b"webp"}
+    process.assert_called_once_with(b"image", 55, 1)
@@ -1,9 +1,10 @@
 import io
+from unittest.mock import patch
 
 import pytest
-from PIL import Image
+from PIL import Image, ImageOps
 
-from src.image_utils import process_image
+from src.image_utils import ImageTooLarge, check_image_dimensions, process_image
 
 
 def create_test_image(mode="RGB", size=(1000, 500), format="PNG"):
@@ -86,3 +87,76 @@ def test_process_image_invalid_data():
     """Verify that invalid image data raises an exception."""
     with pytest.raises(Exception):
         process_image(b"not an image")
+
+
+@pytest.mark.parametrize("format", ["JPEG", "PNG"])
+def test_process_image_large_input_decoded_near_target(format):
+    """Verify that large inputs are shrunk before the full-size pipeline steps run."""
+    data = create_test_image(size=(4000, 3000), format=format)
+
+    with patch("src.image_utils.ImageOps.exif_transpose", wraps=ImageOps.exif_transpose) as transpose:
+        result = process_image(data)
+
+    # JPEG is decoded at 1/2 scale by draft(); PNG is reduced 2x after decoding
+    assert transpose.call_args.args[0].size == (2000, 1500)
+    with Image.open(result) as img:
+        assert img.size == (800, 800)
+
+
+def test_process_image_large_input_preserves_orientation():
+    """Verify that EXIF orientation is still applied after a large image is reduced."""
+    img = Image.new("RGB", (4000, 3000), color="blue")
+    img.paste("red", (0, 0, 2000, 3000))
+    exif = img.getexif()
+    exif[274] = 6  # Rotate 90 CW: the red left half ends up on top
+
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", exif=exif)
+
+    with Image.open(process_image(buf.getvalue())) as processed:
+        assert processed.getpixel((400, 10))[0] > 200
+        assert processed.getpixel((400, 790))[2] > 200
+
+
+def test_process_image_heic():
+    """Verify that HEIC uploads are processed."""
+    pytest.importorskip("pillow_heif")
+    data = create_test_image(size=(2400, 1800), format="HEIF")
+
+    with Image.open(process_image(data)) as img:
+        assert img.size == (800, 800)
+        assert img.format == "WEBP"
+
+
+def test_process_image_encoder_settings():
+    """Verify that lower quality produces a smaller file and every method yields a valid WebP."""
+    img = Image.effect_noise((1000, 1000), 60).convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    data = buf.getvalue()
+
+    high = process_image(data, quality=90, method=0).getbuffer().nbytes
+    low = process_image(data, quality=30, method=0).getbuffer().nbytes
+    assert low < high
+
+    for method in (0, 6):
+        with Image.open(process_image(data, method=method)) as result:
+            assert result.format == "WEBP"
+            assert result.size == (800, 800)
+
+
+def test_check_image_dimensions():
+    """Verify that dimensions are read from the header of a valid image."""
+    assert check_image_dimensions(create_test_image(size=(1000, 500))) == (1000, 500)
+
+
+def test_check_image_dimensions_too_large():
+    """Verify that an image declaring more pixels than allowed is rejected before decoding."""
+    # A 1-bit PNG keeps a 64 MP image small to create
+    data = create_test_image(mode="1", size=(8000, 8000))
+
+    with pytest.raises(ImageTooLarge):
+        check_image_dimensions(data)
+    with pytest.raises(ImageTooLarge):
+        process_image(data)
+    assert check_image_dimensions(data, max_pixels=64_000_000) == (8000, 8000)
@@ -0,0 +1,112 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from src.database import DatabaseManager
+from src.migrations import MIGRATIONS, discover_migrations, migrate, schema_version, split_statements
+
+
+def write_migrations(directory, scripts: dict[str, str]):
+    directory.mkdir()
+    for name, script in scripts.items():
+        (directory / f"{name}.sql").write_text(script)
+    return discover_migrations(directory)
+
+
+def test_split_statements_keeps_trigger_bodies_whole():
+    """Verify that scripts are split at complete statements, not at every semicolon."""
+    script = """
+        -- A table
+        CREATE TABLE t (x INTEGER);
+        CREATE TRIGGER trg AFTER INSERT ON t
+        BEGIN
+            INSERT INTO t (x) VALUES (1);
+            DELETE FROM t WHERE x = 2;
+        END;
+        -- Trailing comment
+    """
+    statements = split_statements(script)
+    assert len(statements) == 2
+    assert statements[1].startswith("CREATE TRIGGER") and statements[1].endswith("END;")
+
+    with pytest.raises(ValueError):
+        split_statements("CREATE TABLE t (x INTEGER);\nCREATE TABLE u (")
+
+
+def test_discover_migrations_rejects_gaps(tmp_path):
+    """Verify that migrations are ordered by version and a missing version is an error."""
+    migrations = write_migrations(tmp_path / "ok", {"0002_second": "", "0001_first": ""})
+    assert [migration.name for migration in migrations] == ["0001_first", "0002_second"]
+
+    with pytest.raises(ValueError):
+        write_migrations(tmp_path / "gap", {"0001_first": "", "0003_third": ""})
+    with pytest.raises(ValueError):
+        write_migrations(tmp_path / "misnamed", {"first": ""})
+
+
+async def test_new_database_reaches_latest_version(db_manager):
+    """Verify that init_tables applies every migration to a new database."""
+    assert await schema_version(db_manager.conn) == MIGRATIONS[-1].version
+    assert await db_manager.migrate(dry_run=True) == []
+
+
+async def test_current_database_costs_one_pragma_read(db_manager):
+    """Verify that migrating an up-to-date database runs nothing but the version read."""
+    statements = []
+    await db_manager.conn.set_trace_callback(statements.append)
+    assert await db_manager.migrate() == []
+    await db_manager.conn.set_trace_callback(None)
+
+    assert statements == ["PRAGMA user_version"]
+
+
+async def test_dry_run_leaves_database_untouched(tmp_path):
+    """Verify that a dry run reports pending migrations without applying them."""
+    manager = DatabaseManager(str(tmp_path / "dry.sqlite"))
+    await manager.connect()
+    try:
+        pending = await manager.migrate(dry_run=True)
+        assert pending == list(MIGRATIONS)
+        assert await schema_version(manager.conn) == 0
+        async with manager.conn.execute("SELECT COUNT(*) FROM sqlite_master") as cursor:
+            assert (await cursor.fetchone())[0] == 0
+
+        assert await manager.migrate() == list(MIGRATIONS)
+        assert await schema_version(manager.conn) == MIGRATIONS[-1].version
+    finally:
+        await manager.close()
+
+
+async def test_failed_migration_rolls_back(db_manager, tmp_path):
+    """Verify that a failing migration leaves neither its changes nor its version behind."""
+    version = MIGRATIONS[-1].version
+    migrations = write_migrations(
+        tmp_path / "migrations",
+        {
+            **{migration.name: migration.path.read_text() for migration in MIGRATIONS},
+            f"{version + 1:04d}_broken": "CREATE TABLE extra (x INTEGER);\nINSERT INTO missing VALUES (1);",
+        },
+    )
+
+    with pytest.raises(sqlite3.OperationalError):
+        await migrate(db_manager.conn, migrations)
+
+    assert await schema_version(db_manager.conn) == version
+    async with db_manager.conn.execute("SELECT name FROM sqlite_master WHERE name = 'extra'") as cursor:
+        assert await cursor.fetchone() is None
+
+
+async def test_concurrent_workers_apply_each_migration_once(tmp_path):
+    """Verify that workers starting together on one database do not apply a migration twice."""
+    path = str(tmp_path / "shared.sqlite")
+    managers = [DatabaseManager(path) for _ in range(3)]
+    for manager in managers:
+        await manager.connect()
+    try:
+        applied = await asyncio.gather(*(manager.migrate() for manager in managers))
+        assert sum(len(migrations) for migrations in applied) == len(MIGRATIONS)
+        assert await schema_version(managers[0].conn) == MIGRATIONS[-1].version
+    finally:
+        for manager in managers:
+            await manager.close()
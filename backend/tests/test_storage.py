@@ -38,9 +38,10 @@ class TestLocalFileStorageSave:
 
         # Resolve the local physical path for verification
         filename = os.path.basename(uri)
-        local_path = anyio.Path(storage.upload_folder) / filename
+        local_path = anyio.Path(storage.local_path(uri))
         assert uri.endswith(".txt")
-        assert uri.startswith("/images/")
+        assert uri == f"/images/{filename[:2]}/{filename[2:4]}/{filename}"
+        assert local_path == anyio.Path(storage.upload_folder) / filename[:2] / filename[2:4] / filename
         assert await local_path.exists()
 
         async with await anyio.open_file(str(local_path), "rb") as f:
@@ -62,19 +63,76 @@ class TestLocalFileStorageSave:
         """SAVE-03: Can save an empty file stream successfully."""
         uri = await storage.save(b"", "txt")
 
-        local_path = anyio.Path(storage.upload_folder) / os.path.basename(uri)
+        local_path = anyio.Path(storage.local_path(uri))
         assert await local_path.exists()
 
         stat = await local_path.stat()
         assert stat.st_size == 0
 
+    @pytest.mark.asyncio
+    async def test_save_is_atomic(self, storage):
+        """SAVE-04: The file appears only under its final name, and a failed write leaves nothing behind."""
+        uri = await storage.save(b"complete", "webp")
+        directory = anyio.Path(storage.local_path(uri)).parent
+        assert [p.name async for p in directory.iterdir()] == [os.path.basename(uri)]
+
+        with patch("anyio.Path.rename", side_effect=OSError("Disk full")):
+            with pytest.raises(OSError):
+                await storage.save(b"interrupted", "webp")
+        files = [p async for p in anyio.Path(storage.upload_folder).rglob("*") if await p.is_file()]
+        assert files == [anyio.Path(storage.local_path(uri))]
+
+    @pytest.mark.asyncio
+    async def test_iter_files_batches(self, storage):
+        """SAVE-05: iter_files streams every stored file, flat and sharded, in bounded batches."""
+        uris = {await storage.save(b"x" * i, "webp") for i in range(5)}
+        await (anyio.Path(storage.upload_folder) / "flat.webp").write_bytes(b"flat")
+
+        batches = [batch async for batch in storage.iter_files(batch_size=2)]
+        assert [len(batch) for batch in batches] == [2, 2, 2]
+        files = [file for batch in batches for file in batch]
+        assert {file.uri for file in files} == uris | {"/images/flat.webp"}
+        for file in files:
+            assert file.size == (await anyio.Path(file.path).stat()).st_size
+
+
+class TestLocalFileStoragePaths:
+    def test_local_path_flat_and_sharded(self, storage):
+        """PATH-01: Flat URIs map into the upload folder, sharded URIs into their shard directory."""
+        folder = storage.upload_folder
+        assert storage.local_path("/images/abcdef.webp") == os.path.join(folder, "abcdef.webp")
+        assert storage.local_path("/images/ab/cd/abcdef.webp") == os.path.join(folder, "ab/cd/abcdef.webp")
+        assert storage.sharded_uri("/images/abcdef.webp") == "/images/ab/cd/abcdef.webp"
+        assert storage.flat_uri("/images/ab/cd/abcdef.webp") == "/images/abcdef.webp"
+
+    def test_local_path_stays_in_upload_folder(self, storage):
+        """PATH-02: URIs with other directories cannot reach outside the upload folder."""
+        assert storage.local_path("/images/../../etc/passwd") == os.path.join(storage.upload_folder, "passwd")
+        assert storage.local_path("/images/xx/yy/abcdef.webp") == os.path.join(storage.upload_folder, "abcdef.webp")
+
+    @pytest.mark.asyncio
+    async def test_shard_flat_files(self, storage):
+        """PATH-03: Files saved before the sharded layout are moved into their shard directories."""
+        folder = anyio.Path(storage.upload_folder)
+        await (folder / "abcdef.webp").write_bytes(b"flat")
+        await (folder / "ab" / "cd").mkdir(parents=True)
+        await (folder / "ab" / "cd" / "abcdxx.webp").write_bytes(b"sharded")
+        await (folder / "abcdxx.webp").write_bytes(b"duplicate")
+
+        assert await storage.shard_flat_files() == ["/images/abcdef.webp"]
+        assert await (folder / "ab" / "cd" / "abcdef.webp").read_bytes() == b"flat"
+        assert not await (folder / "abcdef.webp").exists()
+        # A file whose sharded path is taken stays where it is
+        assert await (folder / "abcdxx.webp").read_bytes() == b"duplicate"
+        assert await storage.shard_flat_files() == []
+
 
 class TestLocalFileStorageDelete:
     @pytest.mark.asyncio
     async def test_delete_existing_file(self, storage):
         """DEL-01: Calling delete removes the file and returns True."""
         uri = await storage.save(b"data to delete", "txt")
-        local_path = anyio.Path(storage.upload_folder) / os.path.basename(uri)
+        local_path = anyio.Path(storage.local_path(uri))
         assert await local_path.exists()
 
         result = await storage.delete(uri)
@@ -9,6 +9,11 @@ from PIL import Image
 from src.service import StorageService
 
 
+async def stored_files(storage_service: StorageService) -> list[anyio.Path]:
+    """List every file in the upload folder, including the shard directories."""
+    return [p async for p in anyio.Path(storage_service.storage.upload_folder).rglob("*") if await p.is_file()]
+
+
 @pytest.mark.asyncio
 async def test_user_registration(storage_service: StorageService):
     email = "test@maine.edu"
@@ -44,14 +49,12 @@ async def test_storage_service_saves_file_and_metadata(storage_service: StorageS
 
     assert picture_id is not None
 
-    import os
-
     db_picture = await storage_service.db.get_picture(picture_id)
     assert db_picture is not None
     assert db_picture.mimetype == "image/webp"  # Should be converted to webp
 
     # Resolve the local physical path from URI
-    local_path = os.path.join(storage_service.storage.upload_folder, os.path.basename(db_picture.filepath))
+    local_path = storage_service.storage.local_path(db_picture.filepath)
     assert anyio.Path(local_path).exists
 
     async with aiofiles.open(local_path, "rb") as f:
@@ -61,3 +64,411 @@ async def test_storage_service_saves_file_and_metadata(storage_service: StorageS
     with Image.open(io.BytesIO(saved_bytes)) as saved_img:
         assert saved_img.format == "WEBP"
         assert saved_img.size == (800, 800)
+
+
+@pytest.mark.asyncio
+async def test_storage_service_saves_renditions(storage_service: StorageService):
+    """Verify that every rendition is stored, recorded, and removed with its foodshare."""
+    img = Image.new("RGB", (1200, 900), color="green")
+    img_byte_arr = io.BytesIO()
+    img.save(img_byte_arr, format="JPEG")
+    expires = datetime.now(tz=timezone.utc) + timedelta(days=1)
+
+    fs_id = await storage_service.create_foodshare_with_picture(
+        name="Rendition Pizza",
+        location="Union",
+        ends=datetime.now(tz=timezone.utc) + timedelta(hours=1),
+        active=True,
+        user_id=None,
+        file_stream=img_byte_arr.getvalue(),
+        extension="jpg",
+        mimetype="image/jpeg",
+        picture_expires=expires,
+    )
+    assert fs_id
+
+    foodshare = (await storage_service.db.get_all_active_foodshares())[0]
+    picture = foodshare.picture
+    assert picture is not None
+    assert [r.size for r in picture.renditions] == [160, 400, 800]
+    assert picture.renditions[-1].filepath == picture.filepath
+    assert picture == await storage_service.db.get_picture(picture.picture_id)
+
+    local_paths = []
+    for rendition in picture.renditions:
+        local_path = storage_service.storage.local_path(rendition.filepath)
+        with Image.open(local_path) as saved_img:
+            assert saved_img.size == (rendition.size, rendition.size)
+        local_paths.append(local_path)
+
+    assert await storage_service.delete_foodshare(fs_id)
+    assert not [path for path in local_paths if await anyio.Path(path).exists()]
+    assert await storage_service.db.get_picture(picture.picture_id) is None
+
+
+@pytest.mark.asyncio
+async def test_cleanup_expired_pictures_removes_renditions(storage_service: StorageService):
+    """Verify that expired pictures have every rendition file deleted."""
+    img_byte_arr = io.BytesIO()
+    Image.new("RGB", (100, 100), color="red").save(img_byte_arr, format="PNG")
+
+    picture_id = await storage_service.add_picture_with_file(
+        file_stream=img_byte_arr.getvalue(),
+        extension="png",
+        mimetype="image/png",
+        expires=datetime.now(tz=timezone.utc) - timedelta(days=1),
+    )
+    assert picture_id
+
+    assert await storage_service.cleanup_expired_pictures() == 3
+    assert await anyio.Path(storage_service.storage.upload_folder).exists()
+    assert await stored_files(storage_service) == []
+    async with storage_service.db.conn.execute("SELECT COUNT(*) FROM picture_renditions") as cursor:
+        assert (await cursor.fetchone())[0] == 0
+
+
+@pytest.mark.asyncio
+async def test_identical_uploads_share_picture(storage_service: StorageService):
+    """Verify that re-posting the same photo reuses its files and keeps them until the last foodshare is deleted."""
+    from unittest.mock import patch
+
+    img_byte_arr = io.BytesIO()
+    Image.new("RGB", (300, 200), color="orange").save(img_byte_arr, format="JPEG")
+    photo = img_byte_arr.getvalue()
+    first_expires = datetime.now(tz=timezone.utc) + timedelta(days=1)
+
+    async def create(picture_expires: datetime) -> int | None:
+        return await storage_service.create_foodshare_with_picture(
+            name="Weekly Pantry",
+            location="Union",
+            ends=datetime.now(tz=timezone.utc) + timedelta(hours=1),
+            active=True,
+            user_id=None,
+            file_stream=photo,
+            extension="jpg",
+            mimetype="image/jpeg",
+            picture_expires=picture_expires,
+        )
+
+    first_id = await create(first_expires)
+    with patch.object(storage_service.images, "process", wraps=storage_service.images.process) as process:
+        second_id = await create(first_expires + timedelta(days=1))
+    process.assert_not_called()
+    assert first_id and second_id and first_id != second_id
+
+    first = await storage_service.db.get_foodshare(first_id)
+    second = await storage_service.db.get_foodshare(second_id)
+    assert first and second and first.picture and second.picture
+    assert first.picture.picture_id == second.picture.picture_id
+    # The shared picture lives as long as its latest reference
+    assert second.picture.expires == (first_expires + timedelta(days=1)).isoformat()
+    assert len(await stored_files(storage_service)) == 3
+
+    assert await storage_service.delete_foodshare(first_id)
+    assert len(await stored_files(storage_service)) == 3
+    assert await storage_service.db.get_picture(second.picture.picture_id)
+
+    assert await storage_service.delete_foodshare(second_id)
+    assert await stored_files(storage_service) == []
+    assert await storage_service.db.get_picture(second.picture.picture_id) is None
+
+
+@pytest.mark.asyncio
+async def test_expired_picture_not_reused(storage_service: StorageService):
+    """Verify that an identical upload is processed again when the stored copy has expired."""
+    img_byte_arr = io.BytesIO()
+    Image.new("RGB", (100, 100), color="purple").save(img_byte_arr, format="PNG")
+
+    async def add(expires: datetime) -> int | None:
+        return await storage_service.add_picture_with_file(img_byte_arr.getvalue(), "png", "image/png", expires)
+
+    expired_id = await add(datetime.now(tz=timezone.utc) - timedelta(days=1))
+    live_id = await add(datetime.now(tz=timezone.utc) + timedelta(days=1))
+    assert expired_id and live_id and expired_id != live_id
+
+    assert await storage_service.cleanup_expired_pictures() == 3
+    assert await storage_service.db.get_picture(live_id)
+    assert len(await stored_files(storage_service)) == 3
+
+
+@pytest.mark.asyncio
+async def test_migrate_to_sharded_layout(storage_service: StorageService):
+    """Verify that flat picture files are moved into shard directories and their paths rewritten."""
+    folder = anyio.Path(storage_service.storage.upload_folder)
+    await (folder / "0123abcd.webp").write_bytes(b"main")
+    await (folder / "4567abcd.webp").write_bytes(b"thumb")
+    expires = datetime.now(tz=timezone.utc) + timedelta(days=1)
+    picture_id = await storage_service.db.add_picture(
+        expires, "/images/0123abcd.webp", "image/webp", {160: "/images/4567abcd.webp", 800: "/images/0123abcd.webp"}
+    )
+    # A record whose file is missing keeps its path
+    missing_id = await storage_service.db.add_picture(expires, "/images/89abcdef.webp", "image/webp")
+
+    assert await storage_service.migrate_to_sharded_layout() == 3
+
+    picture = await storage_service.db.get_picture(picture_id)
+    assert picture
+    assert picture.filepath == "/images/01/23/0123abcd.webp"
+    assert [r.filepath for r in picture.renditions] == ["/images/45/67/4567abcd.webp", "/images/01/23/0123abcd.webp"]
+    assert await (folder / "45" / "67" / "4567abcd.webp").read_bytes() == b"thumb"
+    missing = await storage_service.db.get_picture(missing_id)
+    assert missing and missing.filepath == "/images/89abcdef.webp"
+
+    # Running it again changes nothing
+    assert await storage_service.migrate_to_sharded_layout() == 0
+
+
+@pytest.mark.asyncio
+async def test_reconcile_orphan_files(storage_service: StorageService):
+    """Verify that unreferenced old files are removed, and referenced or recent files are kept."""
+    import os
+
+    storage = storage_service.storage
+    expires = datetime.now(tz=timezone.utc) + timedelta(days=1)
+    referenced = await storage.save(b"referenced", "webp")
+    await storage_service.db.add_picture(expires, referenced, "image/webp", {800: referenced})
+    orphan = await storage.save(b"orphan!", "webp")
+    temp = anyio.Path(storage.local_path(orphan)).with_name(".partial.webp.tmp")
+    await temp.write_bytes(b"trunc")
+    recent = await storage.save(b"in progress", "webp")
+
+    # Age everything but the upload in progress past the grace period
+    old = datetime.now().timestamp() - 7200
+    for path in (storage.local_path(referenced), storage.local_path(orphan), str(temp)):
+        os.utime(path, (old, old))
+
+    dry_run = await storage_service.reconcile_orphan_files(batch_size=2, dry_run=True)
+    assert (dry_run.scanned, dry_run.orphans, dry_run.bytes_reclaimed) == (4, 2, 12)
+    assert len(await stored_files(storage_service)) == 4
+
+    report = await storage_service.reconcile_orphan_files(batch_size=2)
+    assert (report.scanned, report.orphans, report.bytes_reclaimed) == (4, 2, 12)
+    assert await storage.exists(referenced)
+    assert await storage.exists(recent)
+    assert not await storage.exists(orphan)
+    assert not await temp.exists()
+
+
+@pytest.mark.asyncio
+async def test_reconcile_orphan_files_after_interrupted_migration(storage_service: StorageService):
+    """Verify that files moved into shards are kept while their records still have the flat path."""
+    import os
+
+    storage = storage_service.storage
+    folder = anyio.Path(storage.upload_folder)
+    await (folder / "0123abcd.webp").write_bytes(b"live")
+    await (folder / "4567abcd.webp").write_bytes(b"orphan")
+    expires = datetime.now(tz=timezone.utc) + timedelta(days=1)
+    await storage_service.db.add_picture(expires, "/images/0123abcd.webp", "image/webp")
+    # The migration moved the files, then stopped before rewriting the records
+    moved = await storage.shard_flat_files()
+    old = datetime.now().timestamp() - 7200
+    for uri in moved:
+        os.utime(storage.local_path(storage.sharded_uri(uri)), (old, old))
+
+    report = await storage_service.reconcile_orphan_files()
+    assert (report.scanned, report.orphans) == (2, 1)
+    assert await storage.exists("/images/01/23/0123abcd.webp")
+    assert not await storage.exists("/images/45/67/4567abcd.webp")
+
+    # Finishing the migration points the record at the file that was kept
+    assert await storage_service.migrate_to_sharded_layout() == 1
+    assert (await storage_service.reconcile_orphan_files()).orphans == 0
+
+
+@pytest.mark.asyncio
+async def test_run_cleanup(storage_service: StorageService):
+    """Verify that one cleanup run removes a batch of each kind of expired record."""
+    from src.database_helpers import OTPRecord
+
+    db = storage_service.db
+    now = datetime.now(tz=timezone.utc)
+    img_byte_arr = io.BytesIO()
+    Image.new("RGB", (100, 100), color="red").save(img_byte_arr, format="PNG")
+    await storage_service.add_picture_with_file(img_byte_arr.getvalue(), "png", "image/png", now - timedelta(days=1))
+    ended_id = await db.add_foodshare("Ended", "Union", now - timedelta(minutes=5), True)
+    await db.save_otp(OTPRecord("expired@maine.edu", "123456", now - timedelta(minutes=1)))
+    user_id = await db.add_user("idle@maine.edu")
+    await db.create_device_token(user_id, "idle_hash")
+    await db.conn.execute("UPDATE device_tokens SET last_used = '2000-01-01 00:00:00'")
+    await db.conn.commit()
+
+    report = await storage_service.run_cleanup(batch_size=10)
+
+    assert (report.picture_files, report.foodshares, report.otp_codes, report.device_tokens) == (3, 1, 1, 1)
+    assert report.foodshare_changes == 0
+    assert (await db.get_foodshare(ended_id)).active is False
+    assert await stored_files(storage_service) == []
+
+
+@pytest.mark.asyncio
+async def test_expiry_announced_once_by_watcher_and_cleanup(storage_service: StorageService):
+    """Verify that an ended foodshare gets one 'expired' event, from the watcher, and none from cleanup."""
+    from unittest.mock import patch
+
+    db = storage_service.db
+    now = datetime.now(tz=timezone.utc)
+    ended_id = await db.add_foodshare("Ended", "Union", now - timedelta(minutes=5), True)
+    recent_id = await db.add_foodshare("Just ended", "Union", now - timedelta(seconds=5), True)
+    subscriber = storage_service.events.subscribe()
+
+    with patch.object(storage_service, "_publish_expired_periodically"):
+        storage_service.start_expiry_watcher(interval=15)
+    await storage_service.publish_expired_foodshares(now - timedelta(hours=1))
+    assert (await storage_service.run_cleanup(batch_size=10)).foodshares == 1
+
+    events = []
+    while (event := await subscriber.next_event(0.05)) is not None:
+        events.append((event.event, event.foodshare_id))
+    assert sorted(events) == [("expired", ended_id), ("expired", recent_id)]
+    assert (await db.get_foodshare(ended_id)).active is False
+    # Ended within two watcher intervals, so other workers' watchers may not have announced it yet
+    assert (await db.get_foodshare(recent_id)).active is True
+
+
+@pytest.mark.asyncio
+async def test_cleanup_scheduler_single_runner(tmp_path):
+    """Verify that when two workers share a database, only the lease holder runs the cleanup job."""
+    import asyncio
+    from unittest.mock import patch
+
+    from src.database import DatabaseManager
+    from src.storage import LocalFileStorage
+
+    workers = []
+    for name in ("first", "second"):
+        db = DatabaseManager(str(tmp_path / "shared.sqlite"))
+        await db.connect()
+        await db.init_tables()
+        workers.append(StorageService(db, LocalFileStorage(str(tmp_path / name))))
+    first, second = workers
+
+    with patch.object(first, "run_cleanup") as first_run, patch.object(second, "run_cleanup") as second_run:
+        first.start_cleanup_scheduler(interval=0.01, jitter=0, batch_size=10)
+        await asyncio.sleep(0.05)
+        second.start_cleanup_scheduler(interval=0.01, jitter=0, batch_size=10)
+        await asyncio.sleep(0.1)
+        assert first_run.call_count >= 2
+        assert second_run.call_count == 0
+
+        # Closing the holder releases the lease, and the other worker takes over
+        await first.close()
+        first_count = first_run.call_count
+        await asyncio.sleep(0.1)
+        assert second_run.call_count >= 1
+        assert first_run.call_count == first_count
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_cleanup_expired_pictures_bounded_concurrency(storage_service: StorageService):
+    """Verify that expired pictures are cleaned up chunk by chunk with a bounded number of concurrent unlinks."""
+    import asyncio
+    from unittest.mock import patch
+
+    expires = datetime.now(tz=timezone.utc) - timedelta(days=1)
+    for i in range(5):
+        await storage_service.db.add_picture(expires, f"/images/expired{i}.webp", "image/webp")
+
+    active = peak = 0
+    delete = storage_service.storage.delete
+
+    async def tracked_delete(uri: str) -> bool:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return await delete(uri)
+
+    with patch.object(storage_service.storage, "delete", side_effect=tracked_delete) as mock_delete:
+        assert await storage_service.cleanup_expired_pictures(chunk_size=4, concurrency=2) == 5
+
+    assert mock_delete.call_count == 5
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_create_foodshare_with_picture_commits_once(storage_service: StorageService):
+    """Verify that the picture, foodshare and restrictions are written in a single commit."""
+    from unittest.mock import patch
+
+    img_byte_arr = io.BytesIO()
+    Image.new("RGB", (100, 100), color="blue").save(img_byte_arr, format="PNG")
+    conn = storage_service.db.conn
+
+    with patch.object(conn, "commit", wraps=conn.commit) as commit:
+        fs_id = await storage_service.create_foodshare_with_picture(
+            name="Bagels",
+            location="Union",
+            ends=datetime.now(tz=timezone.utc) + timedelta(hours=1),
+            active=True,
+            user_id=None,
+            file_stream=img_byte_arr.getvalue(),
+            extension="png",
+            mimetype="image/png",
+            picture_expires=datetime.now(tz=timezone.utc) + timedelta(days=1),
+            restrictions=["Vegan", "Nut-Free", "Halal"],
+        )
+    assert fs_id
+    assert commit.await_count == 1
+
+    foodshare = await storage_service.db.get_foodshare(fs_id)
+    assert sorted(foodshare.restrictions) == ["Halal", "Nut-Free", "Vegan"]
+
+
+@pytest.mark.asyncio
+async def test_create_foodshare_with_picture_rolls_back(storage_service: StorageService):
+    """Verify that a failure while linking restrictions leaves no foodshare, picture or files behind."""
+    from unittest.mock import patch
+
+    img_byte_arr = io.BytesIO()
+    Image.new("RGB", (100, 100), color="blue").save(img_byte_arr, format="PNG")
+
+    with patch.object(storage_service.db, "add_foodshare_restrictions", side_effect=RuntimeError("boom")):
+        fs_id = await storage_service.create_foodshare_with_picture(
+            name="Bagels",
+            location="Union",
+            ends=datetime.now(tz=timezone.utc) + timedelta(hours=1),
+            active=True,
+            user_id=None,
+            file_stream=img_byte_arr.getvalue(),
+            extension="png",
+            mimetype="image/png",
+            picture_expires=datetime.now(tz=timezone.utc) + timedelta(days=1),
+            restrictions=["Vegan"],
+        )
+    assert fs_id is None
+
+    for table in ("foodshares", "pictures", "picture_renditions", "restrictions"):
+        async with storage_service.db.conn.execute(f"SELECT COUNT(*) FROM {table}") as cursor:
+            assert (await cursor.fetchone())[0] == 0, table
+    assert await stored_files(storage_service) == []
+
+
+@pytest.mark.asyncio
+async def test_create_foodshare_with_picture_reused_picture_expired(storage_service: StorageService):
+    """Verify that an upload is processed after all when its matching picture expires before it is acquired."""
+    from unittest.mock import AsyncMock, patch
+
+    img_byte_arr = io.BytesIO()
+    Image.new("RGB", (100, 100), color="blue").save(img_byte_arr, format="PNG")
+
+    # The lookup sees a match that is gone by the time the transaction runs
+    with patch.object(storage_service.db, "find_picture", AsyncMock(return_value=1)):
+        fs_id = await storage_service.create_foodshare_with_picture(
+            name="Bagels",
+            location="Union",
+            ends=datetime.now(tz=timezone.utc) + timedelta(hours=1),
+            active=True,
+            user_id=None,
+            file_stream=img_byte_arr.getvalue(),
+            extension="png",
+            mimetype="image/png",
+            picture_expires=datetime.now(tz=timezone.utc) + timedelta(days=1),
+        )
+    assert fs_id
+
+    foodshare = await storage_service.db.get_foodshare(fs_id)
+    assert foodshare.picture is not None
+    assert len(await stored_files(storage_service)) == 3
@@ -43,3 +43,21 @@ async def test_get_all_surveys_admin_only(authenticated_client, admin_client):
     assert res_json[0]["num_participants"] == 10
     assert res_json[0]["experience"] == 5
     assert res_json[0]["other_thoughts"] == "Admin survey"
+
+
+async def test_get_surveys_pagination(admin_client):
+    """Verify that surveys are returned in pages using limit and after_id."""
+    for i in range(5):
+        await admin_client.post("/surveys", json={"num_participants": i, "experience": 3})
+
+    response = await admin_client.get("/surveys?limit=2")
+    assert response.status_code == 200
+    first_page = await response.get_json()
+    assert [s["num_participants"] for s in first_page] == [0, 1]
+
+    response = await admin_client.get(f"/surveys?limit=2&after_id={first_page[-1]['survey_id']}")
+    second_page = await response.get_json()
+    assert [s["num_participants"] for s in second_page] == [2, 3]
+
+    response = await admin_client.get("/surveys?limit=abc")
+    assert response.status_code == 400
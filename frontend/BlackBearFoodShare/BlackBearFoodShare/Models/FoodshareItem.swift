@@ -17,9 +17,21 @@ enum DietaryRestriction: String, CaseIterable, Identifiable, Codable {
     var id: String { self.rawValue }
 }
 
+struct PictureRendition: Codable {
+    let size: Int
+    let filepath: String
+}
+
 struct PictureMetadata: Codable {
     let filepath: String
     let mimetype: String
+    var renditions: [PictureRendition]? = nil
+
+    /// Path of the smallest rendition at least `pixels` wide, or the full-size picture.
+    func filepath(fitting pixels: Int) -> String {
+        let sorted = (renditions ?? []).sorted { $0.size < $1.size }
+        return sorted.first { $0.size >= pixels }?.filepath ?? filepath
+    }
 }
 
 struct FoodshareItem: Codable, Identifiable {
@@ -15,6 +15,8 @@ struct FoodshareItemView: View {
     
     @State private var showDeleteConfirmation = false
     @State private var showingSurvey = false
+    @State private var imageWidth: CGFloat = 0
+    @Environment(\.displayScale) private var displayScale
     
     // Check if the current user is the creator of this foodshare
     private var isOwner: Bool {
@@ -29,7 +31,10 @@ struct FoodshareItemView: View {
     }()
     
     private var imageURL: URL? {
-        guard let path = item.picture?.filepath else { return nil }
+        // Wait for the laid-out width so the right rendition is requested the first time
+        guard imageWidth > 0, let path = item.picture?.filepath(fitting: Int(imageWidth * displayScale)) else {
+            return nil
+        }
         if path.hasPrefix("http") {
             return URL(string: path)
         }
@@ -75,6 +80,11 @@ struct FoodshareItemView: View {
                         EmptyView()
                     }
                 }
+                .onGeometryChange(for: CGFloat.self) { proxy in
+                    proxy.size.width
+                } action: { width in
+                    imageWidth = width
+                }
 
                 // TEXT CONTENT
                 VStack(alignment: .leading, spacing: 12) {
@@ -7,6 +7,9 @@ import SwiftUI
 
 struct FoodshareRow: View {
     let item: FoodshareItem
+    @Environment(\.displayScale) private var displayScale
+    // Drawn size of the picture; the rendition is picked for this many points at the display scale
+    private let imageSize: CGFloat = 300
     let formatter: DateFormatter = {
         let f = DateFormatter()
         f.timeStyle = .short
@@ -14,7 +17,7 @@ struct FoodshareRow: View {
     }()
     
     private var imageURL: URL? {
-        guard let path = item.picture?.filepath else { return nil }
+        guard let path = item.picture?.filepath(fitting: Int(imageSize * displayScale)) else { return nil }
         if path.hasPrefix("http") {
             return URL(string: path)
         }
@@ -32,11 +35,11 @@ struct FoodshareRow: View {
                 image
                     .resizable()
                     .scaledToFill()
-                    .frame(width: 300, height: 300)
+                    .frame(width: imageSize, height: imageSize)
                     .clipShape(RoundedRectangle(cornerRadius: 10))
             } placeholder: {
                 ProgressView()
-                    .frame(width: 300, height: 300)
+                    .frame(width: imageSize, height: imageSize)
             }
 
             VStack(alignment: .leading) {
@@ -46,7 +49,7 @@ struct FoodshareRow: View {
                     .font(.subheadline)
                     .foregroundColor(.gray)
             }
-            .frame(maxWidth: 300, alignment: .leading)
+            .frame(maxWidth: imageSize, alignment: .leading)
             
             Spacer()
         }
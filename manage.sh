@@ -77,8 +77,20 @@ case "$1" in
     status)
         docker compose -f "$COMPOSE_FILE" ps
         ;;
+    migrate-images)
+        log_info "Moving stored pictures into the sharded layout..."
+        docker compose -f "$COMPOSE_FILE" exec backend python -m src.migrate_images
+        ;;
+    migrate-schema)
+        log_info "Applying pending database schema migrations..."
+        docker compose -f "$COMPOSE_FILE" exec backend python -m src.migrate_schema "${@:2}"
+        ;;
+    reconcile-images)
+        log_info "Removing picture files without a database record..."
+        docker compose -f "$COMPOSE_FILE" exec backend python -m src.reconcile_images "${@:2}"
+        ;;
     *)
-        echo "Usage: $0 {start|stop|restart|update|logs|status}"
+        echo "Usage: $0 {start|stop|restart|update|logs|status|migrate-images|migrate-schema|reconcile-images}"
         exit 1
         ;;
 esac